@@ -0,0 +1,129 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""Human readable output benchmark for RDMC. Renders a synthetic multi-MB payload (a large
+BIOS attribute set plus a long IML style list) with UI.print_out_human_readable and with the
+previous recursive, flush per fragment renderer, checks that both produce the same bytes and
+prints their timings.
+
+    python benchmarks/bench_human_readable.py [--entries N] [--runs N]
+"""
+
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+
+SRCDIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src")
+sys.path.insert(0, SRCDIR)
+
+from rdmc_helper import UI
+
+
+class LegacyUI(UI):
+    """The recursive renderer UI.pretty_human_readable used to be"""
+
+    def pretty_human_readable(self, content, indent=0, start=0, enterloop=False, bufsize=None):
+        space = "\n" + "\t" * indent + " " * start
+        if isinstance(content, list):
+            for item in content:
+                if item is None:
+                    continue
+
+                self.pretty_human_readable(item, indent, start)
+
+                if content.index(item) != (len(content) - 1):
+                    self.printer(space)
+        elif isinstance(content, dict):
+            for key, value in content.items():
+                if space and not enterloop:
+                    self.printer(space)
+
+                enterloop = False
+                self.printer((str(key) + "="))
+                self.pretty_human_readable(value, indent, (start + len(key) + 2))
+        else:
+            content = content if isinstance(content, str) else str(content)
+            content = '""' if not content else content
+            self.printer(content)
+
+
+def payload(entries):
+    """Synthetic BIOS settings and IML entries"""
+    bios = {
+        "@odata.id": "/redfish/v1/Systems/1/Bios/Settings/",
+        "AttributeRegistry": "BiosAttributeRegistryU30.v1_2_00",
+        "Attributes": dict(("Attribute%05d" % num, "Value%d" % (num % 7)) for num in range(entries)),
+    }
+    iml = [
+        {
+            "@odata.id": "/redfish/v1/Systems/1/LogServices/IML/Entries/%d/" % num,
+            "Created": "2023-06-27T10:%02d:%02dZ" % (num // 60 % 60, num % 60),
+            "EntryType": "Oem",
+            "Id": str(num),
+            "Message": "POST Error: 1801-iLO Advanced license key %d" % num,
+            "Oem": {"Hpe": {"Class": 5, "Code": num % 13, "Count": 1, "Repaired": False}},
+            "Severity": ["OK", "Warning", "Critical", None][num % 4],
+        }
+        for num in range(entries)
+    ]
+    return {"Bios": bios, "IML": {"Members": iml, "Members@odata.count": entries}}
+
+
+def render(uicls, content):
+    """Render content to a string with stdout redirected, returns (output, seconds)"""
+    stdout = sys.stdout
+    sys.stdout = io.StringIO()
+    try:
+        start = time.perf_counter()
+        uicls().print_out_human_readable(content)
+        elapsed = time.perf_counter() - start
+        return sys.stdout.getvalue(), elapsed
+    finally:
+        sys.stdout = stdout
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=20000, help="BIOS attributes and IML entries")
+    parser.add_argument("--runs", type=int, default=3, help="runs per renderer")
+    options = parser.parse_args()
+
+    content = payload(options.entries)
+    expected = None
+    sys.stdout.write("%-12s %10s %10s %10s\n" % ("renderer", "MB", "min(ms)", "median(ms)"))
+    for name, uicls in (("previous", LegacyUI), ("buffered", UI)):
+        times = []
+        for _ in range(options.runs):
+            output, elapsed = render(uicls, content)
+            times.append(elapsed * 1000)
+        if expected is None:
+            expected = output
+        elif output != expected:
+            sys.stdout.write("output of %s differs from the previous renderer\n" % name)
+            return 1
+        sys.stdout.write(
+            "%-12s %10.1f %10.1f %10.1f\n"
+            % (name, len(output.encode("utf-8")) / 1e6, min(times), statistics.median(times))
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""Startup benchmark for RDMC. Times a plain `ilorest --version` and compares building the
+command registry from the manifest (commands imported on first use) against importing every
+extension command up front. Run it on two checkouts to compare them.
+
+    python benchmarks/bench_startup.py [--runs N]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SRCDIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src")
+
+LAZY = """
+import rdmc, rdmc_base_classes, versioning
+rdmc.RdmcCommand(name=versioning.__shortname__, usage="", summary="", aliases=[],
+                 argparser=rdmc_base_classes.RdmcOptionParser())
+"""
+
+EAGER = LAZY + """
+import importlib
+import rdmc_manifest
+for cname, entry in rdmc_manifest.load_manifest().items():
+    try:
+        getattr(importlib.import_module(entry["module"]), cname)()
+    except Exception:
+        pass
+"""
+
+SCENARIOS = (
+    ("ilorest --version", ["rdmc.py", "--version"]),
+    ("manifest (lazy)", ["-c", LAZY]),
+    ("import all commands", ["-c", EAGER]),
+)
+
+
+def time_scenario(args, runs):
+    """Run args in a fresh interpreter runs times and return the wall times in seconds"""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.check_call(
+            [sys.executable] + args, cwd=SRCDIR, stdout=subprocess.DEVNULL
+        )
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10, help="runs per scenario")
+    options = parser.parse_args()
+
+    sys.stdout.write("%-22s %10s %10s %10s\n" % ("scenario", "min(ms)", "median(ms)", "max(ms)"))
+    for name, args in SCENARIOS:
+        times = [t * 1000 for t in time_scenario(args, options.runs)]
+        sys.stdout.write(
+            "%-22s %10.1f %10.1f %10.1f\n"
+            % (name, min(times), statistics.median(times), max(times))
+        )
+
+
+if __name__ == "__main__":
+    main()
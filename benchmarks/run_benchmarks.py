@@ -0,0 +1,369 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""Performance benchmark suite for RDMC. Starts the synthetic iLO from src/rdmc_simulator.py
+on a free local port and times the real commands against it, each run in a fresh interpreter
+the way a user runs them. Results are written as JSON; --save-baseline stores them under
+benchmarks/baselines and --compare fails when a scenario's median regressed past the threshold
+or the scenario failed in the baseline.
+
+    python benchmarks/run_benchmarks.py --runs 3 --output results.json
+    python benchmarks/run_benchmarks.py --save-baseline reference
+    python benchmarks/run_benchmarks.py --compare reference --threshold 0.25
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHDIR = os.path.dirname(os.path.abspath(__file__))
+SRCDIR = os.path.normpath(os.path.join(BENCHDIR, os.pardir, "src"))
+BASELINEDIR = os.path.join(BENCHDIR, "baselines")
+sys.path.insert(0, SRCDIR)
+
+from rdmc_replay import self_signed_cert
+from rdmc_simulator import IloSimulator
+
+RESULTS_VERSION = 1
+
+# name, description, command line, how the command logs in:
+#   None      no iLO needed
+#   "inline"  credentials on the command line and --nocache, a full login per run
+#   "session" a cached session created once before the scenario runs
+SCENARIOS = (
+    ("startup", "ilorest --version", ["--version"], None),
+    ("get-bios", "get of the whole BIOS selection", ["get", "--select", "Bios."], "inline"),
+    (
+        "list-drives",
+        "list of every drive of the array controllers",
+        ["list", "--select", "HpeSmartStorageDiskDrive."],
+        "inline",
+    ),
+    (
+        "save-bios",
+        "save of the BIOS selection to a file",
+        ["save", "--select", "Bios.", "-f", "{work}/bios.json"],
+        "inline",
+    ),
+    ("load-bios", "load of the saved BIOS file", ["load", "-f", "{work}/bios.json"], "inline"),
+    (
+        "serverlogs-iml",
+        "serverlogs download of the IML",
+        ["serverlogs", "--selectlog=IML", "-f", "{work}/iml.json"],
+        "inline",
+    ),
+    (
+        "storagecontroller-drives",
+        "storagecontroller listing of the physical drives of a controller",
+        ["storagecontroller", "--controller=0", "--physicaldrives"],
+        "inline",
+    ),
+    ("pendingchanges", "pending changes of all settings resources", ["pending"], "inline"),
+    (
+        "uploadcomp-split",
+        "uploadcomp of a component split into 32MB sections",
+        [
+            "uploadcomp",
+            "--component",
+            "{work}/component.bin",
+            "--compsig",
+            "{work}/component.compsig",
+            "--forceupload",
+        ],
+        "session",
+    ),
+)
+
+SCENARIO_NAMES = [scenario[0] for scenario in SCENARIOS]
+
+
+class BenchmarkSuite(object):
+    """Runs the scenarios against a simulated iLO
+
+    :param options: command line options
+    :type options: Namespace.
+    """
+
+    def __init__(self, options):
+        self.options = options
+        self.work = tempfile.mkdtemp(prefix="ilorest-bench-")
+        self.cachedir = os.path.join(self.work, "cache")
+        self.server = None
+
+    def start(self):
+        """Start the simulator and create the input files of the scenarios"""
+        self.server = IloSimulator(
+            ("127.0.0.1", 0),
+            drives=self.options.drives,
+            iml=self.options.log_entries,
+            iel=self.options.log_entries,
+            bios_attributes=self.options.bios_attributes,
+            firmware=self.options.firmware,
+            update_polls=0,
+            latency=self.options.latency / 1000.0,
+            tls=self_signed_cert(self.work),
+        )
+        self.server.start()
+
+        # the split sections of a component are signed one by one
+        size = self.options.component_mb * 1024 * 1024
+        with open(os.path.join(self.work, "component.bin"), "wb") as component:
+            block = os.urandom(1024 * 1024)
+            for _ in range(self.options.component_mb):
+                component.write(block)
+        for name in ["component"] + [
+            "component_part%s" % num for num in range(1, size // (32 * 1024 * 1024) + 2)
+        ]:
+            with open(os.path.join(self.work, name + ".compsig"), "wb") as compsig:
+                compsig.write(b"\0" * 1024)
+
+    def stop(self):
+        """Stop the simulator and remove the work directory"""
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+        shutil.rmtree(self.work, ignore_errors=True)
+
+    def rdmc(self, args, login=None):
+        """Run one rdmc command line in a fresh interpreter
+
+        :param args: command line
+        :type args: list.
+        :param login: None, "inline" or "session"
+        :type login: str.
+        :returns: (return code, seconds, last lines of stderr)
+        """
+        cmdline = [sys.executable, os.path.join(SRCDIR, "rdmc.py"), "--nologo"]
+        if login == "session":
+            cmdline += ["--cache-dir", self.cachedir]
+        elif login == "inline":
+            cmdline += ["--nocache"]
+        cmdline += [arg.format(work=self.work) for arg in args]
+        if login == "inline":
+            cmdline += ["--url", self.server.url, "-u", "bench", "-p", "bench"]
+
+        start = time.perf_counter()
+        proc = subprocess.run(
+            cmdline,
+            cwd=self.work,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+        elapsed = time.perf_counter() - start
+        return proc.returncode, elapsed, proc.stderr.decode("utf-8", "replace")[-500:]
+
+    def prepare(self, name, login):
+        """Untimed setup a scenario needs"""
+        if name == "load-bios":
+            self.rdmc(["save", "--select", "Bios.", "-f", "{work}/bios.json"], "inline")
+        if login == "session":
+            self.rdmc(["login", self.server.url, "-u", "bench", "-p", "bench"], "session")
+
+    def run(self, name, description, args, login):
+        """Time a scenario
+
+        :returns: scenario result dictionary
+        """
+        self.prepare(name, login)
+        times = []
+        result = {"description": description, "status": "ok"}
+        for _ in range(self.options.runs):
+            returncode, elapsed, errors = self.rdmc(args, login)
+            if returncode:
+                result.update({"status": "failed", "returncode": returncode, "error": errors})
+                break
+            times.append(elapsed)
+        if login == "session":
+            self.rdmc(["logout"], "session")
+        if times:
+            result.update(
+                {
+                    "runs": [round(value, 6) for value in times],
+                    "min": round(min(times), 6),
+                    "median": round(statistics.median(times), 6),
+                    "max": round(max(times), 6),
+                }
+            )
+        return result
+
+    def scale(self):
+        """Size of the simulated data model, stored with the results"""
+        return {
+            "drives": self.options.drives,
+            "log_entries": self.options.log_entries,
+            "bios_attributes": self.options.bios_attributes,
+            "firmware": self.options.firmware,
+            "component_mb": self.options.component_mb,
+            "latency_ms": self.options.latency,
+        }
+
+
+def results_path(name):
+    """Baseline file of a baseline name, a path is used as is"""
+    if os.path.sep in name or name.endswith(".json"):
+        return name
+    return os.path.join(BASELINEDIR, name + ".json")
+
+
+def compare(results, baseline, threshold, mindelta):
+    """Compare the medians of two result sets
+
+    :param results: current results
+    :type results: dict.
+    :param baseline: baseline results
+    :type baseline: dict.
+    :param threshold: allowed relative slowdown, 0.25 is 25%
+    :type threshold: float.
+    :param mindelta: slowdowns below this many seconds are noise
+    :type mindelta: float.
+    :returns: list of (scenario, baseline median, current median, ratio, verdict)
+    """
+    rows = []
+    for name, current in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            rows.append((name, None, current.get("median"), None, "new"))
+            continue
+        if base.get("status") != "ok":
+            # nothing to compare with, the baseline has to be measured again
+            rows.append((name, None, current.get("median"), None, "BASELINE FAILED"))
+            continue
+        if current.get("status") != "ok":
+            rows.append((name, base["median"], None, None, "REGRESSED"))
+            continue
+        ratio = current["median"] / base["median"] if base["median"] else 1.0
+        verdict = "ok"
+        if ratio > 1 + threshold and current["median"] - base["median"] > mindelta:
+            verdict = "REGRESSED"
+        elif ratio < 1 - threshold and base["median"] - current["median"] > mindelta:
+            verdict = "improved"
+        rows.append((name, base["median"], current["median"], ratio, verdict))
+    return rows
+
+
+def ms(value):
+    """Seconds as a millisecond column"""
+    return "-" if value is None else "%.1f" % (value * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--runs", type=int, default=3, help="runs per scenario")
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=SCENARIO_NAMES,
+        help="scenario to run, may be repeated, all by default",
+    )
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--save-baseline", metavar="NAME", help="store the results as a baseline")
+    parser.add_argument(
+        "--compare", metavar="BASELINE", help="baseline name or results file to compare with"
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=0.25, help="allowed median slowdown, 0.25 is 25%%"
+    )
+    parser.add_argument(
+        "--min-delta", type=float, default=50.0, help="slowdowns below this many ms are ignored"
+    )
+    parser.add_argument("--drives", type=int, default=200, help="drives per controller")
+    parser.add_argument("--log-entries", type=int, default=50000, help="IML and IEL entries")
+    parser.add_argument("--bios-attributes", type=int, default=2000, help="BIOS attributes")
+    parser.add_argument("--firmware", type=int, default=500, help="firmware inventory items")
+    parser.add_argument("--component-mb", type=int, default=40, help="uploaded component size")
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated latency in ms")
+    options = parser.parse_args()
+
+    baseline = None
+    if options.compare:
+        with open(results_path(options.compare)) as basefile:
+            baseline = json.load(basefile)
+
+    suite = BenchmarkSuite(options)
+    results = {
+        "version": RESULTS_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "runs": options.runs,
+        "scale": suite.scale(),
+        "scenarios": {},
+    }
+    try:
+        suite.start()
+        sys.stdout.write("%-26s %10s %10s %10s  %s\n" % ("scenario", "min(ms)", "median(ms)",
+                                                         "max(ms)", "status"))
+        for name, description, args, login in SCENARIOS:
+            if options.scenario and name not in options.scenario:
+                continue
+            result = suite.run(name, description, args, login)
+            results["scenarios"][name] = result
+            sys.stdout.write(
+                "%-26s %10s %10s %10s  %s\n"
+                % (name, ms(result.get("min")), ms(result.get("median")), ms(result.get("max")),
+                   result["status"])
+            )
+            if result["status"] != "ok":
+                sys.stdout.write("    %s\n" % (result["error"].strip().splitlines() or [""])[-1])
+            sys.stdout.flush()
+    finally:
+        suite.stop()
+
+    for filename in (options.output, options.save_baseline and results_path(options.save_baseline)):
+        if filename:
+            if os.path.dirname(filename) and not os.path.isdir(os.path.dirname(filename)):
+                os.makedirs(os.path.dirname(filename))
+            with open(filename, "w") as outfile:
+                json.dump(results, outfile, indent=2, sort_keys=True)
+            sys.stdout.write("Results written to %s\n" % filename)
+
+    if baseline is None:
+        return 0
+    if baseline.get("scale") != results["scale"]:
+        sys.stdout.write("Warning: the baseline was measured at a different scale.\n")
+    rows = compare(results, baseline, options.threshold, options.min_delta / 1000.0)
+    sys.stdout.write(
+        "\n%-26s %12s %12s %8s  %s\n" % ("scenario", "baseline(ms)", "current(ms)", "ratio",
+                                         "verdict")
+    )
+    for name, base, current, ratio, verdict in rows:
+        sys.stdout.write(
+            "%-26s %12s %12s %8s  %s\n"
+            % (name, ms(base), ms(current), "-" if ratio is None else "%.2f" % ratio, verdict)
+        )
+    regressed = [row[0] for row in rows if row[4] == "REGRESSED"]
+    unmeasured = [row[0] for row in rows if row[4] == "BASELINE FAILED"]
+    if regressed:
+        sys.stdout.write("\nRegressed past %.0f%%: %s\n" % (options.threshold * 100,
+                                                           ", ".join(regressed)))
+    if unmeasured:
+        sys.stdout.write("\nFailed in the baseline, save it again: %s\n" % ", ".join(unmeasured))
+    return 1 if regressed or unmeasured else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
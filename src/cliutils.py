@@ -20,10 +20,8 @@
 # ---------Imports---------
 
 import os
-import re
 import sys
 import getpass
-import subprocess
 
 try:
     from rdmc_helper import UI
@@ -135,37 +133,24 @@ def find_exe(filename, path=None):
 
 
 def get_terminal_size():
-    """Returns the rows and columns of the terminal as a tuple.
+    """Returns the columns and rows of the terminal as a tuple. The size is queried in process
+    from the standard streams, then the COLUMNS and LINES environment variables.
 
-    :returns: the row and column count of the terminal
+    :returns: the column and row count of the terminal
     :rtype: tuple (cols, rows)
     """
-    _tuple = (80, 25)  # default
-
-    if os.name == "nt":
-        pass
-    else:
-        which_stty = find_exe("stty")
-
-        if which_stty:
-            args = [which_stty, "size"]
-            try:
-                procs = subprocess.Popen(
-                    args, shell=False, stdout=subprocess.PIPE, stderr=subprocess.PIPE
-                )
-            except OSError as excp:
-                raise ResourceAllocationError(str(excp))
-            (stdout_s, _) = procs.communicate()
-
-            _ = procs.wait()
-            # python3 change
-            if isinstance(stdout_s, bytes):
-                stdout_s = stdout_s.decode("utf-8")
-            if stdout_s and re.search(r"^\d+ \d+$", stdout_s):
-                rows, cols = stdout_s.split()
-                _tuple = (cols, rows)
+    for stream in (sys.__stdout__, sys.__stdin__):
+        try:
+            size = os.get_terminal_size(stream.fileno())
+            if size.columns > 0 and size.lines > 0:
+                return (size.columns, size.lines)
+        except (AttributeError, ValueError, OSError):
+            continue
 
-    return _tuple
+    try:
+        return (int(os.environ["COLUMNS"]), int(os.environ["LINES"]))
+    except (KeyError, ValueError):
+        return (80, 25)  # default
 
 
 class CLI(object):
@@ -174,12 +159,25 @@ class CLI(object):
     def __init__(self, verbosity=1, out=sys.stdout):
         self._verbosity = verbosity
         self._out = out
-        cols, rows = get_terminal_size()
-        self._cols = int(cols)
-        self._rows = int(rows)
+        self._ui = UI(verbosity)
+        self._size = None
+
+    @property
+    def _cols(self):
+        """Terminal width, resolved the first time it is needed"""
+        if self._size is None:
+            self._size = get_terminal_size()
+        return self._size[0]
+
+    @property
+    def _rows(self):
+        """Terminal height, resolved the first time it is needed"""
+        if self._size is None:
+            self._size = get_terminal_size()
+        return self._size[1]
 
     def verbosity(self, verbosity):
-        self._verbosity = verbosity
+        self._verbosity = self._ui.verbosity = verbosity
 
     def get_hrstr(self, character="-"):
         """returns a string suitable for use as a horizontal rule.
@@ -198,7 +196,7 @@ class CLI(object):
         :type flush: boolean
         """
 
-        UI(self._verbosity).printer(data, flush)
+        self._ui.printer(data, flush)
 
     def horizontalrule(self, character="-"):
         """writes a horizontal rule to the file handle.
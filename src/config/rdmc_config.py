@@ -50,6 +50,7 @@ class RdmcConfig(AutoConfigParser):
         self._ac__user_cert = ''
         self._ac__user_root_ca_key = ''
         self._ac__user_root_ca_password = ''
+        self._ac__cachettl = ''
 
     @property
     def configfile(self):
@@ -184,6 +185,20 @@ class RdmcConfig(AutoConfigParser):
         """
         return self._set('cachedir', value)
 
+    @property
+    def cachettl(self):
+        """Get the config file cache time to live rules"""
+        return self._get('cachettl')
+
+    @cachettl.setter
+    def cachettl(self, value):
+        """Set the config file cache time to live rules
+
+        :param value: comma separated <type or URI>=<seconds> rules
+        :type value: str
+        """
+        return self._set('cachettl', value)
+
     @property
     def defaultsavefilename(self):
         """Get the config file default save name"""
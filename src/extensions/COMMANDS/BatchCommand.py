@@ -0,0 +1,216 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+""" Batch Command for rdmc """
+
+import json
+import shlex
+import sys
+import time
+
+try:
+    from rdmc_helper import (
+        ReturnCodes,
+        InvalidCommandLineError,
+        InvalidCommandLineErrorOPTS,
+        InvalidFileInputError,
+        UI,
+        mask_credentials,
+    )
+except ImportError:
+    from ilorest.rdmc_helper import (
+        ReturnCodes,
+        InvalidCommandLineError,
+        InvalidCommandLineErrorOPTS,
+        InvalidFileInputError,
+        UI,
+        mask_credentials,
+    )
+
+
+class BatchCommand:
+    """Batch class command"""
+
+    def __init__(self):
+        self.ident = {
+            "name": "batch",
+            "usage": None,
+            "description": "Run a list of commands, one per line, in a single session. "
+            "Lines starting with # are ignored.\n\texample: batch commands.txt\n\n\tTo read "
+            "the commands from stdin use -\n\texample: batch - < commands.txt\n\n\tBy "
+            "default the batch stops at the first failing line. Prefix a line with - "
+            "to continue\n\tafter that line fails, or use --onerror continue for all "
+            "lines. The return\n\tcode of the batch is that of the first failing line."
+            "\n\texample: -rawdelete /redfish/v1/AccountService/Accounts/3/\n\n\t"
+            "To write a JSON summary with the return code and time of each line\n\t"
+            "example: batch commands.txt --summary summary.json",
+            "summary": "Runs a file of iLOrest commands in one session.",
+            "aliases": [],
+            "auxcommands": [],
+        }
+        self.cmdbase = None
+        self.rdmc = None
+        self.auxcommands = dict()
+
+    def run(self, line, help_disp=False):
+        """Main batch worker function
+
+        :param line: string of arguments passed in
+        :type line: str.
+        """
+        if help_disp:
+            self.parser.print_help()
+            return ReturnCodes.SUCCESS
+        try:
+            (options, args) = self.rdmc.rdmc_parse_arglist(self, line)
+        except (InvalidCommandLineErrorOPTS, SystemExit):
+            if ("-h" in line) or ("--help" in line):
+                return ReturnCodes.SUCCESS
+            else:
+                raise InvalidCommandLineErrorOPTS("")
+
+        self.batchvalidation(options, args)
+
+        results = self.batchfunction(self.readlines(args[0]), options)
+        # lines that may fail do not stop the batch but still fail it
+        retcode = next(
+            (result["retcode"] for result in results if result["retcode"]),
+            ReturnCodes.SUCCESS,
+        )
+
+        summary = {"retcode": retcode, "lines": results}
+        if options.summary:
+            with open(options.summary, "w") as summaryfile:
+                json.dump(summary, summaryfile, indent=2)
+        if options.json:
+            UI().print_out_json(summary)
+
+        return retcode
+
+    def readlines(self, filename):
+        """Read the command lines of a batch file
+
+        :param filename: batch file name, - for stdin
+        :type filename: str.
+        :returns: list of (line number, command line) tuples
+        """
+        try:
+            if filename == "-":
+                content = sys.stdin.read()
+            else:
+                with open(filename, "r") as batchfile:
+                    content = batchfile.read()
+        except IOError:
+            raise InvalidFileInputError("Unable to read batch file: %s" % filename)
+
+        lines = []
+        for number, cmdline in enumerate(content.splitlines(), 1):
+            cmdline = cmdline.strip()
+            if cmdline and not cmdline.startswith("#"):
+                lines.append((number, cmdline))
+        return lines
+
+    def batchfunction(self, lines, options):
+        """Run each command line in the current session
+
+        :param lines: list of (line number, command line) tuples
+        :type lines: list.
+        :param options: command line options
+        :type options: options.
+        :returns: list of per line results
+        """
+        results = []
+        # the banner was already printed for the batch command itself
+        self.rdmc.opts.nologo = True
+
+        for number, cmdline in lines:
+            ignore = cmdline.startswith("-")
+            if ignore:
+                cmdline = cmdline[1:].strip()
+
+            nargv = shlex.shlex(cmdline, posix=True)
+            nargv.escape = ""
+            nargv.whitespace_split = True
+            nargv = list(nargv)
+
+            start = time.perf_counter()
+            retcode = self.rdmc.run_commandline(nargv)
+            results.append(
+                {
+                    "line": number,
+                    "command": mask_credentials(nargv),
+                    "retcode": retcode,
+                    "time": round(time.perf_counter() - start, 3),
+                    "continue": ignore or options.onerror == "continue",
+                }
+            )
+            if self.rdmc.opts.verbose:
+                self.rdmc.ui.printer(
+                    "Line %s: return code %s (%.3fs)\n"
+                    % (number, retcode, results[-1]["time"])
+                )
+            if retcode != ReturnCodes.SUCCESS and not results[-1]["continue"]:
+                self.rdmc.ui.error(
+                    "Line %s failed with return code %s, stopping batch." % (number, retcode)
+                )
+                break
+
+        return results
+
+    def batchvalidation(self, options, args):
+        """Batch method validation function
+
+        :param options: command line options
+        :type options: list.
+        :param args: command line arguments
+        :type args: list.
+        """
+        if len(args) != 1:
+            raise InvalidCommandLineError("Batch command requires one batch file or -.")
+
+    def definearguments(self, customparser):
+        """Wrapper function for new command main function
+
+        :param customparser: command line input
+        :type customparser: parser.
+        """
+        if not customparser:
+            return
+
+        customparser.add_argument(
+            "--onerror",
+            dest="onerror",
+            choices=["stop", "continue"],
+            help="Stop at the first failing line (default) or continue with the remaining "
+            "lines. Either way the batch returns the code of the first failing line.",
+            default="stop",
+        )
+        customparser.add_argument(
+            "--summary",
+            dest="summary",
+            help="Write a JSON summary with the return code and time of each line to the "
+            "provided file.",
+            default=None,
+        )
+        customparser.add_argument(
+            "-j",
+            "--json",
+            dest="json",
+            action="store_true",
+            help="Print the JSON summary to stdout once the batch completes.",
+            default=False,
+        )
@@ -0,0 +1,253 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+""" Fleet Command for rdmc """
+
+import os
+import re
+import json
+
+from argparse import REMAINDER
+
+try:
+    from rdmc_helper import (
+        ReturnCodes,
+        InvalidCommandLineError,
+        InvalidCommandLineErrorOPTS,
+        MultipleServerConfigError,
+    )
+except ImportError:
+    from ilorest.rdmc_helper import (
+        ReturnCodes,
+        InvalidCommandLineError,
+        InvalidCommandLineErrorOPTS,
+        MultipleServerConfigError,
+    )
+
+try:
+    from rdmc_fleet import DEFAULT_WORKERS, FleetExecutor, output_directory, read_inventory
+except ImportError:
+    from ilorest.rdmc_fleet import (
+        DEFAULT_WORKERS,
+        FleetExecutor,
+        output_directory,
+        read_inventory,
+    )
+
+# login options the inventory file provides for every server
+LOGIN_ARGS = ["--url", "--sessionid", "-u", "--user", "-p", "--password"]
+
+
+class FleetCommand:
+    """Fleet class command"""
+
+    def __init__(self):
+        self.ident = {
+            "name": "fleet",
+            "usage": None,
+            "description": "Run a command against every server of an inventory file "
+            "concurrently.\n\texample: fleet --inventory hosts.txt --workers 32 -- "
+            "serverinfo --all -j\n\n\tInventory file format (1 server per line, a line "
+            "with only a\n\thostname uses the -u and -p options of the fleet command)"
+            "\n\t--url <iLO url/hostname> -u admin -p password\n\t<iLO url/hostname>"
+            "\n\n\tThe output of every server is saved to <server>.txt and all of them "
+            "are\n\tcollected into fleet.json, output printed with -j/--json is\n\tincluded "
+            "as JSON.\n\texample: fleet --inventory hosts.txt -u admin -p password "
+            "--timeout 300\n\t--retries 2 -o /logs -- rawget /redfish/v1/Managers/1/",
+            "summary": "Runs a command against many servers concurrently.",
+            "aliases": [],
+            "auxcommands": [],
+        }
+        self.cmdbase = None
+        self.rdmc = None
+        self.auxcommands = dict()
+
+    def run(self, line, help_disp=False):
+        """Main fleet worker function
+
+        :param line: string of arguments passed in
+        :type line: str.
+        """
+        if help_disp:
+            self.parser.print_help()
+            return ReturnCodes.SUCCESS
+        try:
+            (options, _) = self.rdmc.rdmc_parse_arglist(self, line)
+        except (InvalidCommandLineErrorOPTS, SystemExit):
+            if ("-h" in line) or ("--help" in line):
+                return ReturnCodes.SUCCESS
+            else:
+                raise InvalidCommandLineErrorOPTS("")
+
+        self.fleetvalidation(options)
+
+        servers = read_inventory(options.inventory, options.user, options.password)
+        _, createdir = output_directory(options.outdirectory, "fleet")
+
+        executor = FleetExecutor(
+            self.rdmc,
+            workers=options.workers,
+            timeout=options.timeout,
+            retries=options.retries,
+            retrydelay=options.retrydelay,
+        )
+        report = executor.run_logged(servers, options.command, createdir, "Running command")
+
+        fleetfile = os.path.join(createdir, "fleet.json")
+        self.writefleetfile(fleetfile, report, options.command)
+
+        self.rdmc.ui.print_out_json(report)
+        self.rdmc.ui.printer("Results of all servers saved to: %s\n" % fleetfile)
+
+        if report["failed"]:
+            raise MultipleServerConfigError("One or more servers failed to run the command.")
+
+        return ReturnCodes.SUCCESS
+
+    def writefleetfile(self, fleetfile, report, command):
+        """Write the aggregated results of every server
+
+        :param fleetfile: file to write
+        :type fleetfile: str.
+        :param report: summary of the run
+        :type report: dict.
+        :param command: command line run against every server
+        :type command: list.
+        """
+        servers = list()
+        for server in report["servers"]:
+            with open(os.path.join(report["outputdir"], server["logfile"]), "r") as logfile:
+                servers.append(dict(server, output=self.parseoutput(logfile.read())))
+
+        with open(fleetfile, "w") as output:
+            json.dump(
+                dict(report, command=" ".join(command), servers=servers), output, indent=2
+            )
+
+    def parseoutput(self, text):
+        """Return the JSON printed by a command, or the text if it printed none
+
+        :param text: output of one server
+        :type text: str.
+        """
+        for start in re.finditer(r"^[\[{]", text, re.MULTILINE):
+            try:
+                data, end = json.JSONDecoder().raw_decode(text, start.start())
+            except ValueError:
+                continue
+            if not text[end:].strip():
+                return data
+        return text
+
+    def fleetvalidation(self, options):
+        """Fleet method validation function
+
+        :param options: command line options
+        :type options: list.
+        """
+        if options.command and options.command[0] == "--":
+            options.command = options.command[1:]
+        if not options.command:
+            raise InvalidCommandLineError("Fleet command requires a command to run.")
+        if options.command[0] == self.ident["name"]:
+            raise InvalidCommandLineError("The fleet command can not run itself.")
+        for arg in options.command:
+            for opt in LOGIN_ARGS:
+                # --opt, --opt=value and the -uvalue form of the short options
+                if arg.split("=", 1)[0] == opt or (
+                    not opt.startswith("--") and arg.startswith(opt)
+                ):
+                    raise InvalidCommandLineError(
+                        "Login option %s is taken from the inventory file." % opt
+                    )
+        if options.workers < 1 or options.retries < 0:
+            raise InvalidCommandLineError("Workers must be positive and retries not negative.")
+
+    def definearguments(self, customparser):
+        """Wrapper function for new command main function
+
+        :param customparser: command line input
+        :type customparser: parser.
+        """
+        if not customparser:
+            return
+
+        customparser.add_argument(
+            "--inventory",
+            dest="inventory",
+            help="File listing the servers to run the command against.",
+            required=True,
+        )
+        customparser.add_argument(
+            "-u",
+            "--user",
+            dest="user",
+            help="Username for inventory lines without one.",
+            default=None,
+        )
+        customparser.add_argument(
+            "-p",
+            "--password",
+            dest="password",
+            help="Password for inventory lines without one.",
+            default=None,
+        )
+        customparser.add_argument(
+            "--workers",
+            dest="workers",
+            type=int,
+            help="Maximum number of servers the command runs against at the same time. "
+            "The default is %s." % DEFAULT_WORKERS,
+            default=DEFAULT_WORKERS,
+        )
+        customparser.add_argument(
+            "--timeout",
+            dest="timeout",
+            type=float,
+            help="Seconds the command may run against one server before it is given up "
+            "on. There is no limit by default.",
+            default=None,
+        )
+        customparser.add_argument(
+            "--retries",
+            dest="retries",
+            type=int,
+            help="Number of times the command is run again against a server where it "
+            "failed or timed out. The default is 0.",
+            default=0,
+        )
+        customparser.add_argument(
+            "--retrydelay",
+            dest="retrydelay",
+            type=float,
+            help="Seconds to wait before the first retry, doubled for every further "
+            "retry. The default is 5.",
+            default=5,
+        )
+        customparser.add_argument(
+            "-o",
+            "--outputdirectory",
+            dest="outdirectory",
+            help="Directory the output of the run is saved under. The default is the "
+            "current directory.",
+            default=None,
+        )
+        customparser.add_argument(
+            "command",
+            nargs=REMAINDER,
+            help="The command line to run against every server.",
+        )
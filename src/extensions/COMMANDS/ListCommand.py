@@ -159,3 +159,11 @@ class ListCommand:
             "patches from current selection.",
             default=False,
         )
+        customparser.add_argument(
+            "--revalidate",
+            dest="revalidate",
+            action="store_true",
+            help="Optionally reload the data of selected type like --refresh, resources "
+            "that did not change since they were cached are not downloaded again.",
+            default=False,
+        )
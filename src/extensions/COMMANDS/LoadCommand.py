@@ -18,16 +18,11 @@
 """ Load Command for RDMC """
 
 import os
-import sys
+import copy
 import json
-import shlex
-import subprocess
 
-from datetime import datetime
 from argparse import ArgumentParser, SUPPRESS
 
-from six.moves import queue
-
 import redfish.ris
 
 from redfish.ris.rmc_helper import LoadSkipSettingError
@@ -63,6 +58,16 @@ try:
 except ImportError:
     from ilorest.rdmc_base_classes import HARDCODEDLIST
 
+try:
+    from rdmc_fleet import DEFAULT_WORKERS, FleetExecutor, output_directory, read_inventory
+except ImportError:
+    from ilorest.rdmc_fleet import (
+        DEFAULT_WORKERS,
+        FleetExecutor,
+        output_directory,
+        read_inventory,
+    )
+
 # default file name
 __filename__ = "ilorest.json"
 
@@ -83,14 +88,16 @@ class LoadCommand:
             "json\n\n\tNote: multiple server file format (1 server per new "
             "line)\n\t--url <iLO url/hostname> -u admin -p password\n\t--url"
             " <iLO url/hostname> -u admin -p password\n\t--url <iLO url/"
-            "hostname> -u admin -p password",
+            "hostname> -u admin -p password\n\n\tLimit the number of servers "
+            "configured at the same time\n\texample: load -m mpfilename.txt "
+            "-f output.json --workers 32",
             "summary": "Loads the server configuration settings from a file.",
             "aliases": [],
             "auxcommands": ["CommitCommand", "SelectCommand"],
         }
         self.filenames = None
         self.mpfilename = None
-        self.queue = queue.Queue()
+        self.preloaded = dict()
         self.cmdbase = None
         self.rdmc = None
         self.auxcommands = dict()
@@ -129,12 +136,15 @@ class LoadCommand:
             self.rdmc.ui.printer("Loading configuration...\n")
 
         for files in self.filenames:
-            if not os.path.isfile(files):
+            if files in self.preloaded:
+                # contents parsed once by the multiple server run, never modified
+                loadcontents = self.preloaded[files]
+            elif not os.path.isfile(files):
                 raise InvalidFileInputError(
                     "File '%s' doesn't exist. Please "
                     "create file by running save command." % files
                 )
-            if options.encryption:
+            elif options.encryption:
                 with open(files, "rb") as myfile:
                     data = myfile.read()
                     data = Encryption().decrypt_file(data, options.encryption)
@@ -171,7 +181,13 @@ class LoadCommand:
                 if options.outdirectory:
                     outputdir = options.outdirectory
 
-                if self.runmpfunc(mpfile=mfile, lfile=files, outputdir=outputdir):
+                if self.runmpfunc(
+                    mpfile=mfile,
+                    lfile=files,
+                    outputdir=outputdir,
+                    loadcontents=loadcontents,
+                    workers=options.workers,
+                ):
                     return ReturnCodes.SUCCESS
                 else:
                     raise MultipleServerConfigError(
@@ -198,6 +214,7 @@ class LoadCommand:
 
                     try:
                         for _, items in loaddict.items():
+                            items = copy.deepcopy(items)
                             remove_odata = self.securebootremovereadonly(items)
                             items.update(remove_odata)
                             try:
@@ -319,7 +336,7 @@ class LoadCommand:
 
         return contents
 
-    def runmpfunc(self, mpfile=None, lfile=None, outputdir=None):
+    def runmpfunc(self, mpfile=None, lfile=None, outputdir=None, loadcontents=None, workers=None):
         """Main worker function for multi file command
 
         :param mpfile: configuration file
@@ -328,96 +345,34 @@ class LoadCommand:
         :type lfile: string.
         :param outputdir: custom output directory
         :type outputdir: string.
+        :param loadcontents: parsed contents of lfile, shared by all servers
+        :type loadcontents: list.
+        :param workers: maximum number of servers configured at the same time
+        :type workers: int.
         """
         # self.logoutobj.run("")
-        data = self.validatempfile(mpfile=mpfile, lfile=lfile)
+        servers = self.validatempfile(mpfile=mpfile, lfile=lfile)
 
-        if not data:
+        if not servers:
             return False
 
-        processes = []
-        finalreturncode = True
-        outputform = "%Y-%m-%d-%H-%M-%S"
+        _, createdir = output_directory(outputdir)
 
-        if outputdir:
-            if outputdir.endswith(('"', "'")) and outputdir.startswith(('"', "'")):
-                outputdir = outputdir[1:-1]
-
-            if not os.path.isdir(outputdir):
-                self.rdmc.ui.error("The give output folder path does not exist.\n")
-                raise InvalidCommandLineErrorOPTS("")
-
-            dirpath = outputdir
-        else:
-            dirpath = os.getcwd()
+        def prepare(rdmc):
+            """Hand the parsed load file to the load command of a worker"""
+            rdmc.search_commands("LoadCommand").preloaded = {lfile: loadcontents}
+            rdmc.opts.verbose = True
 
-        dirname = "%s_%s" % (datetime.now().strftime(outputform), "MSClogs")
-        createdir = os.path.join(dirpath, dirname)
-        os.mkdir(createdir)
-
-        oofile = open(os.path.join(createdir, "CompleteOutputfile.txt"), "w+")
-        self.rdmc.ui.printer(
-            "Create multiple processes to load configuration "
-            "concurrently to all servers...\n"
+        report = FleetExecutor(self.rdmc, workers=workers, prepare=prepare).run_logged(
+            servers, ["load", "-f", str(lfile)], createdir, "Loading Configuration"
         )
 
-        while True:
-            if not self.queue.empty():
-                line = self.queue.get()
-            else:
-                break
-
-            finput = "\n" + "Output for " + line[line.index("--url") + 1] + ": \n\n"
-            urlvar = line[line.index("--url") + 1]
-
-            if "python" in os.path.basename(sys.executable.lower()):
-                # If we are running from source we have to add the python file to the command
-                listargforsubprocess = [sys.executable, sys.argv[0]] + line
-            else:
-                listargforsubprocess = [sys.executable] + line
-
-            if os.name != "nt":
-                listargforsubprocess = " ".join(listargforsubprocess)
-
-            urlfilename = urlvar.split("//")[-1]
-            logfile = open(os.path.join(createdir, urlfilename + ".txt"), "w+")
-            pinput = subprocess.Popen(
-                listargforsubprocess, shell=True, stdout=logfile, stderr=logfile
-            )
-
-            processes.append((pinput, finput, urlfilename, logfile))
-
-        for pinput, finput, urlfilename, logfile in processes:
-            pinput.wait()
-            returncode = pinput.returncode
-            finalreturncode = finalreturncode and not returncode
-
-            logfile.close()
-            logfile = open(os.path.join(createdir, urlfilename + ".txt"), "r+")
-            oofile.write(finput + str(logfile.read()))
-            oofile.write("-x+x-" * 16)
-            logfile.close()
-
-            if returncode == 0:
-                self.rdmc.ui.printer(
-                    "Loading Configuration for {} : SUCCESS\n".format(urlfilename)
-                )
-            else:
-                self.rdmc.ui.error(
-                    "Loading Configuration for {} : FAILED\n".format(urlfilename)
-                )
-                self.rdmc.ui.error(
-                    "ILOREST return code : {}.\nFor more details please check "
-                    "{}.txt under {} directory.\n".format(
-                        returncode, urlfilename, createdir
-                    )
-                )
-
-        oofile.close()
-
+        finalreturncode = not report["failed"]
         if finalreturncode:
             self.rdmc.ui.printer("All servers have been successfully configured.\n")
 
+        self.rdmc.ui.print_out_json(report)
+
         return finalreturncode
 
     def validatempfile(self, mpfile=None, lfile=None):
@@ -433,49 +388,7 @@ class LoadCommand:
         if not mpfile:
             return False
 
-        if not os.path.isfile(mpfile):
-            raise InvalidFileInputError(
-                "File '%s' doesn't exist, please "
-                "create file by running save command." % mpfile
-            )
-
-        try:
-            with open(mpfile, "r") as myfile:
-                data = list()
-                cmdtorun = ["load"]
-                cmdargs = ["-f", str(lfile)]
-                globalargs = ["-v", "--nocache"]
-
-                while True:
-                    line = myfile.readline()
-
-                    if not line:
-                        break
-
-                    if line.endswith(os.linesep):
-                        line.rstrip(os.linesep)
-
-                    args = shlex.split(line, posix=False)
-
-                    if len(args) < 5:
-                        self.rdmc.ui.error(
-                            "Incomplete data in input file: {}\n".format(line)
-                        )
-                        raise InvalidMSCfileInputError(
-                            "Please verify the " "contents of the %s file" % mpfile
-                        )
-                    else:
-                        linelist = globalargs + cmdtorun + args + cmdargs
-                        line = str(line).replace("\n", "")
-                        self.queue.put(linelist)
-                        data.append(linelist)
-        except Exception as excp:
-            raise excp
-
-        if data:
-            return data
-
-        return False
+        return read_inventory(mpfile)
 
     def definearguments(self, customparser):
         """Wrapper function for new command main function
@@ -512,6 +425,14 @@ class LoadCommand:
             help="""use the provided directory to output data for multiple server configuration""",
             default=None,
         )
+        customparser.add_argument(
+            "--workers",
+            dest="workers",
+            type=int,
+            help="Maximum number of servers configured at the same time with "
+            "-m/--multiprocessing. The default is %s." % DEFAULT_WORKERS,
+            default=DEFAULT_WORKERS,
+        )
         customparser.add_argument(
             "--latestschema",
             dest="latestschema",
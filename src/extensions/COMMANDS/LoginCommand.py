@@ -103,7 +103,7 @@ class LoginCommand:
         # Return code
         return ReturnCodes.SUCCESS
 
-    def loginfunction(self, line, skipbuild=None, json_out=False):
+    def loginfunction(self, line, skipbuild=None, json_out=False, requires=None):
         """Main worker function for login class
 
         :param line: entered command line
@@ -112,6 +112,8 @@ class LoginCommand:
         :type skipbuild: boolean.
         :param json_out: flag to determine if json output neededd
         :type skipbuild: boolean.
+        :param requires: types the command uses, only these are loaded into the monolith
+        :type requires: list.
         """
         try:
             (options, args) = self.rdmc.rdmc_parse_arglist(self, line)
@@ -123,6 +125,14 @@ class LoginCommand:
 
         self.loginvalidation(options, args)
 
+        # the monolith is built from the required types instead of the resource directory
+        lazybuild = (
+            requires is not None
+            and not skipbuild
+            and not options.path
+            and not options.includelogs
+        )
+
         # if proxy server provided in command line as --useproxy, it will be used, otherwise it will the environment variable setting.
         # else proxy will be set as None.
         if self.rdmc.opts.proxy:
@@ -179,7 +189,7 @@ class LoginCommand:
                 sessionid=self.sessionid,
                 base_url=self.url,
                 path=options.path,
-                skipbuild=skipbuild,
+                skipbuild=skipbuild or lazybuild,
                 includelogs=options.includelogs,
                 biospassword=self.biospassword,
                 is_redfish=self.rdmc.opts.is_redfish,
@@ -204,6 +214,9 @@ class LoginCommand:
         self.username = None
         self.password = None
 
+        if lazybuild and self.rdmc.app.redfishinst:
+            self.rdmc.prefetcher.require(self.rdmc.app, requires, json_out=self.rdmc.json)
+
         # Warning for cache enabled, since we save session in plain text
         if not self.rdmc.encoding:
             self.rdmc.ui.warn("Cache is activated. Session keys are stored in plaintext.")
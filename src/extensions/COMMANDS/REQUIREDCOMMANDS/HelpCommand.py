@@ -76,8 +76,8 @@ class HelpCommand(RdmcCommandBase):
                     else:
                         self.rdmc.ui.printer('\n%s\n' % key)
                     for cmd in cmddict[key]:
-                        self.rdmc.ui.printer("%-25s - %s\n" % (self.rdmc.commands_dict[cmd].ident['name'],
-                                                               self.rdmc.commands_dict[cmd].ident['summary']))
+                        self.rdmc.ui.printer("%-25s - %s\n" % (self.rdmc.manifest[cmd]['name'],
+                                                               self.rdmc.manifest[cmd]['summary']))
         else:
             if self.rdmc:
                 cmddict = self.rdmc.get_commands()
@@ -88,7 +88,7 @@ class HelpCommand(RdmcCommandBase):
                         cmd_s = cmd.split("Command")
                         cmd_s = cmd_s[0]
                         if args[0].lower() == cmd_s.lower():
-                            self.rdmc.ui.printer(self.rdmc.commands_dict[cmd].ident['description'] + "\n")
+                            self.rdmc.ui.printer(self.rdmc.search_commands(cmd).ident['description'] + "\n")
                             return ReturnCodes.SUCCESS
                 raise InvalidCommandLineError("Command '%s' not found." % args[0])
         # Return code
@@ -0,0 +1,132 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+""" Record Command for rdmc """
+
+import os
+
+from argparse import REMAINDER
+
+try:
+    from rdmc_helper import (
+        ReturnCodes,
+        InvalidCommandLineError,
+        InvalidCommandLineErrorOPTS,
+        mask_credentials,
+    )
+except ImportError:
+    from ilorest.rdmc_helper import (
+        ReturnCodes,
+        InvalidCommandLineError,
+        InvalidCommandLineErrorOPTS,
+        mask_credentials,
+    )
+
+try:
+    from rdmc_replay import Recorder
+except ImportError:
+    from ilorest.rdmc_replay import Recorder
+
+
+class RecordCommand:
+    """Record class command"""
+
+    def __init__(self):
+        self.ident = {
+            "name": "record",
+            "usage": None,
+            "description": "Run a command and capture every HTTP request and response it "
+            "makes into a directory.\n\texample: record captures/bios get --select Bios. "
+            "--url <iLO url> -u <iLO username> -p <iLO password>\n\n\tThe capture can be "
+            "served offline with the replay server:\n\texample: python rdmc_replay.py "
+            "captures/bios --latency 20\n\n\tInclude the login options so the capture "
+            "starts from a fresh session.\n\tCredentials and session tokens are not stored.",
+            "summary": "Captures the HTTP traffic of a command for offline replay.",
+            "aliases": [],
+            "auxcommands": [],
+        }
+        self.cmdbase = None
+        self.rdmc = None
+        self.auxcommands = dict()
+
+    def run(self, line, help_disp=False):
+        """Main record worker function
+
+        :param line: string of arguments passed in
+        :type line: str.
+        """
+        if help_disp:
+            self.parser.print_help()
+            return ReturnCodes.SUCCESS
+        try:
+            (options, _) = self.rdmc.rdmc_parse_arglist(self, line)
+        except (InvalidCommandLineErrorOPTS, SystemExit):
+            if ("-h" in line) or ("--help" in line):
+                return ReturnCodes.SUCCESS
+            else:
+                raise InvalidCommandLineErrorOPTS("")
+
+        self.recordvalidation(options)
+
+        # the banner was already printed for the record command itself
+        self.rdmc.opts.nologo = True
+        recorder = Recorder(options.directory, command=mask_credentials(options.command))
+        recorder.start()
+        try:
+            retcode = self.rdmc.run_commandline(options.command)
+        finally:
+            recorder.stop()
+
+        self.rdmc.ui.printer(
+            "Recorded %s requests to: %s\n" % (len(recorder.exchanges), options.directory)
+        )
+
+        return retcode
+
+    def recordvalidation(self, options):
+        """Record method validation function
+
+        :param options: command line options
+        :type options: list.
+        """
+        if not options.command:
+            raise InvalidCommandLineError("Record command requires a command to run.")
+        if options.command[0] == self.ident["name"]:
+            raise InvalidCommandLineError("The record command can not record itself.")
+        if os.path.isfile(options.directory):
+            raise InvalidCommandLineError(
+                "Capture directory is an existing file: %s" % options.directory
+            )
+
+    def definearguments(self, customparser):
+        """Wrapper function for new command main function
+
+        :param customparser: command line input
+        :type customparser: parser.
+        """
+        if not customparser:
+            return
+
+        customparser.add_argument(
+            "directory",
+            help="Directory the capture is written to.",
+        )
+        customparser.add_argument(
+            "command",
+            nargs=REMAINDER,
+            help="The command line to run and record.",
+        )
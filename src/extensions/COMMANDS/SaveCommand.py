@@ -31,6 +31,7 @@ try:
         InvalidFileFormattingError,
         Encryption,
         iLORisCorruptionError,
+        write_json,
     )
 except ImportError:
     from ilorest.rdmc_helper import (
@@ -40,6 +41,7 @@ except ImportError:
         InvalidFileFormattingError,
         Encryption,
         iLORisCorruptionError,
+        write_json,
     )
 
 # default file name
@@ -138,11 +140,7 @@ class SaveCommand:
                 )
         else:
             with open(self.filename, "w") as outfile:
-                outfile.write(
-                    json.dumps(
-                        contents, indent=2, cls=redfish.ris.JSONEncoder, sort_keys=True
-                    )
-                )
+                write_json(contents, outfile, compact=options.compact, sort_keys=True)
         self.rdmc.ui.printer("Configuration saved to: %s\n" % self.filename)
 
         self.cmdbase.logout_routine(self, options)
@@ -366,3 +364,11 @@ class SaveCommand:
             help="Optionally include this flag to encrypt/decrypt a file using the key provided.",
             default=None,
         )
+        customparser.add_argument(
+            "--compact",
+            dest="compact",
+            action="store_true",
+            help="Optionally include this flag to write the file without indentation or "
+                 "whitespace.",
+            default=False,
+        )
@@ -64,10 +64,16 @@ class SelectCommand:
         self.selectvalidation(options)
 
         if args:
-            if options.ref:
+            if options.ref or options.revalidate:
                 LOGGER.warning("Patches from current selection will be cleared.")
             selector = args[0]
-            selections = self.rdmc.app.select(selector=selector, path_refresh=options.ref)
+            self.rdmc.prefetcher.revalidate = options.revalidate
+            try:
+                selections = self.rdmc.app.select(
+                    selector=selector, path_refresh=options.ref or options.revalidate
+                )
+            finally:
+                self.rdmc.prefetcher.revalidate = False
 
             if self.rdmc.opts.verbose and selections:
                 templist = list()
@@ -137,3 +143,11 @@ class SelectCommand:
             "patches from current selection.",
             default=False,
         )
+        customparser.add_argument(
+            "--revalidate",
+            dest="revalidate",
+            action="store_true",
+            help="Optionally reload the data of selected type like --refresh, resources "
+            "that did not change since they were cached are not downloaded again.",
+            default=False,
+        )
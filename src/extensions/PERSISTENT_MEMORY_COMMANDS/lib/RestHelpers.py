@@ -19,9 +19,13 @@
 from __future__ import absolute_import  # check if python3 supported
 
 import json
-import multiprocessing
 from multiprocessing.dummy import Pool as ThreadPool
 
+try:
+    from rdmc_governor import GOVERNOR
+except ImportError:
+    from ilorest.rdmc_governor import GOVERNOR
+
 
 class RestHelpers(object):
     """This is the helper class with functions that manipulate REST data"""
@@ -170,11 +174,11 @@ class RestHelpers(object):
         :rtype: List of objects
         """
         response_list = list()
-        # Spawn a pool of worker threads based on the CPU core count and
-        # the number of functions to call.
+        # Spawn a pool of worker threads based on the number of functions to call,
+        # the concurrency governor limits how many of their requests are in flight.
         # 'len(resource_list) - 1' ensures that the last function call happens
         # on the main thread and not on a worker thread.
-        pool = ThreadPool(min(len(resource_list) - 1, multiprocessing.cpu_count()))
+        pool = ThreadPool(GOVERNOR.workers(len(resource_list) - 1))
         # Asynchronously call funtions from 'resource_list' on worker threads and
         # append responses to 'response_list'. These responses will be 'AsyncResult'
         # objects and the actual return value will have to be retrieved by a 'get()'
@@ -203,9 +207,11 @@ class RestHelpers(object):
                          are supposed to be made
         :returns: List of responses from the GET Requests
         """
-        # Spawn a pool of worker threads based on the CPU core count and
+        # Spawn a pool of worker threads based on the per iLO concurrency limit and
         # the number of GET requests to be sent
-        pool = ThreadPool(min(multiprocessing.cpu_count(), len(uri_list)))
+        pool = ThreadPool(
+            GOVERNOR.workers(len(uri_list), self.rdmc.app.current_client.base_url)
+        )
         response_list = pool.map(self.get_resource, uri_list)
         # Wait for worker threads to complete
         pool.close()
@@ -17,8 +17,6 @@
 # -*- coding: utf-8 -*-
 """ Monolith Command for rdmc """
 
-import json
-
 from argparse import ArgumentParser
 from redfish.rest.containers import JSONEncoder
 from redfish.ris import UndefinedClientError
@@ -27,6 +25,7 @@ from rdmc_helper import (
     InvalidCommandLineErrorOPTS,
     InvalidFileInputError,
     UI,
+    write_json,
 )
 
 
@@ -77,12 +76,14 @@ class MonolithCommand:
         if options.filename:
             with open(options.filename[0], "w") as monolith:
                 if options.json:
-                    json.dump(results, monolith, indent=2, cls=JSONEncoder)
+                    write_json(
+                        results, monolith, compact=options.compact, cls=JSONEncoder
+                    )
                 else:
                     monolith.write(str(results))
 
         elif options.json:
-            UI().print_out_json(results)  # .reduce())
+            UI().print_out_json(results, compact=options.compact)  # .reduce())
         else:
             UI().print_out_human_readable(results)  # .reduce())
 
@@ -126,3 +127,11 @@ class MonolithCommand:
             " into a file with the given filename.",
             default=False,
         )
+        customparser.add_argument(
+            "--compact",
+            dest="compact",
+            action="store_true",
+            help="Use this flag with JSON output to print or save the monolith"
+            " without indentation or whitespace.",
+            default=False,
+        )
@@ -52,6 +52,7 @@ class ClearRestApiStateCommand:
             "portions of the API may not be available until after the server reboots.",
             "aliases": [],
             "auxcommands": [],
+            "requires": ["Manager."],
         }
         self.cmdbase = None
         self.rdmc = None
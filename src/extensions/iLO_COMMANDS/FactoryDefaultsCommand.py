@@ -48,6 +48,7 @@ class FactoryDefaultsCommand:
             "be removed use with caution.",
             "aliases": [],
             "auxcommands": [],
+            "requires": ["Manager."],
         }
         self.cmdbase = None
         self.rdmc = None
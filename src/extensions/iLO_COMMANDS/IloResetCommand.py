@@ -49,6 +49,7 @@ class IloResetCommand:
             "summary": "Reset iLO on the current logged in server.",
             "aliases": [],
             "auxcommands": [],
+            "requires": ["Manager."],
         }
         # self.definearguments(self.parser)
         # self.rdmc = rdmcObj
@@ -63,6 +63,7 @@ class OneButtonEraseCommand:
             "summary": "Performs One Button Erase on a system.",
             "aliases": [],
             "auxcommands": ["RebootCommand"],
+            "requires": ["ComputerSystem."],
         }
         self.cmdbase = None
         self.rdmc = None
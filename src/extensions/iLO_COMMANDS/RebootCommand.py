@@ -73,6 +73,7 @@ class RebootCommand:
             "summary": "Reboot operations for the current logged in server.",
             "aliases": [],
             "auxcommands": [],
+            "requires": ["ComputerSystem."],
         }
         self.cmdbase = None
         self.rdmc = None
@@ -50,6 +50,7 @@ try:
         NoContentsFoundForOperationError,
         ResourceExists,
         NoDifferencesFoundError,
+        write_json,
     )
 except ImportError:
     from ilorest.rdmc_helper import (
@@ -63,6 +64,7 @@ except ImportError:
         NoContentsFoundForOperationError,
         ResourceExists,
         NoDifferencesFoundError,
+        write_json,
     )
 
 # default file name
@@ -346,14 +348,7 @@ class ServerCloneCommand:
                         )
                 else:
                     with open(filename, operation) as outfile:
-                        outfile.write(
-                            json.dumps(
-                                data,
-                                indent=2,
-                                cls=redfish.ris.JSONEncoder,
-                                sort_keys=sk,
-                            )
-                        )
+                        write_json(data, outfile, sort_keys=sk)
             else:
                 if options.encryption:
                     with open(filename, operation + "b") as file_handle:
@@ -52,6 +52,7 @@ class ServerInfoCommand:
             "summary": "Shows aggregate health status and details of the currently logged in server.",
             "aliases": ["health", "serverstatus", "systeminfo"],
             "auxcommands": [],
+            "requires": ["ComputerSystemCollection.", "Bios."],
         }
         self.cmdbase = None
         self.rdmc = None
@@ -47,6 +47,7 @@ class ServerStateCommand:
             "summary": "Returns the current state of the server.",
             "aliases": [],
             "auxcommands": [],
+            "requires": [],
         }
         self.cmdbase = None
         self.rdmc = None
@@ -19,22 +19,31 @@
 
 import os
 import sys
+import gzip
 import json
 import time
 import ctypes
 import string
-import shlex
 import tempfile
 import datetime
 import platform
 import itertools
 import subprocess
 from argparse import ArgumentParser, SUPPRESS
-from six.moves import queue
+from multiprocessing.dummy import Pool as ThreadPool
+
+import urllib3
+
+from six.moves.urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
 
 import redfish.hpilo.risblobstore2 as risblobstore2
+from redfish.ris.ris import SessionExpired
 from redfish.ris.utils import filter_output
-from redfish.rest.connections import SecurityStateError
+from redfish.rest.connections import (
+    DecompressResponseError,
+    RetriesExhaustedError,
+    SecurityStateError,
+)
 
 try:
     from rdmc_helper import (
@@ -48,6 +57,7 @@ try:
         LOGGER,
         InvalidCListFileError,
         NoContentsFoundForOperationError,
+        DownloadError,
         IncompatibleiLOVersionError,
         Encryption,
         PartitionMoutingError,
@@ -66,6 +76,7 @@ except ImportError:
         LOGGER,
         InvalidCListFileError,
         NoContentsFoundForOperationError,
+        DownloadError,
         IncompatibleiLOVersionError,
         Encryption,
         PartitionMoutingError,
@@ -73,11 +84,50 @@ except ImportError:
         UnabletoFindDriveError,
     )
 
+try:
+    from rdmc_fleet import (
+        DEFAULT_WORKERS,
+        FleetExecutor,
+        host_filename,
+        output_directory,
+        read_inventory,
+    )
+except ImportError:
+    from ilorest.rdmc_fleet import (
+        DEFAULT_WORKERS,
+        FleetExecutor,
+        host_filename,
+        output_directory,
+        read_inventory,
+    )
+
+try:
+    from rdmc_governor import GOVERNOR
+except ImportError:
+    from ilorest.rdmc_governor import GOVERNOR
+
+try:
+    from rdmc_cache_store import cache_name
+except ImportError:
+    from ilorest.rdmc_cache_store import cache_name
+
+try:
+    from rdmc_events import open_event_stream
+except ImportError:
+    from ilorest.rdmc_events import open_event_stream
+
 if os.name == "nt":
     import win32api
 elif sys.platform != "darwin" and not "VMkernel" in platform.uname():
     import pyudev
 
+# longest wait between two checks of a followed log, in seconds
+FOLLOW_MAX_INTERVAL = 60
+# bytes requested by each range request of an AHS download
+AHS_CHUNK_SIZE = 8 * 1024 * 1024
+# failed range requests of an AHS download in a row before giving up
+AHS_RETRIES = 3
+
 
 class ServerlogsCommand:
     """Download logs from the server that is currently logged in"""
@@ -96,7 +146,11 @@ class ServerlogsCommand:
             "from the logged in server.\n\texample: serverlogs "
             "--selectlog=IEL --clearlog\n\n\tDownload the IML"
             " logs from the logged in server.\n\texample: serverlogs "
-            "--selectlog=IML -f IMLlog.txt\n\n\tClear the IML logs "
+            "--selectlog=IML -f IMLlog.txt\n\n\tDownload only the IML entries added "
+            "since the last run\n\tand append them to the file.\n\texample: serverlogs "
+            "--selectlog=IML -f IMLlog.txt --since-last\n\n\tPrint the IEL entries "
+            "as they are added, like tail -f.\n\texample: serverlogs "
+            "--selectlog=IEL --follow\n\n\tClear the IML logs "
             "from the logged in server.\n\texample: serverlogs "
             "--selectlog=IML --clearlog\n\n\t(IML LOGS ONLY FEATURE)"
             "\n\tInsert entry in the IML logs from the logged in "
@@ -111,7 +165,12 @@ class ServerlogsCommand:
             "format (1 server per new line)\n\t--url <iLO url/hostname> "
             "-u admin -p password\n\t--url <iLO url/hostname> -u admin -"
             "p password\n\t--url <iLO url/hostname> -u admin -p password"
-            "\n\n\tInsert customised string "
+            "\n\tEach server's logs are saved under <outputdirectory>/<server>/ "
+            "as\n\tgzip compressed NDJSON (IML, IEL, SL) or the AHS file and "
+            "listed in\n\tserverlogs_index.json. Logs that did not change since "
+            "the last run\n\tare not downloaded again.\n\texample: serverlogs "
+            "--mpfile mpfilename.txt -o outputdirectorypath --mplog=all "
+            "--workers 32\n\n\tInsert customised string "
             "if required for AHS\n\texample: serverlogs --selectlog="
             'AHS --customiseAHS "from=2014-03-01&&to=2014'
             '-03-30"\n\n\t(AHS LOGS ONLY FEATURE)\n\tInsert the location/'
@@ -127,7 +186,7 @@ class ServerlogsCommand:
         self.rdmc = None
         self.auxcommands = dict()
         self.dontunmount = None
-        self.queue = queue.Queue()
+        self.fleetdir = None
         self.abspath = None
         self.lib = None
 
@@ -150,14 +209,22 @@ class ServerlogsCommand:
             else:
                 raise InvalidCommandLineErrorOPTS("")
 
-        if not getattr(options, "sessionid", False):
+        # with --mpfile every server of the file is logged in to by its own worker
+        if not options.mpfilename and not getattr(options, "sessionid", False):
             self.serverlogsvalidation(options)
 
+        if options.mpfilename and options.follow:
+            raise InvalidCommandLineError(
+                "--follow cannot be used with multiple servers."
+            )
         if options.mpfilename:
             self.rdmc.ui.printer("Downloading logs for multiple servers...\n")
             return self.gotompfunc(options)
 
-        self.serverlogsworkerfunction(options)
+        if self.fleetdir:
+            self.collectlogs(options)
+        else:
+            self.serverlogsworkerfunction(options)
 
         self.cmdbase.logout_routine(self, options)
         # Return code
@@ -208,12 +275,39 @@ class ServerlogsCommand:
 
         data = None
 
+        if options.follow and options.service.upper() not in ("IML", "IEL", "SL"):
+            raise InvalidCommandLineError(
+                "Only the IML, IEL and SL logs can be followed."
+            )
+
         if options.clearlog:
             self.clearlog(path)
         elif options.mainmes:
             self.addmaintenancelogentry(options, path=path)
         elif options.repiml:
             self.repairlogentry(options, path=path)
+        elif options.service.upper() == "AHS":
+            self.downloadahsfile(path, self.getahsfilename(options))
+            return
+        elif options.follow:
+            options.service = options.service.upper()
+            self.followlog(path, options)
+            return
+        elif options.sincelast and options.service.upper() in ("IML", "IEL", "SL"):
+            options.service = options.service.upper()
+            mark = self.readwatermarks().get(options.service)
+            data, mark = self.downloadnewentries(path, mark)
+            if data and options.filter:
+                try:
+                    data = self.filterdata(data=data, tofilter=options.filter)
+                except NoContentsFoundForOperationError:
+                    data = None
+            if not data:
+                self.rdmc.ui.printer("No new log entries since the last run.\n")
+            self.savedata(options=options, data=data)
+            if mark:
+                self.writewatermark(options.service, mark)
+            return
         else:
             data = self.downloaddata(path=path, options=options)
 
@@ -232,112 +326,229 @@ class ServerlogsCommand:
             if options.outdirectory:
                 outputdir = options.outdirectory
 
-            if self.runmpfunc(mpfile=mfile, outputdir=outputdir, options=options):
+            if self.runmpfunc(
+                mpfile=mfile,
+                outputdir=outputdir,
+                options=options,
+                workers=options.workers,
+            ):
                 return ReturnCodes.SUCCESS
             else:
                 raise MultipleServerConfigError(
                     "One or more servers failed to download logs."
                 )
 
-    def runmpfunc(self, mpfile=None, outputdir=None, options=None):
+    def runmpfunc(self, mpfile=None, outputdir=None, options=None, workers=None):
         """Main worker function for multi file command
 
         :param mpfile: configuration file
         :type mpfile: string.
         :param outputdir: custom output directory
         :type outputdir: string.
+        :param workers: maximum number of servers downloading at the same time
+        :type workers: int.
         """
-        self.logoutobj.run("")
         LOGGER.info("Validating input server collection file.")
-        data = self.validatempfile(mpfile=mpfile, options=options)
+        servers = self.validatempfile(mpfile=mpfile, options=options)
 
-        if not data:
+        if not servers:
             return False
 
-        processes = []
-        finalreturncode = True
-        outputform = "%Y-%m-%d-%H-%M-%S"
+        dirpath, createdir = output_directory(outputdir)
 
-        if outputdir:
-            if outputdir.endswith(('"', "'")) and outputdir.startswith(('"', "'")):
-                outputdir = outputdir[1:-1]
-
-            if not os.path.isdir(outputdir):
-                raise InvalidCommandLineError(
-                    "The given output folder path does not exist."
-                )
-
-            dirpath = outputdir
-        else:
-            dirpath = os.getcwd()
+        cmdargs = ["serverlogs", "--mplog=" + ",".join(self.checkmplog(options))]
+        if options.filter:
+            cmdargs.extend(["--filter", options.filter])
+        if options.downloadallahs:
+            cmdargs.append("--downloadallahs")
+        elif options.customiseAHS:
+            cmdargs.extend(["--customiseAHS", options.customiseAHS])
+
+        def prepare(rdmc):
+            """Make the serverlogs command of a worker save into the output directory"""
+            rdmc.search_commands("ServerlogsCommand").fleetdir = dirpath
+            rdmc.opts.verbose = True
+
+        executor = FleetExecutor(self.rdmc, workers=workers, prepare=prepare)
+        report = executor.run_logged(servers, cmdargs, createdir, "Downloading logs")
+        report["index"] = self.writefleetindex(
+            dirpath, [server["host"] for server in report["servers"]]
+        )
+        with open(os.path.join(createdir, "summary.json"), "w") as summaryfile:
+            json.dump(report, summaryfile, indent=2)
 
-        dirname = "%s_%s" % (datetime.datetime.now().strftime(outputform), "MSClogs")
-        createdir = os.path.join(dirpath, dirname)
-        os.mkdir(createdir)
+        finalreturncode = not report["failed"]
+        if finalreturncode:
+            self.rdmc.ui.printer("Logs have been downloaded from all servers.\n")
 
-        oofile = open(os.path.join(createdir, "CompleteOutputfile.txt"), "w+")
-        self.rdmc.ui.printer(
-            "Creating multiple processes to load configuration "
-            "concurrently to all servers...\n"
-        )
+        self.rdmc.ui.print_out_json(report)
 
-        while True:
-            if not self.queue.empty():
-                line = self.queue.get()
-            else:
-                break
+        return finalreturncode
 
-            finput = "\n" + "Output for " + line[line.index("--url") + 1] + ": \n\n"
-            urlvar = line[line.index("--url") + 1]
-            urlfilename = urlvar.split("//")[-1]
-            line[line.index("-f") + 1] = str(line[line.index("-f") + 1]) + urlfilename
+    def writefleetindex(self, dirpath, hosts):
+        """Combine the index of every server into the fleet index
 
-            if "python" in os.path.basename(sys.executable.lower()):
-                # If we are running from source we have to add the python file to the command
-                listargforsubprocess = [sys.executable, sys.argv[0]] + line
-            else:
-                listargforsubprocess = [sys.executable] + line
+        :param dirpath: directory holding one log directory per server
+        :type dirpath: str.
+        :param hosts: servers of the run
+        :type hosts: list.
+        :returns: path of the fleet index file
+        """
+        fleetindex = list()
+        for host in hosts:
+            indexfile = os.path.join(dirpath, host, "index.json")
+            if not os.path.isfile(indexfile):
+                continue
+            with open(indexfile, "r") as hostindex:
+                for entry in json.load(hostindex):
+                    entry = dict(entry, host=host)
+                    entry["file"] = os.path.join(host, entry["file"])
+                    entry.pop("signature", None)
+                    fleetindex.append(entry)
+
+        indexpath = os.path.join(dirpath, "serverlogs_index.json")
+        self.writeatomic(indexpath, json.dumps(fleetindex, indent=2))
+        return indexpath
+
+    def collectlogs(self, options):
+        """Save the --mplog logs of the logged in server into its directory under
+        fleetdir.
+        A log is only downloaded when the server reports a different ETag or entry count
+        than the one recorded by the last run.
 
-            if os.name != "nt":
-                listargforsubprocess = " ".join(listargforsubprocess)
+        :param options: command line options
+        :type options: list.
+        """
+        hostdir = os.path.join(self.fleetdir, host_filename(options.url))
+        if not os.path.isdir(hostdir):
+            os.makedirs(hostdir)
 
-            logfile = open(os.path.join(createdir, urlfilename + ".txt"), "w+")
-            pinput = subprocess.Popen(
-                listargforsubprocess, shell=True, stdout=logfile, stderr=logfile
+        indexfile = os.path.join(hostdir, "index.json")
+        previous = dict()
+        if os.path.isfile(indexfile):
+            try:
+                with open(indexfile, "r") as hostindex:
+                    previous = dict(
+                        (entry["log"], entry) for entry in json.load(hostindex)
+                    )
+            except (ValueError, KeyError, TypeError):
+                LOGGER.info("Ignoring unreadable index %s", indexfile)
+
+        index = dict(previous)
+        for logval in self.checkmplog(options):
+            options.service = logval.upper()
+            entry = self.collectlog(options, hostdir, previous.get(options.service))
+            self.rdmc.ui.printer(
+                "{0}: {1}, {2} bytes in {3}{4}\n".format(
+                    entry["log"],
+                    entry["status"],
+                    entry["bytes"],
+                    entry["file"],
+                    ""
+                    if entry["entries"] is None
+                    else ", %s entries" % entry["entries"],
+                )
             )
+            index[entry["log"]] = entry
+            self.writeatomic(indexfile, json.dumps(list(index.values()), indent=2))
 
-            processes.append((pinput, finput, urlvar, logfile))
+    def collectlog(self, options, hostdir, previous=None):
+        """Save one log of the logged in server unless it is unchanged since previous
 
-        for pinput, finput, urlvar, logfile in processes:
-            pinput.wait()
-            returncode = pinput.returncode
-            finalreturncode = finalreturncode and not returncode
-
-            logfile.close()
-            logfile = open(os.path.join(createdir, urlvar + ".txt"), "r+")
-            oofile.write(finput + str(logfile.read()))
-            oofile.write("-x+x-" * 16)
-            logfile.close()
+        :param options: command line options
+        :type options: list.
+        :param hostdir: directory of the server's logs
+        :type hostdir: str.
+        :param previous: index entry of the log from the last run
+        :type previous: dict.
+        :returns: index entry of the log
+        """
+        service = options.service
+        if service == "AHS":
+            val = self.rdmc.app.typepath.defs.hpiloactivehealthsystemtype
+            instances = self.rdmc.app.select(selector=val)
+            if not instances:
+                raise NoContentsFoundForOperationError("Unable to retrieve log instance.")
+            state = instances[0].resp
+            first = state.dict.get("AHSFileStart")
+            last = state.dict.get("AHSFileEnd")
+            signature = {
+                "etag": state.getheader("etag"),
+                "end": last,
+                "customiseAHS": options.customiseAHS,
+                "downloadallahs": options.downloadallahs,
+            }
+        else:
+            pathfunc = {
+                "IML": self.returnimlpath,
+                "IEL": self.returnielpath,
+                "SL": self.returnslpath,
+            }.get(service)
+            if not pathfunc:
+                raise InvalidCommandLineError("Log opted does not exist!")
+            path = pathfunc(options=options)
+            state = self.rdmc.app.get_handler(path, silent=True, uncache=True)
+            signature = {
+                "etag": state.getheader("etag") if state else None,
+                "count": state.dict.get("Members@odata.count") if state else None,
+                "filter": options.filter,
+            }
 
-            if returncode == 0:
-                self.rdmc.ui.printer(
-                    "Loading Configuration for {} : SUCCESS\n".format(urlvar)
-                )
-            else:
-                self.rdmc.ui.error(
-                    "Loading Configuration for {} : FAILED\n".format(urlvar)
-                )
-                self.rdmc.ui.error(
-                    "ILOREST return code : {}.\nFor more details please check {}"
-                    ".txt under {} directory.\n".format(returncode, urlvar, createdir)
-                )
+        if (
+            previous
+            and previous.get("signature") == signature
+            and os.path.isfile(os.path.join(hostdir, previous["file"]))
+        ):
+            return dict(previous, status="unchanged")
 
-        oofile.close()
+        if service == "AHS":
+            filename = os.path.basename(self.getahsfilename(options))
+            path = self.returnahspath(options)
+            self.downloadahsfile(path, os.path.join(hostdir, filename), progress=False)
+            entries = None
+        else:
+            data = self.downloaddata(path=path, options=options)
+            data = self.filterdata(data=data, tofilter=options.filter)
+            filename = service + ".ndjson.gz"
+            created = [item["Created"] for item in data if item.get("Created")]
+            first = min(created) if created else None
+            last = max(created) if created else None
+            self.writeatomic(
+                os.path.join(hostdir, filename),
+                (json.dumps(item) + "\n" for item in data),
+                compress=True,
+            )
+            entries = len(data)
+
+        return {
+            "log": service,
+            "file": filename,
+            "status": "downloaded",
+            "entries": entries,
+            "bytes": os.path.getsize(os.path.join(hostdir, filename)),
+            "start": first,
+            "end": last,
+            "collected": datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "signature": signature,
+        }
 
-        if finalreturncode:
-            self.rdmc.ui.printer("All servers have been successfully configured.\n")
+    def writeatomic(self, filename, data, compress=False):
+        """Write data to a temporary file next to filename and rename it into place
 
-        return finalreturncode
+        :param filename: destination file
+        :type filename: str.
+        :param data: file contents, or an iterable of its pieces written one at a time
+        :type data: str, bytes or iterable.
+        :param compress: write the contents gzip compressed
+        :type compress: bool.
+        """
+        if isinstance(data, (str, bytes)):
+            data = [data]
+        tmpname = filename + ".tmp"
+        with (gzip.open if compress else open)(tmpname, "wb") as output:
+            for piece in data:
+                output.write(piece if isinstance(piece, bytes) else piece.encode("utf-8"))
+        os.replace(tmpname, filename)
 
     def validatempfile(self, mpfile=None, options=None):
         """Validate temporary file
@@ -351,55 +562,13 @@ class ServerlogsCommand:
 
         if not mpfile:
             return False
-        elif mpfile.startswith(('"', "'")) and mpfile[0] == mpfile[-1]:
-            mpfile = mpfile[1:-1]
 
-        if not os.path.isfile(mpfile) or not options.mplog:
-            raise InvalidFileInputError(
-                "File '%s' doesn't exist, please "
-                "create file by running save command." % mpfile
+        if not options.mplog:
+            raise InvalidCommandLineError(
+                "Please select the logs to download using the --mplog option."
             )
 
-        logs = self.checkmplog(options)
-
-        try:
-            with open(mpfile, "r") as myfile:
-                data = list()
-                cmdtorun = ["serverlogs"]
-                globalargs = ["-v", "--nocache"]
-
-                while True:
-                    line = myfile.readline()
-                    if not line:
-                        break
-
-                    for logval in logs:
-                        cmdargs = ["--selectlog=" + str(logval), "-f", str(logval)]
-                        if line.endswith(os.linesep):
-                            line.rstrip(os.linesep)
-
-                        args = shlex.split(line, posix=False)
-
-                        if len(args) < 5:
-                            self.rdmc.ui.error(
-                                "Incomplete data in input file: {}\n".format(line)
-                            )
-                            raise InvalidMSCfileInputError(
-                                "Please verify the " "contents of the %s file" % mpfile
-                            )
-                        else:
-                            linelist = globalargs + cmdtorun + args + cmdargs
-                            line = str(line).replace("\n", "")
-                            self.queue.put(linelist)
-                            data.append(linelist)
-        except Exception as excp:
-            LOGGER.info("%s", str(excp))
-            raise excp
-
-        if data:
-            return data
-
-        return False
+        return read_inventory(mpfile)
 
     def checkmplog(self, options):
         """Function to validate mplogs options
@@ -412,7 +581,7 @@ class ServerlogsCommand:
             if "," in logs:
                 logs = logs.split(",")
                 return logs
-            if logs in ("all", "IEL", "IML", "AHS"):
+            if logs in ("all", "IEL", "IML", "SL", "AHS"):
                 if logs == "all":
                     logs = ["IEL", "IML", "AHS"]
                 else:
@@ -512,70 +681,161 @@ class ServerlogsCommand:
             bodydict["body"] = {"Action": action}
             self.rdmc.app.post_handler(path, bodydict["body"])
 
-    def downloaddata(self, path=None, options=None):
-        """Worker function to download the log files
+    def downloadahsfile(self, path, filename, progress=True):
+        """Download an AHS log to a file in byte ranges of AHS_CHUNK_SIZE. The data is
+        written to <filename>.part and renamed to filename once complete. A range that fails
+        with a network error is requested again, and a later run resumes from the part file
+        while the server still has the same file.
 
-        :param options: command line options
-        :type options: list.
-        :param path: path to download logs
+        :param path: path of the AHS download
         :type path: str
+        :param filename: file to save the AHS log to
+        :type filename: str
+        :param progress: show the progress of the download
+        :type progress: bool
         """
-        if path:
-            LOGGER.info("Getting data from %s", str(path))
-            if options.service == "AHS":
-                data = self.rdmc.app.get_handler(path, silent=True, uncache=True)
-                if data:
-                    return data.ori
-                else:
-                    raise NoContentsFoundForOperationError("Unable to retrieve AHS logs.")
-            else:
-                data = self.rdmc.app.get_handler(path, silent=True)
+        if self.rdmc.app.redfishinst.base_url.startswith("blobstore"):
+            # the local interface returns the whole download in one response
+            data = self.rdmc.app.get_handler(path, silent=True, uncache=True)
+            if not data:
+                raise NoContentsFoundForOperationError("Unable to retrieve AHS logs.")
+            self.writeatomic(filename, data.ori)
+            return
 
-            datadict = data.dict
+        partfile = filename + ".part"
+        statefile = partfile + ".json"
+        state = dict()
+        if os.path.isfile(partfile) and os.path.isfile(statefile):
+            try:
+                with open(statefile, "r") as statefh:
+                    state = json.load(statefh)
+            except ValueError:
+                state = dict()
+        offset = os.path.getsize(partfile) if state.get("path") == path else 0
+        resumed, started, shown, retries = offset, time.time(), 0, 0
 
+        while True:
+            headers = {"Range": "bytes=%s-%s" % (offset, offset + AHS_CHUNK_SIZE - 1)}
+            if offset and state.get("validator"):
+                # a server whose file changed answers with all of the new one
+                headers["If-Range"] = state["validator"]
             try:
-                completedatadictlist = (
-                    datadict["Items"] if "Items" in datadict else datadict["Members"]
+                resp = self.rdmc.app.get_handler(
+                    path, silent=True, uncache=True, headers=headers
                 )
-            except:
-                self.rdmc.ui.error("No data available within log.\n")
-                raise NoContentsFoundForOperationError("Unable to retrieve logs.")
+            except (
+                urllib3.exceptions.HTTPError,
+                RetriesExhaustedError,
+                DecompressResponseError,
+            ) as excp:
+                retries = self.ahsretry(excp, retries, offset, partfile)
+                continue
 
-            if self.rdmc.app.typepath.defs.flagforrest:
-                morepages = True
+            if resp.status == 416 and offset:
+                if offset == state.get("total"):
+                    # the part file already holds the whole download
+                    break
+                offset, state = 0, dict()
+                continue
+            if resp.status not in (200, 206):
+                raise NoContentsFoundForOperationError("Unable to retrieve AHS logs.")
+            data = resp.ori or b""
+            if resp.status == 200:
+                if offset:
+                    LOGGER.info("AHS download is not resumable, starting over.")
+                offset = resumed = 0
+                total = len(data)
+            else:
+                total = (resp.getheader("Content-Range") or "").rpartition("/")[2]
+                total = int(total) if total.isdigit() else None
+
+            with open(partfile, "ab" if offset else "wb") as partfh:
+                partfh.write(data)
+            offset += len(data)
+            retries = 0
+            state = {
+                "path": path,
+                "validator": resp.getheader("ETag") or resp.getheader("Last-Modified"),
+                "total": total,
+            }
+            self.writeatomic(statefile, json.dumps(state))
+            if progress and time.time() - shown >= 0.5:
+                shown = time.time()
+                self.ahsprogress(offset, total, resumed, started)
+            if offset >= total if total is not None else len(data) < AHS_CHUNK_SIZE:
+                # a server without the size in Content-Range ends with a short range
+                break
 
-                while morepages:
-                    if "links" in datadict and "NextPage" in datadict["links"]:
-                        next_link_uri = (
-                            path + "?page=" + str(datadict["links"]["NextPage"]["page"])
-                        )
+        os.replace(partfile, filename)
+        os.remove(statefile)
+        if progress:
+            self.ahsprogress(offset, offset, resumed, started, filename=filename)
+
+    def ahsretry(self, excp, retries, offset, partfile):
+        """Wait before resuming an interrupted AHS download, give up after AHS_RETRIES in a
+        row without receiving any bytes
+
+        :param excp: error that interrupted the download
+        :type excp: Exception
+        :param retries: retries made since bytes were last received
+        :type retries: int
+        :param offset: bytes downloaded
+        :type offset: int
+        :param partfile: file holding the downloaded bytes
+        :type partfile: str
+        :returns: retries made including this one
+        """
+        if retries >= AHS_RETRIES:
+            raise DownloadError(
+                "AHS download interrupted after %s bytes (%s). Run the command again to "
+                "resume from %s." % (offset, excp, partfile)
+            )
+        LOGGER.info("AHS download interrupted after %s bytes, resuming: %s", offset, excp)
+        time.sleep(2**retries)
+        return retries + 1
+
+    def ahsprogress(self, done, total, resumed, started, filename=None):
+        """Show the progress and throughput of an AHS download, the summary once the file
+        is saved
+
+        :param done: bytes downloaded
+        :type done: int
+        :param total: size of the download, None when unknown
+        :type total: int
+        :param resumed: bytes downloaded by an earlier run
+        :type resumed: int
+        :param started: time the download started
+        :type started: float
+        :param filename: saved file, None while downloading
+        :type filename: str
+        """
+        mib = 1024.0 * 1024.0
+        rate = (done - resumed) / mib / max(time.time() - started, 0.001)
+        if filename:
+            self.rdmc.ui.printer(
+                "AHS log saved to %s: %.1f MiB at %.1f MiB/s.\n"
+                % (filename, done / mib, rate)
+            )
+        elif sys.stdout.isatty():
+            size = "%.1f MiB" % (done / mib)
+            if total:
+                size += " of %.1f MiB (%d%%)" % (total / mib, done * 100 // total)
+            self.rdmc.ui.printer("Downloading AHS log: %s, %.1f MiB/s\r" % (size, rate))
 
-                        href = "%s" % next_link_uri
-                        data = self.rdmc.app.get_handler(href, silent=True)
-                        datadict = data.dict
+    def downloaddata(self, path=None, options=None):
+        """Worker function to download the log files
 
-                        try:
-                            completedatadictlist = (
-                                completedatadictlist + datadict["Items"]
-                            )
-                        except:
-                            self.rdmc.ui.error("No data available within log.\n")
-                            raise NoContentsFoundForOperationError(
-                                "Unable to retrieve logs."
-                            )
-                    else:
-                        morepages = False
+        :param options: command line options
+        :type options: list.
+        :param path: path to download logs
+        :type path: str
+        """
+        if path:
+            LOGGER.info("Getting data from %s", str(path))
+            if self.rdmc.app.typepath.defs.flagforrest:
+                completedatadictlist = self.downloadpages(path)
             else:
-                datadict = list()
-
-                for members in completedatadictlist:
-                    if len(list(members.keys())) == 1:
-                        memberpath = members[self.rdmc.app.typepath.defs.hrefstring]
-                        data = self.rdmc.app.get_handler(memberpath, silent=True)
-                        datadict = datadict + [data.dict]
-                    else:
-                        datadict = datadict + [members]
-                completedatadictlist = datadict
+                completedatadictlist = self.downloadmembers(path)
 
             if completedatadictlist:
                 try:
@@ -590,6 +850,466 @@ class ServerlogsCommand:
             self.rdmc.ui.error("Path not found for input log.\n")
             raise NoContentsFoundForOperationError("Unable to retrieve logs.")
 
+    def downloadpages(self, path):
+        """Download the items of every page of a REST log collection. When the collection
+        reports its total, the pages after the first are downloaded concurrently.
+
+        :param path: path of the log collection
+        :type path: str
+        :returns: list of log items in page order
+        """
+        datadict = self.rdmc.app.get_handler(path, silent=True).dict
+        try:
+            items = datadict["Items"] if "Items" in datadict else datadict["Members"]
+            items = list(items)
+        except:
+            self.rdmc.ui.error("No data available within log.\n")
+            raise NoContentsFoundForOperationError("Unable to retrieve logs.")
+
+        total = datadict.get("Total")
+        pagesize = len(items)
+        pagedicts = [datadict]
+        while "links" in pagedicts[-1] and "NextPage" in pagedicts[-1]["links"]:
+            first = pagedicts[-1]["links"]["NextPage"]["page"]
+            last = max(first, -(-total // pagesize)) if total and pagesize else first
+            pagedicts = self.getconcurrently(
+                [path + "?page=" + str(page) for page in range(first, last + 1)]
+            )
+            for pagedict in pagedicts:
+                try:
+                    items.extend(pagedict["Items"])
+                except:
+                    self.rdmc.ui.error("No data available within log.\n")
+                    raise NoContentsFoundForOperationError("Unable to retrieve logs.")
+        return items
+
+    def downloadmembers(self, path):
+        """Download the members of every page of a Redfish log collection. Members are
+        expanded in the collection when the service supports $expand, otherwise the
+        members given by reference are downloaded concurrently. Pages addressed with $skip
+        are downloaded concurrently once the member count is known.
+
+        :param path: path of the log collection
+        :type path: str
+        :returns: list of log entries in collection order
+        """
+        data = None
+        if self.expandsupported():
+            data = self.rdmc.app.get_handler(
+                path + "?$expand=.", silent=True, uncache=True
+            )
+        if not data or data.status != 200:
+            data = self.rdmc.app.get_handler(path, silent=True)
+        datadict = data.dict
+        try:
+            members = datadict["Items"] if "Items" in datadict else datadict["Members"]
+            members = list(members)
+        except:
+            self.rdmc.ui.error("No data available within log.\n")
+            raise NoContentsFoundForOperationError("Unable to retrieve logs.")
+
+        count = datadict.get("Members@odata.count")
+        pagesize = len(members)
+        nextlink = datadict.get("Members@odata.nextLink")
+        while nextlink:
+            pagedicts = self.getconcurrently(self.pagelinks(nextlink, pagesize, count))
+            for pagedict in pagedicts:
+                members.extend(pagedict.get("Members", []))
+            nextlink = pagedicts[-1].get("Members@odata.nextLink")
+
+        hrefstring = self.rdmc.app.typepath.defs.hrefstring
+        refs = [index for index, member in enumerate(members) if len(member) == 1]
+        memberdicts = self.getconcurrently([members[index][hrefstring] for index in refs])
+        for index, memberdict in zip(refs, memberdicts):
+            members[index] = memberdict
+        return members
+
+    def expandsupported(self):
+        """True when the service root advertises $expand=. for collections"""
+        try:
+            features = self.rdmc.app.current_client.root.dict["ProtocolFeaturesSupported"]
+            return bool(features["ExpandQuery"]["NoLinks"])
+        except (AttributeError, KeyError, TypeError):
+            return False
+
+    def pagelinks(self, nextlink, pagesize, count):
+        """Links of the remaining pages of a collection. When the next link pages with
+        $skip and the member count is known every remaining page is addressed, otherwise
+        only the next one.
+
+        :param nextlink: Members@odata.nextLink of the last page
+        :type nextlink: str
+        :param pagesize: members on a page
+        :type pagesize: int
+        :param count: Members@odata.count of the collection
+        :type count: int
+        """
+        parsed = urlparse(nextlink)
+        query = parse_qsl(parsed.query, keep_blank_values=True)
+        skip = dict(query).get("$skip", "")
+        if not (count and pagesize and skip.isdigit()):
+            return [nextlink]
+        query = [(key, val) for key, val in query if key != "$skip"]
+        return [
+            urlunparse(
+                parsed._replace(query=urlencode(query + [("$skip", page)], safe="$.*~"))
+            )
+            for page in range(int(skip), count, pagesize)
+        ]
+
+    def getconcurrently(self, paths):
+        """Download paths with a pool bounded by --prefetch-workers and the concurrency
+        governor. Responses are not added to the monolith.
+
+        :param paths: paths to download
+        :type paths: list
+        :returns: list of response dictionaries in the order of paths
+        """
+        if not paths:
+            return []
+
+        def getdict(getpath):
+            """Body of one path, a failed download fails the whole log"""
+            resp = self.rdmc.app.get_handler(getpath, silent=True, uncache=True)
+            if not resp or resp.status != 200:
+                raise NoContentsFoundForOperationError("Unable to retrieve logs.")
+            return resp.dict
+
+        base_url = self.rdmc.app.current_client.base_url
+        workers = min(
+            self.rdmc.prefetcher.workers, GOVERNOR.workers(len(paths), base_url)
+        )
+        if workers < 2 or base_url.startswith("blobstore"):
+            return [getdict(getpath) for getpath in paths]
+        pool = ThreadPool(workers)
+        try:
+            return pool.map(getdict, paths)
+        finally:
+            pool.close()
+            pool.join()
+
+    def downloadnewentries(self, path, mark, limit=None, datadict=None):
+        """Download the log entries added after a watermark
+
+        :param path: path of the log collection
+        :type path: str
+        :param mark: watermark of the newest entry seen, None to download every entry
+        :type mark: dict
+        :param limit: download at most this many of the newest entries
+        :type limit: int
+        :param datadict: first page of the collection when it was just downloaded
+        :type datadict: dict
+        :returns: new entries oldest first and the watermark of the newest one
+        """
+        if self.rdmc.app.typepath.defs.flagforrest:
+            # REST pages can only be walked from the first one
+            entries = self.downloadpages(path)
+            newest = max(entries, key=self.entryorder) if entries else None
+            if mark and newest and self.clearedsince(newest, mark):
+                mark = None
+            entries = [entry for entry in entries if self.newerentry(entry, mark)]
+            entries = sorted(entries, key=self.entryorder)[-limit:] if limit else entries
+        else:
+            entries = self.downloadnewmembers(path, mark, limit, datadict)
+            newest = entries[-1] if entries else None
+        if not entries:
+            return [], mark
+        return entries, {"id": newest.get("Id"), "created": newest.get("Created")}
+
+    def downloadnewmembers(self, path, mark, limit=None, datadict=None):
+        """Walk a Redfish log collection from its newest entry back to the watermark. The
+        iLO lists entries oldest first, so the pages are read from the last one and the
+        walk stops at the first entry that was seen before.
+
+        :param path: path of the log collection
+        :type path: str
+        :param mark: watermark of the last run, None to download every entry
+        :type mark: dict
+        :param limit: stop after this many entries
+        :type limit: int
+        :param datadict: first page of the collection when it was just downloaded
+        :type datadict: dict
+        :returns: new entries oldest first
+        """
+        if datadict is None:
+            datadict = self.rdmc.app.get_handler(path, silent=True, uncache=True).dict
+        try:
+            members = datadict["Members"]
+        except (KeyError, TypeError):
+            self.rdmc.ui.error("No data available within log.\n")
+            raise NoContentsFoundForOperationError("Unable to retrieve logs.")
+
+        count = datadict.get("Members@odata.count")
+        nextlink = datadict.get("Members@odata.nextLink")
+        pages = [path]
+        if nextlink:
+            pages.extend(self.pagelinks(nextlink, len(members), count))
+        while len(pages) > 1 and not count:
+            # without a member count only the next page is known, collect the links first
+            nextlink = self.getconcurrently([pages[-1]])[0].get("Members@odata.nextLink")
+            if not nextlink:
+                break
+            pages.append(nextlink)
+
+        # a page of expanded members costs one request, unpaged logs are read by reference
+        expand = len(pages) > 1 and self.expandsupported()
+        workers = max(1, self.rdmc.prefetcher.workers)
+        # usually few entries are past a watermark, batches double while all of them are
+        batch = min(workers, limit or workers) if not mark else 1
+        hrefstring = self.rdmc.app.typepath.defs.hrefstring
+        newentries = list()
+        for page in reversed(pages):
+            if expand:
+                separator = "&" if "?" in page else "?"
+                pagemembers = self.getconcurrently([page + separator + "$expand=."])[0]
+                pagemembers = pagemembers.get("Members", [])
+            elif page == path:
+                pagemembers = members
+            else:
+                pagemembers = self.getconcurrently([page])[0].get("Members", [])
+            pagemembers = list(reversed(pagemembers))
+            start = 0
+            while start < len(pagemembers):
+                entries = pagemembers[start : start + batch]
+                start += batch
+                refs = [index for index, entry in enumerate(entries) if len(entry) == 1]
+                hrefs = [entries[idx][hrefstring] for idx in refs]
+                memberdicts = self.getconcurrently(hrefs)
+                for index, memberdict in zip(refs, memberdicts):
+                    entries[index] = memberdict
+                for entry in entries:
+                    if not newentries and mark and self.clearedsince(entry, mark):
+                        LOGGER.info("Log was cleared since the last run.")
+                        mark = None
+                    if not self.newerentry(entry, mark) or len(newentries) == limit:
+                        return list(reversed(newentries))
+                    newentries.append(entry)
+                batch = min(batch * 2, workers)
+        return list(reversed(newentries))
+
+    def followlog(self, path, options):
+        """Print the entries added to a log as they arrive until interrupted. A service
+        with server-sent events announces changes, otherwise the log is polled with
+        conditional requests less often the longer it does not change.
+
+        :param path: path of the log collection
+        :type path: str
+        :param options: command line options
+        :type options: list.
+        """
+        service = options.service
+        if options.sincelast:
+            # the first check prints what was added since the last run
+            state, mark = None, self.readwatermarks().get(service)
+        else:
+            state, datadict = self.logstate(path)
+            _, mark = self.downloadnewentries(path, None, limit=1, datadict=datadict)
+        stream = open_event_stream(self.rdmc.app)
+        interval = options.pollinterval
+        self.rdmc.ui.printer(
+            "Following the %s %s, press Ctrl-C to stop.\n"
+            % (service, "with server-sent events" if stream else "by polling")
+        )
+        try:
+            while True:
+                current, datadict = self.logstate(path, state)
+                if current != state:
+                    state = current
+                    entries, mark = self.downloadnewentries(path, mark, datadict=datadict)
+                    if entries:
+                        try:
+                            self.savedata(options=options, data=entries)
+                        except NoContentsFoundForOperationError:
+                            pass
+                        sys.stdout.flush()
+                        if options.sincelast:
+                            self.writewatermark(service, mark)
+                    interval = options.pollinterval
+                else:
+                    interval = min(interval * 2, FOLLOW_MAX_INTERVAL)
+
+                if stream and stream.alive:
+                    # events wake the loop up, the timeout catches changes without one
+                    stream.wait(FOLLOW_MAX_INTERVAL)
+                else:
+                    if stream:
+                        LOGGER.info("Event stream closed, polling the log instead.")
+                        stream = None
+                    time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if stream:
+                stream.close()
+
+    def logstate(self, path, state=None):
+        """ETag, member count and last member of a log collection with the collection.
+        While the ETag of state matches the collection is not downloaded again and state
+        is returned without it, as it is when a later check fails with anything other
+        than an expired session.
+
+        :param path: path of the log collection
+        :type path: str
+        :param state: state returned by the previous check
+        :type state: tuple
+        :returns: (state, collection dictionary or None)
+        """
+        etag = state[0] if state else None
+        resp = self.rdmc.app.get_handler(
+            path,
+            silent=True,
+            uncache=True,
+            headers={"If-None-Match": etag} if etag else None,
+        )
+        if resp.status == 304:
+            return state, None
+        elif resp.status == 401:
+            raise SessionExpired(
+                "Invalid session. Please logout and log back in or include credentials."
+            )
+        elif resp.status != 200:
+            if not state:
+                raise NoContentsFoundForOperationError("Unable to retrieve logs.")
+            # keep following through a service that is briefly unavailable
+            LOGGER.warning("Checking %s for new entries failed: %s", path, resp.status)
+            return state, None
+        datadict = resp.dict
+        members = datadict.get("Members", datadict.get("Items")) or [{}]
+        count = datadict.get("Members@odata.count", datadict.get("Total", len(members)))
+        hrefstring = self.rdmc.app.typepath.defs.hrefstring
+        last = members[-1].get(hrefstring, members[-1].get("Id"))
+        etag = resp.getheader("etag") or datadict.get("@odata.etag")
+        return (etag, count, last), datadict
+
+    @staticmethod
+    def entryorder(entry):
+        """Sort key of a log entry, its numeric Id or Created timestamp"""
+        entryid = str(entry.get("Id", ""))
+        return (int(entryid) if entryid.isdigit() else -1, entry.get("Created") or "")
+
+    def newerentry(self, entry, mark):
+        """True when a log entry was added after the watermark
+
+        :param entry: log entry
+        :type entry: dict
+        :param mark: watermark, None when there is none
+        :type mark: dict
+        """
+        if not mark:
+            return True
+        entryid, markid = str(entry.get("Id", "")), str(mark.get("id", ""))
+        if entryid.isdigit() and markid.isdigit():
+            return int(entryid) > int(markid)
+        return (entry.get("Created") or "") > (mark.get("created") or "")
+
+    def clearedsince(self, newest, mark):
+        """True when the newest entry of a log is not past the watermark by Id but was
+        created after it, the log was cleared and the Ids started over
+
+        :param newest: newest log entry
+        :type newest: dict
+        :param mark: watermark
+        :type mark: dict
+        """
+        return not self.newerentry(newest, mark) and (newest.get("Created") or "") > (
+            mark.get("created") or ""
+        )
+
+    def watermarkfile(self):
+        """File keeping the --since-last watermarks of the logged in server"""
+        return os.path.join(
+            self.rdmc.opts.config_dir,
+            "cache",
+            "watermarks",
+            "%s.json" % cache_name(self.rdmc.app.current_client.base_url),
+        )
+
+    def readwatermarks(self):
+        """Watermark of every log of the logged in server, by log name"""
+        filename = self.watermarkfile()
+        if not os.path.isfile(filename):
+            return dict()
+        try:
+            with open(filename, "r") as markfile:
+                return json.load(markfile)
+        except ValueError:
+            LOGGER.info("Ignoring unreadable watermarks %s", filename)
+            return dict()
+
+    def writewatermark(self, service, mark):
+        """Record the newest entry of a log downloaded with --since-last
+
+        :param service: log name, IML, IEL or SL
+        :type service: str
+        :param mark: watermark of the newest entry
+        :type mark: dict
+        """
+        filename = self.watermarkfile()
+        if not os.path.isdir(os.path.dirname(filename)):
+            os.makedirs(os.path.dirname(filename))
+        marks = self.readwatermarks()
+        marks[service] = dict(mark, updated=datetime.datetime.utcnow().isoformat() + "Z")
+        self.writeatomic(filename, json.dumps(marks, indent=2))
+
+    def appendentries(self, filename, data, indent=False):
+        """Append log entries to the JSON list of a file written by an earlier run. Only the
+        closing bracket of the list is rewritten, the entries already saved are not read.
+
+        :param filename: output file
+        :type filename: str
+        :param data: new log entries
+        :type data: list
+        :param indent: write indented JSON
+        :type indent: bool
+        """
+        if indent:
+            items = [
+                "  " + json.dumps(item, indent=2, sort_keys=True).replace("\n", "\n  ")
+                for item in data
+            ]
+            separator, closing = ",\n", "\n]"
+        else:
+            items = [json.dumps(item) for item in data]
+            separator, closing = ", ", "]"
+
+        if not os.path.isfile(filename) or not os.path.getsize(filename):
+            if indent:
+                self.writeatomic(filename, json.dumps(data, indent=2, sort_keys=True))
+            else:
+                self.writeatomic(filename, json.dumps(data))
+            return
+        if not items:
+            return
+
+        with open(filename, "r+b") as existing:
+            # the list ends with its closing bracket, only whitespace may follow
+            end = existing.seek(0, os.SEEK_END)
+            tail = b""
+            while end > 0 and not tail.strip():
+                start = max(0, end - 4096)
+                existing.seek(start)
+                tail = existing.read(end - start) + tail
+                end = start
+            existing.seek(0)
+            opened = existing.read(64).lstrip()[:1] == b"["
+            stripped = tail.rstrip()
+            if not opened or not stripped.endswith(b"]"):
+                raise InvalidFileInputError(
+                    "%s does not hold log entries to append to." % filename
+                )
+            bracket = end + len(stripped) - 1
+            # the new entries follow the last entry, or the opening bracket of an empty list
+            start = max(0, bracket - 4096)
+            existing.seek(start)
+            before = existing.read(bracket - start).rstrip()
+            if before.endswith(b"["):
+                added = ("\n" if indent else "") + separator.join(items) + closing
+            else:
+                added = separator + separator.join(items) + closing
+            existing.seek(start + len(before))
+            existing.write(added.encode("utf-8"))
+            existing.truncate()
+
     def returnimlpath(self, options=None):
         """Return the requested path of the IML logs
 
@@ -860,11 +1580,10 @@ class ServerlogsCommand:
         LOGGER.info("Saving/Writing data...")
         if data:
             data = self.filterdata(data=data, tofilter=options.filter)
-            if options.service == "AHS":
-                filename = self.getahsfilename(options)
-
-                with open(filename, "wb") as foutput:
-                    foutput.write(data)
+            if options.filename and (
+                getattr(options, "sincelast", False) or getattr(options, "follow", False)
+            ):
+                self.appendentries(options.filename[0], data, indent=options.json)
             elif options.filename:
                 with open(options.filename[0], "w") as foutput:
                     if options.json:
@@ -1512,9 +2231,45 @@ class ServerlogsCommand:
             "--mplog",
             dest="mplog",
             help="""used to indicate the logs to be downloaded on multiple servers. """
-            """Allowable values: IEL, IML, AHS, all or combination of any two.""",
+            """Allowable values: IEL, IML, SL, AHS, all or a comma separated """
+            """combination.""",
             default=None,
         )
+        customparser.add_argument(
+            "--workers",
+            dest="workers",
+            type=int,
+            help="Maximum number of servers downloading logs at the same time with "
+            "--mpfile. The default is %s." % DEFAULT_WORKERS,
+            default=DEFAULT_WORKERS,
+        )
+        customparser.add_argument(
+            "--since-last",
+            dest="sincelast",
+            action="store_true",
+            help="Only download the IML, IEL or SL entries added since the last "
+            "--since-last run against the server, newest first until an entry seen "
+            "before. New entries are appended to the file given with -f.",
+            default=False,
+        )
+        customparser.add_argument(
+            "--follow",
+            dest="follow",
+            action="store_true",
+            help="Keep printing the IML, IEL or SL entries as they are added until "
+            "interrupted. Uses the server-sent events of the EventService when the "
+            "server offers them, polls the log otherwise. New entries are appended to "
+            "the file given with -f.",
+            default=False,
+        )
+        customparser.add_argument(
+            "--poll-interval",
+            dest="pollinterval",
+            type=float,
+            help="Seconds between two checks of a followed log while it changes, doubled "
+            "up to %s seconds while it does not. (default: 5)" % FOLLOW_MAX_INTERVAL,
+            default=5.0,
+        )
         customparser.add_argument(
             "--repair",
             "-r",
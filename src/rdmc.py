@@ -58,9 +58,9 @@ try:
 except ImportError:
     from ilorest import versioning
 try:
-    import extensions
+    import rdmc_manifest
 except ImportError:
-    from ilorest import extensions
+    from ilorest import rdmc_manifest
 
 try:
     from config.rdmc_config import RdmcConfig
@@ -193,12 +193,8 @@ if os.name != "nt":
 
 # always flush stdout and stderr
 
-try:
-    CLI = cliutils.CLI()
-except cliutils.ResourceAllocationError as excp:
-    RdmcError("Unable to allocate more resources.")
-    RdmcError("ILOREST return code: %s\n" % ReturnCodes.RESOURCE_ALLOCATION_ISSUES_ERROR)
-    sys.exit(ReturnCodes.RESOURCE_ALLOCATION_ISSUES_ERROR)
+# terminal size is only queried once a horizontal rule is printed
+CLI = cliutils.CLI()
 
 try:
     # enable fips mode if our special functions are available in _ssl and OS is
@@ -219,6 +215,38 @@ except AttributeError:
     pass
 
 
+def rdmc_module(name):
+    """Import an optional rdmc_* module the first time one of its features is used, so
+    command lines that do not use a feature do not load it
+
+    :param name: module name
+    :type name: str.
+    """
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return importlib.import_module("ilorest." + name)
+
+
+class NoTracer(object):
+    """Stands in for the Tracer until --timings or --trace-file is given, its spans time
+    nothing"""
+
+    enabled = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def span(self, name, cat="rdmc", args=None):
+        return self
+
+
+NO_TRACER = NoTracer()
+
+
 class RdmcCommand(RdmcCommandBase):
     """Constructor"""
 
@@ -239,48 +267,81 @@ class RdmcCommand(RdmcCommandBase):
         self.commlist = list()
         self._redobj = None
         self.loaded_commands = []
-
-        # import all extensions dynamically
-        for name in extensions.classNames:
-            pkgName, cName = name.rsplit(".", 1)
-            pkgName = "extensions" + pkgName
-            try:
-                if "__pycache__" not in pkgName and "Command" in cName:
-                    self.commands_dict[cName] = getattr(
-                        importlib.import_module(pkgName, __package__), cName
-                    )()
-                    sName = pkgName.split(".")[1]
-                    self.add_command(cName, section=sName)
-            except cliutils.ResourceAllocationError as excp:
-                self.ui.error(excp)
-                retcode = ReturnCodes.RESOURCE_ALLOCATION_ISSUES_ERROR
-                self.ui.error("Unable to allocate more resources.")
-                self.ui.printer(("ILOREST return code: %s\n" % retcode))
-                sys.exit(retcode)
-            except Exception as excp:
-                self.ui.error(("loading command: %s" % cName), None)
-
-        # command mapping
-        commands_to_remove = []
-        for command in self.commands_dict:
-            try:
-                self.comm_map[self.commands_dict[command].ident.get("name")] = command
-                for alias in self.commands_dict[command].ident.get("aliases"):
-                    self.comm_map[alias] = command
-            except Exception as excp:
-                self.ui.command_not_enabled(
-                    ("Command '%s' unable to be " "initialized...Removing" % command),
-                    excp,
-                )
-                commands_to_remove.append(command)
-
-        # removing commands marked for deletion
-        for cmd in commands_to_remove:
-            del self.commands_dict[cmd]
-        del commands_to_remove
+        self.persistent = False  # keep sessions/monolith in memory between runs
+        self.session = None  # (url, user) of the live session of a persistent run
+        # created on first use, see the properties below
+        self._tracer = None
+        self._http_stats = None
+        self._prefetcher = None
+        self._cache_policy = None
+        self._cache_store = None
+        self._cache_shards = None
+        self._epilog = self.parser.epilog
+
+        # map every extension command from the manifest, commands are imported on first use
+        self.manifest = rdmc_manifest.load_manifest()
+        for cName, entry in self.manifest.items():
+            self.add_command(cName, section=entry["section"])
+            self.comm_map[entry["name"]] = cName
+            for alias in entry["aliases"]:
+                self.comm_map[alias] = cName
 
         # ---------End of imports---------
 
+    @property
+    def tracer(self):
+        """Tracer of --timings and --trace-file, NO_TRACER until start_tracer()"""
+        return self._tracer or NO_TRACER
+
+    def start_tracer(self):
+        """Create the tracer on first use and start timing the command line"""
+        if self._tracer is None:
+            self._tracer = rdmc_module("rdmc_timings").Tracer()
+            if self._prefetcher is not None:
+                self._prefetcher.tracer = self._tracer
+        self._tracer.start(self.app, UI)
+
+    @property
+    def http_stats(self):
+        """Request accounting of --http-stats"""
+        if self._http_stats is None:
+            self._http_stats = rdmc_module("rdmc_http_stats").HttpStats()
+        return self._http_stats
+
+    @property
+    def governor(self):
+        """Concurrency governor, shared by every RdmcCommand of the process, multiple
+        server runs included"""
+        return rdmc_module("rdmc_governor").GOVERNOR
+
+    @property
+    def prefetcher(self):
+        """Concurrent downloader of the monolith"""
+        if self._prefetcher is None:
+            self._prefetcher = rdmc_module("rdmc_prefetch").Prefetcher(self.tracer)
+        return self._prefetcher
+
+    @property
+    def cache_policy(self):
+        """Freshness policy of the cached monolith"""
+        if self._cache_policy is None:
+            self._cache_policy = rdmc_module("rdmc_cache_policy").CachePolicy()
+        return self._cache_policy
+
+    @property
+    def cache_store(self):
+        """Index and blob store of the cached monolith"""
+        if self._cache_store is None:
+            self._cache_store = rdmc_module("rdmc_cache_store").CacheStore()
+        return self._cache_store
+
+    @property
+    def cache_shards(self):
+        """Cache directories per iLO and user"""
+        if self._cache_shards is None:
+            self._cache_shards = rdmc_module("rdmc_cache_shards").CacheShards()
+        return self._cache_shards
+
     def add_command(self, command_name, section=None):
         """Handles to addition of new commands
 
@@ -299,19 +360,42 @@ class RdmcCommand(RdmcCommandBase):
         return self._commands
 
     def search_commands(self, cmdname):
-        """Function to see if command exist in added commands
+        """Function to see if command exist in added commands. The command module is
+        imported the first time it is requested.
 
         :param cmdname: command to be searched
         :type cmdname: str.
         """
 
+        tmp = self.comm_map.get(cmdname)
+        if not tmp:
+            tmp = cmdname
+        if tmp not in self.commands_dict:
+            if tmp not in self.manifest:
+                raise cliutils.CommandNotFoundException(cmdname)
+            self.commands_dict[tmp] = self.import_command(tmp)
+        return self.commands_dict[tmp]
+
+    def import_command(self, cName):
+        """Imports a command module listed in the manifest and returns a command instance
+
+        :param cName: command class name
+        :type cName: str.
+        :returns: command class instance
+        """
+        pkgName = self.manifest[cName]["module"]
         try:
-            tmp = self.comm_map.get(cmdname)
-            if not tmp:
-                tmp = cmdname
-            return self.commands_dict[tmp]
-        except KeyError:
-            raise cliutils.CommandNotFoundException(cmdname)
+            with self.tracer.span("import_command", "command", {"command": cName}):
+                return getattr(importlib.import_module(pkgName, __package__), cName)()
+        except cliutils.ResourceAllocationError as excp:
+            self.ui.error(excp)
+            retcode = ReturnCodes.RESOURCE_ALLOCATION_ISSUES_ERROR
+            self.ui.error("Unable to allocate more resources.")
+            self.ui.printer(("ILOREST return code: %s\n" % retcode))
+            sys.exit(retcode)
+        except Exception as excp:
+            self.ui.error(("loading command: %s" % cName), None)
+            raise cliutils.CommandNotFoundException(cName)
 
     def load_command(self, cmd):
         """Fully Loads command and returns the class instance
@@ -321,6 +405,11 @@ class RdmcCommand(RdmcCommandBase):
         :returns: defined class instance
 
         """
+        with self.tracer.span("load_command", "command", {"command": cmd.ident["name"]}):
+            return self._load_command(cmd)
+
+    def _load_command(self, cmd):
+        """Builds the parser and auxiliary commands of a command, see load_command"""
         try:
             cmd.cmdbase = RdmcCommandBase(
                 cmd.ident["name"],
@@ -359,6 +448,11 @@ class RdmcCommand(RdmcCommandBase):
         :param args: list of the entered arguments
         :type args: list.
         """
+        with self.tracer.span(args[0], "command"):
+            return self._dispatch_command(opts, args, help_disp)
+
+    def _dispatch_command(self, opts, args, help_disp):
+        """Loads and runs a command, see _run_command"""
         cmd = self.search_commands(args[0])
 
         self.load_command(cmd)
@@ -381,6 +475,22 @@ class RdmcCommand(RdmcCommandBase):
 
         return cmd.run([], help_disp=help_disp)
 
+    def run_commandline(self, nargv):
+        """Runs a single command line in the current session, as interactive mode does
+
+        :param nargv: command line arguments, starting with the command name
+        :type nargv: list.
+        :returns: return code of the command
+        """
+        try:
+            self.retcode = self._run_command(self.opts, nargv, help_disp=False)
+        except SystemExit as excp:
+            self.retcode = excp.code if isinstance(excp.code, int) else ReturnCodes.SUCCESS
+        except Exception as excp:
+            self.handle_exceptions(excp)
+
+        return self.retcode
+
     def run(self, line, help_disp=False):
         """Main rdmc command worker function
 
@@ -419,6 +529,7 @@ class RdmcCommand(RdmcCommandBase):
             help_disp = True
 
         if line and line[0] in ["-h", "--help"]:
+            self.parser.epilog = self._epilog
             cmddict = self.get_commands()
             sorted_keys = sorted(list(cmddict.keys()))
 
@@ -429,8 +540,8 @@ class RdmcCommand(RdmcCommandBase):
                     self.parser.epilog = self.parser.epilog + "\n\n" + key + "\n"
                 for cmd in cmddict[key]:
                     c_help = "%-25s - %s\n" % (
-                        self.commands_dict[cmd].ident["name"],
-                        self.commands_dict[cmd].ident["summary"],
+                        self.manifest[cmd]["name"],
+                        self.manifest[cmd]["summary"],
                     )
                     self.parser.epilog = self.parser.epilog + c_help
 
@@ -486,7 +597,6 @@ class RdmcCommand(RdmcCommandBase):
             cachedir = self.config.cachedir
 
         if cachedir:
-            self.app.cachedir = cachedir
             try:
                 os.makedirs(cachedir)
             except OSError as ex:
@@ -494,6 +604,7 @@ class RdmcCommand(RdmcCommandBase):
                     pass
                 else:
                     raise
+            self.cache_shards.attach(self.app, cachedir)
 
         if self.opts.logdir and self.opts.debug:
             logdir = self.opts.logdir
@@ -521,41 +632,142 @@ class RdmcCommand(RdmcCommandBase):
             LOGGER.addHandler(lfile)
             self.app.LOGGER = LOGGER
 
-        if (
-            "login" in line or any(x.startswith("--url") for x in line) or not line
-        ) and not (any(x.startswith(("-h", "--h")) for x in nargv) or "help" in line):
-            if not any(x.startswith("--sessionid") for x in line):
-                self.app.logout()
-        else:
-            creds, enc = self._pull_creds(nargv)
-            self.app.restore(creds=creds, enc=enc)
-            self.opts.is_redfish = self.app.typepath.updatedefinesflag(
-                redfishflag=self.opts.is_redfish
-            )
-
-        if nargv:
+        if self.opts.daemon:
+            rdmc_daemon = rdmc_module("rdmc_daemon")
+            if self.persistent or not rdmc_daemon.DAEMON_SUPPORTED:
+                self.ui.error("Daemon mode is not available from this session.")
+                return ReturnCodes.INVALID_COMMAND_LINE_ERROR
             try:
-                self.retcode = self._run_command(self.opts, nargv, help_disp)
-                if self.app.cache:
-                    if ("logout" not in line) and ("--logout" not in line):
-                        self.app.save()
-                        self.app.redfishinst = None
-                else:
-                    self.app.logout()
-            except AttributeError:
-                self.retcode = 0
-                pass
-            except Exception as excp:
-                self.handle_exceptions(excp)
+                daemon = rdmc_daemon.RdmcDaemon(
+                    self,
+                    self.opts.daemon_socket
+                    or rdmc_daemon.default_socket_path(self.opts.config_dir),
+                )
+            except (IOError, OSError) as excp:
+                self.ui.error("Unable to start the daemon: %s" % excp)
+                return ReturnCodes.INVALID_COMMAND_LINE_ERROR
+            self.persistent = True
+            return daemon.serve()
+
+        showhelp = any(x.startswith(("-h", "--h")) for x in nargv) or "help" in line
+        if not showhelp:
+            self.governor.install()
+            self.prefetcher.workers = self.opts.prefetch_workers
+            self.prefetcher.install(self.app)
+        try:
+            if cachedir or self.persistent:
+                # a daemon keeps its monolith in memory and expires it as well
+                try:
+                    self.cache_policy.configure(self.config.cachettl)
+                except ConfigurationFileError as excp:
+                    self.handle_exceptions(excp)
+                self.cache_policy.install(self.app)
+            if cachedir:
+                self.cache_store.install(self.app)
+                # outermost, the lock covers everything saved or restored with the cache
+                self.cache_shards.install(self.app)
+            # started last so stopping them leaves the wrappers above in place
+            if self.opts.timings or self.opts.trace_file:
+                self.start_tracer()
+            if self.opts.http_stats:
+                self.http_stats.start(self.app)
+            if (
+                "login" in line or any(x.startswith("--url") for x in line) or not line
+            ) and not showhelp:
+                if not any(x.startswith("--sessionid") for x in line) and not (
+                    self.persistent
+                    and self.app.redfishinst
+                    and self.session
+                    and self.session == self.requested_session(nargv)
+                ):
+                    if self.app.cache and self.cache_shards.root is not None:
+                        # the login only replaces the session of its own iLO and user
+                        self.cache_shards.detach(self.app)
+                    else:
+                        self.app.logout()
+            elif not (self.persistent and self.app.redfishinst):
+                creds, enc = self._pull_creds(nargv)
+                self.app.restore(creds=creds, enc=enc)
+                self.opts.is_redfish = self.app.typepath.updatedefinesflag(
+                    redfishflag=self.opts.is_redfish
+                )
 
-            return self.retcode
-        else:
-            self.cmdloop(self.opts)
+            if nargv:
+                try:
+                    self.retcode = self._run_command(self.opts, nargv, help_disp)
+                    if self.persistent:
+                        if not self.app.redfishinst:
+                            self.session = None
+                        elif "login" in line or any(x.startswith("--url") for x in line):
+                            self.session = self.requested_session(nargv)
+                    elif self.app.cache:
+                        if ("logout" not in line) and ("--logout" not in line):
+                            self.app.save()
+                            self.app.redfishinst = None
+                    else:
+                        self.app.logout()
+                except AttributeError:
+                    self.retcode = 0
+                    pass
+                except Exception as excp:
+                    self.handle_exceptions(excp)
 
-            if self.app.cache:
-                self.app.save()
+                return self.retcode
+            elif self.persistent:
+                raise InvalidCommandLineError(
+                    "A command is required, interactive mode is not available."
+                )
             else:
-                self.app.logout()
+                self.cmdloop(self.opts)
+
+                if self.app.cache:
+                    self.app.save()
+                else:
+                    self.app.logout()
+        finally:
+            # the stats wrap the timed handlers, so they are stopped first
+            if self._http_stats is not None and self._http_stats.enabled:
+                self.http_stats.stop()
+                self.http_stats.print_report()
+            if self.tracer.enabled:
+                self.report_timings()
+            if getattr(self.opts, "verbose", False) and self.governor.concurrent:
+                self.governor.print_report()
+
+    @staticmethod
+    def requested_session(nargv):
+        """iLO URL and user a command line logs in with through --url
+
+        :param nargv: command line
+        :type nargv: list.
+        :returns: (url, user), None without --url
+        """
+        found = dict()
+        for pos, arg in enumerate(nargv):
+            for opt, key in (("--url", "url"), ("--user", "user"), ("-u", "user")):
+                if arg == opt and pos + 1 < len(nargv):
+                    found[key] = nargv[pos + 1]
+                elif arg.startswith(opt + "="):
+                    found[key] = arg[len(opt) + 1 :]
+                elif opt == "-u" and arg.startswith(opt) and len(arg) > 2:
+                    found[key] = arg[2:]
+        if not found.get("url"):
+            return None
+        url = found["url"]
+        if "https://" not in url:
+            url = "https://" + url
+        return url, found.get("user")
+
+    def report_timings(self):
+        """Stops the tracer and prints the --timings summary and/or writes the --trace-file"""
+        self.tracer.stop()
+        if self.opts.timings:
+            self.tracer.print_summary()
+        if self.opts.trace_file:
+            try:
+                self.tracer.write_trace(self.opts.trace_file)
+            except (IOError, OSError) as excp:
+                self.ui.error("Unable to write trace file: %s" % excp)
 
     def cmdloop(self, opts):
         """Interactive mode worker function
@@ -578,8 +790,8 @@ class RdmcCommand(RdmcCommandBase):
             LOGGER.setLevel(logging.DEBUG)
             LERR.setLevel(logging.DEBUG)
 
-        for command, values in self.commands_dict.items():
-            self.commlist.append(values.ident["name"])
+        for command, values in self.manifest.items():
+            self.commlist.append(values["name"])
 
         for item in self.commlist:
             if item == "help":
@@ -1120,7 +1332,7 @@ class RdmcCommand(RdmcCommandBase):
             """Check for optional args"""
             (_, args) = argopts
             for arg in args:
-                if arg.startswith("-") or arg.startswith("--"):
+                if arg != "-" and (arg.startswith("-") or arg.startswith("--")):
                     try:
                         cmdinstance.parser.error(
                             "The option %s is not available for %s"
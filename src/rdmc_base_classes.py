@@ -154,6 +154,14 @@ class RdmcCommandBase(CommandBase):
         :param skipbuild: flag to only login and skip monolith build
         :type skipbuild: bool.
         """
+        with cmdinstance.rdmc.tracer.span("login_select_validation", "login"):
+            self._login_select_validation(cmdinstance, options, skipbuild)
+            if not skipbuild and cmdinstance.ident.get("requires") is None:
+                # a monolith restored from a command with required types is completed
+                cmdinstance.rdmc.prefetcher.complete(cmdinstance.rdmc.app)
+
+    def _login_select_validation(self, cmdinstance, options, skipbuild=False):
+        """Logs in and selects for login_select_validation"""
 
         logobj = cmdinstance.rdmc.load_command(
             cmdinstance.rdmc.search_commands("LoginCommand")
@@ -164,6 +172,7 @@ class RdmcCommandBase(CommandBase):
         inputline = list()
         client = None
         loggedin = False
+        requires = None if skipbuild else cmdinstance.ident.get("requires")
 
         if hasattr(options, "json") and cmdinstance.rdmc.config.format.lower() == "json":
             options.json = True
@@ -227,11 +236,13 @@ class RdmcCommandBase(CommandBase):
         if hasattr(options, "selector") and options.selector:
             if inputline:
                 inputline.extend(["--selector", options.selector])
-                logobj.loginfunction(inputline)
+                logobj.loginfunction(inputline, requires=requires)
                 loggedin = True
             else:
                 if getattr(options, "ref", False):
                     inputline.extend(["--refresh"])
+                if getattr(options, "revalidate", False):
+                    inputline.extend(["--revalidate"])
 
                 inputline.extend([options.selector])
                 selobj.selectfunction(inputline)
@@ -243,6 +254,8 @@ class RdmcCommandBase(CommandBase):
 
                 if hasattr(options, "ref") and options.ref:
                     inputline.extend(["--refresh"])
+                if getattr(options, "revalidate", False):
+                    inputline.extend(["--revalidate"])
 
                 if selector:
                     inputline.extend([selector])
@@ -264,7 +277,7 @@ class RdmcCommandBase(CommandBase):
             except Exception:
                 rdmc_helper.LOGGER.info("Local login initiated...\n")
         if not loggedin and not client:
-            logobj.loginfunction(inputline, skipbuild=skipbuild)
+            logobj.loginfunction(inputline, skipbuild=skipbuild, requires=requires)
 
     def logout_routine(self, cmdinstance, options):
 
@@ -553,4 +566,54 @@ class RdmcOptionParser(ArgumentParser):
             const=True,
             metavar="REDIRECT CONSOLE",
         )
+        self.add_argument(
+            "--daemon",
+            dest="daemon",
+            action="store_true",
+            help="Run as a persistent daemon serving commands forwarded over a local "
+            "socket. Sessions and the monolith are kept in memory between commands.",
+            default=False,
+        )
+        self.add_argument(
+            "--daemon-socket",
+            dest="daemon_socket",
+            default=None,
+            help="Use the provided path for the daemon socket "
+            "(default location: <cache-dir>/daemon.sock).",
+            metavar="PATH",
+        )
+        self.add_argument(
+            "--timings",
+            dest="timings",
+            action="store_true",
+            help="Print a summary of where time was spent (command loading, login/select, "
+            "HTTP requests, rendering) to stderr once the command completes.",
+            default=False,
+        )
+        self.add_argument(
+            "--trace-file",
+            dest="trace_file",
+            default=None,
+            help="Write the timing spans of the command to the provided file in Chrome "
+            "trace event format.",
+            metavar="FILE",
+        )
+        self.add_argument(
+            "--http-stats",
+            dest="http_stats",
+            action="store_true",
+            help="Print a report of the HTTP requests made by the command (latency "
+            "percentiles, bytes, cache hits, slowest and duplicate URIs) to stderr once the "
+            "command completes.",
+            default=False,
+        )
+        self.add_argument(
+            "--prefetch-workers",
+            dest="prefetch_workers",
+            type=int,
+            help="Maximum number of resources downloaded at the same time when the "
+            "instances of a selected type are loaded into the monolith. Use 1 to load them "
+            "one at a time (default: %(default)s).",
+            default=8,
+        )
         self.add_argument_group(globalgroup)
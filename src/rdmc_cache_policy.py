@@ -0,0 +1,294 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""Freshness policy of the monolith cache.
+
+The time every resource was downloaded is kept next to the cache. When a type or path is
+looked up in the monolith, resources older than the time to live (TTL) of their type or
+URI are marked modified and the library downloads them again, fresh resources are served
+from the cache. Rules come from the cachettl option of the configuration file followed by
+DEFAULT_TTLS, the first matching rule applies:
+
+    cachettl = Thermal.=0, /redfish/v1/UpdateService/FirmwareInventory/*=3600, *=never
+
+A rule starting with / is a URI pattern, * matches any resource, anything else is a type.
+The TTL is a number of seconds or never.
+"""
+
+# ---------Imports---------
+
+import os
+import json
+import time
+import fnmatch
+import hashlib
+import logging
+import functools
+
+try:
+    from rdmc_helper import ConfigurationFileError
+except ImportError:
+    from ilorest.rdmc_helper import ConfigurationFileError
+
+try:
+    from rdmc_prefetch import type_name
+except ImportError:
+    from ilorest.rdmc_prefetch import type_name
+
+try:
+    from rdmc_cache_store import write_atomic
+except ImportError:
+    from ilorest.rdmc_cache_store import write_atomic
+
+# ---------End of imports---------
+
+LOGGER = logging.getLogger(__name__)
+
+# seconds a cached resource stays fresh, None never expires
+DEFAULT_TTLS = (
+    ("Thermal.", 0),
+    ("Power.", 0),
+    ("ThermalMetrics.", 0),
+    ("PowerMetrics.", 0),
+    ("Sensor.", 0),
+    ("LogEntry.", 0),
+    ("Task.", 0),
+    ("ComputerSystem.", 60),
+    ("*", None),
+)
+
+NEVER = "never"
+
+
+def parse_rules(value):
+    """Parse the cachettl option, pattern=seconds pairs separated by commas
+
+    :param value: option value
+    :type value: str.
+    :returns: list of (pattern, ttl) tuples
+    """
+    rules = list()
+    for item in (value or "").split(","):
+        if not item.strip():
+            continue
+        pattern, _, ttl = item.rpartition("=")
+        pattern, ttl = pattern.strip(), ttl.strip().lower()
+        try:
+            if not pattern:
+                raise ValueError
+            rules.append((pattern, None if ttl == NEVER else int(ttl)))
+        except ValueError:
+            raise ConfigurationFileError(
+                "Invalid cachettl entry '%s', expected <type or URI>=<seconds|%s>."
+                % (item.strip(), NEVER)
+            )
+    return rules
+
+
+class CachePolicy(object):
+    """Decides which cached resources are downloaded again
+
+    :param rules: (pattern, ttl) tuples checked before DEFAULT_TTLS
+    :type rules: list.
+    """
+
+    def __init__(self, rules=None):
+        self.rules = list(rules or []) + list(DEFAULT_TTLS)
+        self._app = None
+
+    def configure(self, value):
+        """Use the rules of a cachettl option before DEFAULT_TTLS
+
+        :param value: option value
+        :type value: str.
+        """
+        self.rules = parse_rules(value) + list(DEFAULT_TTLS)
+
+    def ttl(self, path, maj_type):
+        """Seconds a resource stays fresh, None if it never expires
+
+        :param path: path of the resource
+        :type path: str.
+        :param maj_type: type of the resource
+        :type maj_type: str.
+        """
+        name = type_name(maj_type or "").lower()
+        for pattern, ttl in self.rules:
+            if pattern == "*":
+                return ttl
+            elif pattern.startswith("/"):
+                if fnmatch.fnmatch(path.lower(), pattern.lower()):
+                    return ttl
+            elif type_name(pattern).lower() == name:
+                return ttl
+        return None
+
+    def stale(self, monolith, path, member, now=None):
+        """True when the cached response of path is older than its TTL
+
+        :param monolith: monolith holding the response
+        :type monolith: RisMonolith.
+        :param path: path of the response
+        :type path: str.
+        :param member: monolith member of path
+        :type member: RisMonolithMemberv100.
+        """
+        if not member or member.modified:
+            return False
+        ttl = self.ttl(path, member.maj_type)
+        if ttl is None:
+            return False
+        fetched = fetched_times(monolith).get(path, 0)
+        return (now or time.time()) - fetched >= ttl
+
+    def expire(self, monolith, currtype=None, path=None):
+        """Mark the stale resources of currtype or path modified so they are downloaded
+        again
+
+        :param monolith: monolith to check
+        :type monolith: RisMonolith.
+        :param currtype: type looked up
+        :type currtype: str.
+        :param path: path looked up
+        :type path: str.
+        """
+        if monolith is None:
+            return
+        now = time.time()
+        if currtype and currtype != '"*"':
+            members = [
+                (mpath, member)
+                for mpath, member in monolith.paths.items()
+                if member.maj_type and currtype.lower() in member.maj_type.lower()
+            ]
+        elif path:
+            members = [(path, monolith.paths.get(path))]
+        else:
+            return
+        expired = [
+            mpath for mpath, member in members if self.stale(monolith, mpath, member, now)
+        ]
+        for mpath in expired:
+            monolith.paths[mpath].modified = True
+        if expired:
+            LOGGER.info("Cached data expired for: %s", ", ".join(expired))
+
+    def install(self, app):
+        """Record download times in the monolith of app, keep them with its cache and
+        expire stale resources before they are looked up
+
+        :param app: application instance
+        :type app: RmcApp.
+        """
+        if self._app is app:
+            return
+        self._app = app
+        record_downloads()
+        policy = self
+
+        original = app._updatemono
+
+        @functools.wraps(original)
+        def updatemono(currtype=None, path=None, crawl=False, path_refresh=False):
+            if not path_refresh:
+                policy.expire(app.monolith, currtype, path)
+            return original(
+                currtype=currtype, path=path, crawl=crawl, path_refresh=path_refresh
+            )
+
+        app._updatemono = updatemono
+
+        save = app.save
+
+        @functools.wraps(save)
+        def save_times():
+            save()
+            policy.save(app)
+
+        app.save = save_times
+
+        restore = app.restore
+
+        @functools.wraps(restore)
+        def restore_times(*args, **kwargs):
+            restore(*args, **kwargs)
+            policy.restore(app)
+
+        app.restore = restore_times
+
+    @staticmethod
+    def timesfile(app):
+        """File keeping the download times of the monolith of app, None without cache"""
+        if not app.cache or not app.redfishinst:
+            return None
+        shaobj = hashlib.new("SHA256")
+        shaobj.update(app.redfishinst.base_url.encode("utf-8"))
+        return os.path.join(app.cachedir, "%s.fetched" % shaobj.hexdigest())
+
+    def save(self, app):
+        """Write the download times of the cached monolith
+
+        :param app: application instance
+        :type app: RmcApp.
+        """
+        filename = self.timesfile(app)
+        if not filename or app.monolith is None or not os.path.isdir(app.cachedir):
+            return
+        times = fetched_times(app.monolith)
+        kept = {path: times[path] for path in app.monolith.paths if path in times}
+        write_atomic(filename, json.dumps(kept).encode("utf-8"))
+
+    def restore(self, app):
+        """Read the download times of the restored monolith, resources without a recorded
+        time are treated as stale
+
+        :param app: application instance
+        :type app: RmcApp.
+        """
+        filename = self.timesfile(app)
+        if not filename or app.monolith is None or not os.path.isfile(filename):
+            return
+        try:
+            with open(filename, "r") as timesfh:
+                fetched_times(app.monolith).update(json.load(timesfh))
+        except ValueError as excp:
+            LOGGER.warning("Unable to read cache download times %s", excp)
+
+
+def fetched_times(monolith):
+    """Download time of every path of monolith"""
+    if "fetched" not in vars(monolith):
+        monolith.fetched = dict()
+    return monolith.fetched
+
+
+def record_downloads():
+    """Record the time every response is added to a monolith, once per process"""
+    from redfish.ris.ris import RisMonolith
+
+    if getattr(RisMonolith.update_member, "records_downloads", False):
+        return
+    original = RisMonolith.update_member
+
+    @functools.wraps(original)
+    def update_member(self, member=None, resp=None, path=None, init=True):
+        original(self, member=member, resp=resp, path=path, init=init)
+        if resp is not None and path and not member:
+            fetched_times(self)[path] = time.time()
+
+    update_member.records_downloads = True
+    RisMonolith.update_member = update_member
@@ -0,0 +1,284 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""Per iLO and user cache directories for RDMC.
+
+Every (iLO URL, user) pair keeps its cache in a shard of its own, so ilorest processes
+working with different iLOs at the same time never write the same files and logging out of
+one iLO leaves the cache of the others alone:
+
+    <cachedir>/hosts/<shard>/           cache of one session
+    <cachedir>/locks/<shard>.lock       advisory lock of a shard
+    <cachedir>/current                  shard of the latest login
+
+A command without --url uses the shard of the latest login. A new login only logs out the
+session it replaces, the one of the same iLO and user, the sessions of other iLOs and users
+stay in their shards. Saving and logging out hold an exclusive lock on the shard and
+restoring a shared one, so a process never reads a cache another one is writing.
+"""
+
+# ---------Imports---------
+
+import os
+import errno
+import hashlib
+import logging
+import functools
+import contextlib
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+try:
+    from rdmc_cache_store import write_atomic
+except ImportError:
+    from ilorest.rdmc_cache_store import write_atomic
+
+# ---------End of imports---------
+
+LOGGER = logging.getLogger(__name__)
+
+CURRENT_NAME = "current"
+
+
+def shard_name(base_url, username=None):
+    """Name of the cache shard of a user on an iLO
+
+    :param base_url: URL of the iLO
+    :type base_url: str.
+    :param username: user logged in, None for session id and local logins
+    :type username: str.
+    """
+    shaobj = hashlib.new("SHA256")
+    shaobj.update(("%s\n%s" % (base_url, username or "")).encode("utf-8"))
+    return shaobj.hexdigest()[:32]
+
+
+class CacheShards(object):
+    """Points the cache of an application to the shard of its session and locks it"""
+
+    def __init__(self):
+        self.root = None
+        self.shard = None
+        self._app = None
+        self._held = dict()
+        self._lock = threading.Lock()
+
+    def attach(self, app, root):
+        """Use the shard of the latest login as cache of app, a session app is still
+        logged in with keeps its own
+
+        :param app: application instance
+        :type app: RmcApp.
+        :param root: configured cache directory
+        :type root: str.
+        """
+        if app.redfishinst and self.shard and self.root == root:
+            return
+        self.root = root
+        self.shard = self.pointer()
+        app.cachedir = self.shard_dir(self.shard)
+
+    def shard_dir(self, shard):
+        """Cache directory of a shard, an empty one when there is no shard
+
+        :param shard: shard name
+        :type shard: str.
+        """
+        return os.path.join(self.root, "hosts", shard or "none")
+
+    @property
+    def pointer_file(self):
+        """File naming the shard of the latest login"""
+        return os.path.join(self.root, CURRENT_NAME)
+
+    def pointer(self):
+        """Shard of the latest login, None once it was logged out of"""
+        try:
+            with open(self.pointer_file, "r") as pointerfh:
+                shard = pointerfh.read().strip()
+        except (IOError, OSError):
+            return None
+        return shard if os.path.isdir(self.shard_dir(shard)) else None
+
+    def point(self, shard):
+        """Make shard the shard of the latest login
+
+        :param shard: shard name
+        :type shard: str.
+        """
+        write_atomic(self.pointer_file, shard.encode("utf-8"))
+
+    def prune(self):
+        """Remove the pointer of the latest login once its shard was logged out of"""
+        if self.pointer() is None:
+            try:
+                os.remove(self.pointer_file)
+            except OSError:
+                pass
+
+    def detach(self, app):
+        """Save the session app is logged in with to its shard and stop using it, without
+        logging out of it
+
+        :param app: application instance
+        :type app: RmcApp.
+        """
+        if app.redfishinst:
+            app.save()
+            try:
+                # logging out joins every load thread, those of this monolith included
+                app.monolith.killthreads()
+            except Exception:
+                pass
+            app.redfishinst = None
+
+    @contextlib.contextmanager
+    def locked(self, shard, exclusive=True):
+        """Hold the advisory lock of a shard, reentrant within the process
+
+        :param shard: shard name
+        :type shard: str.
+        :param exclusive: lock for writing, shared for reading otherwise
+        :type exclusive: bool.
+        """
+        if self.root is None or not shard:
+            yield
+            return
+        lockdir = os.path.join(self.root, "locks")
+        if not os.path.isdir(lockdir):
+            try:
+                os.makedirs(lockdir)
+            except OSError as ex:
+                if ex.errno != errno.EEXIST:
+                    raise
+        lockfile = os.path.join(lockdir, "%s.lock" % (shard or "none"))
+        with self._lock:
+            held = self._held.get(lockfile)
+            if held:
+                self._held[lockfile] = (held[0], held[1] + 1)
+        if held:
+            try:
+                yield
+            finally:
+                self._release(lockfile)
+            return
+
+        lockfh = open(lockfile, "a+")
+        if fcntl:
+            fcntl.flock(lockfh.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        elif msvcrt:
+            lockfh.seek(0)
+            msvcrt.locking(lockfh.fileno(), msvcrt.LK_LOCK, 1)
+        with self._lock:
+            self._held[lockfile] = (lockfh, 1)
+        try:
+            yield
+        finally:
+            self._release(lockfile)
+
+    def _release(self, lockfile):
+        """Drop one hold of a lock, unlocking it with the last one"""
+        with self._lock:
+            lockfh, depth = self._held[lockfile]
+            if depth > 1:
+                self._held[lockfile] = (lockfh, depth - 1)
+                return
+            del self._held[lockfile]
+        if fcntl:
+            fcntl.flock(lockfh.fileno(), fcntl.LOCK_UN)
+        elif msvcrt:
+            lockfh.seek(0)
+            msvcrt.locking(lockfh.fileno(), msvcrt.LK_UNLCK, 1)
+        lockfh.close()
+
+    def install(self, app):
+        """Switch shards on login and lock the shard while its cache is used
+
+        :param app: application instance
+        :type app: RmcApp.
+        """
+        if self._app is app:
+            return
+        self._app = app
+        shards = self
+
+        login = app.login
+
+        @functools.wraps(login)
+        def shard_login(*args, **kwargs):
+            username = kwargs.get("username", args[0] if args else None)
+            base_url = kwargs.get("base_url", args[3] if len(args) > 3 else None)
+            if not app.cache or shards.root is None:
+                return login(*args, **kwargs)
+            shard = shard_name(base_url or "blobstore://.", username)
+            if shards.shard != shard:
+                # the session of another iLO or user stays valid in its own shard
+                shards.detach(app)
+                shards.shard = shard
+                app.cachedir = shards.shard_dir(shard)
+            if not app.redfishinst and os.path.isdir(app.cachedir):
+                try:
+                    # log out of the cached session on the iLO, not only of the cache
+                    app.restore()
+                except Exception as excp:
+                    LOGGER.info("Unable to restore the replaced session: %s", excp)
+            if app.redfishinst or os.path.isdir(app.cachedir):
+                # the session of this iLO and user is replaced
+                app.logout()
+            result = login(*args, **kwargs)
+            shards.point(shards.shard)
+            return result
+
+        app.login = shard_login
+
+        save = app.save
+
+        @functools.wraps(save)
+        def locked_save():
+            with shards.locked(shards.shard):
+                save()
+
+        app.save = locked_save
+
+        restore = app.restore
+
+        @functools.wraps(restore)
+        def locked_restore(*args, **kwargs):
+            with shards.locked(shards.shard, exclusive=False):
+                restore(*args, **kwargs)
+
+        app.restore = locked_restore
+
+        logout = app.logout
+
+        @functools.wraps(logout)
+        def shard_logout(*args, **kwargs):
+            if not app.cache or shards.root is None:
+                return logout(*args, **kwargs)
+            with shards.locked(shards.shard):
+                logout(*args, **kwargs)
+            shards.prune()
+
+        app.logout = shard_logout
@@ -0,0 +1,325 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""Incremental on-disk store for the monolith cache.
+
+The library saves the whole monolith as one JSON file after every command and parses all
+of it back before the next one. With the store the library file only keeps the session,
+the selection, the type tables and the service root. Every other response is kept in a
+blob of its own, listed in an index with the type, ETag, patches and modified flag of its
+path:
+
+    <cachedir>/<sha256 of the iLO URL>.store/index.json
+    <cachedir>/<sha256 of the iLO URL>.store/<sha256 of the path>.json[.gz]
+
+Restoring the cache reads the index only, the blob of a path is read the first time a
+command uses its response. Saving writes the blobs of responses that were downloaded or
+changed by the command and rewrites the index when it changed, large blobs are compressed.
+"""
+
+# ---------Imports---------
+
+import os
+import gzip
+import json
+import hashlib
+import logging
+import functools
+
+from redfish.rest.containers import RestRequest, StaticRestResponse
+from redfish.ris.ris import RisMonolithMemberv100
+from redfish.ris.sharedtypes import JSONEncoder
+
+# ---------End of imports---------
+
+LOGGER = logging.getLogger(__name__)
+
+INDEX_NAME = "index.json"
+STORE_VERSION = 1
+# blobs larger than this many bytes are written compressed
+COMPRESS_SIZE = 4096
+
+
+def cache_name(base_url):
+    """Name the library gives the cache file of an iLO
+
+    :param base_url: URL of the iLO
+    :type base_url: str.
+    """
+    shaobj = hashlib.new("SHA256")
+    shaobj.update(base_url.encode("utf-8"))
+    return shaobj.hexdigest()
+
+
+def write_atomic(filename, data):
+    """Write data to a temporary file and rename it over filename, readers see the old or
+    the new file but never a partial one
+
+    :param filename: file to write
+    :type filename: str.
+    :param data: file content
+    :type data: bytes.
+    """
+    tmpname = "%s.%s.tmp" % (filename, os.getpid())
+    with open(tmpname, "wb") as tmpfh:
+        tmpfh.write(data)
+    os.replace(tmpname, filename)
+
+
+class LazyMember(RisMonolithMemberv100):
+    """Monolith member whose response is read from the store when it is first used
+
+    :param store: store holding the response
+    :type store: CacheStore.
+    :param storedir: directory of the store
+    :type storedir: str.
+    :param path: path of the member
+    :type path: str.
+    :param entry: index entry of path
+    :type entry: dict.
+    :param isredfish: flag if the response is redfish or not
+    :type isredfish: bool.
+    """
+
+    def __init__(self, store, storedir, path, entry, isredfish=True):
+        super(LazyMember, self).__init__(None, isredfish)
+        self.popdefs(entry.get("majtype"), path, entry.get("etag"))
+        self.modified = entry.get("modified", False)
+        self._patches = entry.get("patches", [])
+        self._store = store
+        self._storedir = storedir
+        self._entry = entry
+        self._stored = None
+
+    @property
+    def pending(self):
+        """True while the response was not read from the store"""
+        return self._resp is None and self._entry.get("blob") is not None
+
+    @property
+    def resp(self):
+        """Get the entire response of the monolith member, read from the store once"""
+        if self.pending:
+            self._resp = self._store.read_blob(self._storedir, self.defpath, self._entry)
+            self._stored = (self._resp, self._resp.read if self._resp else None)
+        return self._resp
+
+    @property
+    def type(self):
+        """Get type of the monolith member's response"""
+        if self.pending:
+            return self._entry.get("type")
+        return super(LazyMember, self).type
+
+    @property
+    def path(self):
+        """Get path of the monolith member's response"""
+        if self.pending:
+            return self.defpath
+        return super(LazyMember, self).path
+
+    @property
+    def etag(self):
+        """Get the etag of the response"""
+        if self.pending:
+            return self.defetag
+        return super(LazyMember, self).etag
+
+    @property
+    def stored(self):
+        """True when the response is still the one of the store"""
+        if self.pending:
+            return True
+        resp, read = self._stored or (None, None)
+        return resp is not None and self._resp is resp and self._resp.read is read
+
+
+class CacheStore(object):
+    """Keeps the monolith of the cache in an index and per path blobs"""
+
+    def __init__(self):
+        self._app = None
+
+    def install(self, app):
+        """Save and restore the cached monolith of app through the store
+
+        :param app: application instance
+        :type app: RmcApp.
+        """
+        if self._app is app:
+            return
+        self._app = app
+        store = self
+        cache_rmc = app._cm.cache_rmc
+        uncache_rmc = app._cm.uncache_rmc
+
+        @functools.wraps(cache_rmc)
+        def cache_monolith():
+            monolith = app.monolith
+            if not app.cache or not app.redfishinst or monolith is None:
+                return cache_rmc()
+            store.save(app)
+            # the library file keeps the service root, everything else is in the store
+            paths = monolith.paths
+            root = app.redfishinst.default_prefix
+            monolith.paths = {root: paths[root]} if root in paths else dict()
+            try:
+                cache_rmc()
+            finally:
+                monolith.paths = paths
+
+        @functools.wraps(uncache_rmc)
+        def uncache_monolith(creds=None, enc=False):
+            uncache_rmc(creds=creds, enc=enc)
+            if app.monolith is not None and app.redfishinst:
+                store.load(app)
+
+        app._cm.cache_rmc = cache_monolith
+        app._cm.uncache_rmc = uncache_monolith
+
+    @staticmethod
+    def storedir(app):
+        """Directory of the store of the iLO app is logged in to
+
+        :param app: application instance
+        :type app: RmcApp.
+        """
+        return os.path.join(
+            app.cachedir, "%s.store" % cache_name(app.redfishinst.base_url)
+        )
+
+    @staticmethod
+    def read_index(storedir):
+        """Entries of the index of a store, empty when there is no usable index
+
+        :param storedir: directory of the store
+        :type storedir: str.
+        """
+        indexfn = os.path.join(storedir, INDEX_NAME)
+        if not os.path.isfile(indexfn):
+            return dict()
+        try:
+            with open(indexfn, "r") as indexfh:
+                index = json.load(indexfh)
+        except ValueError as excp:
+            LOGGER.warning("Unable to read cache index %s", excp)
+            return dict()
+        if index.get("version") != STORE_VERSION:
+            return dict()
+        return index.get("paths", dict())
+
+    def load(self, app):
+        """Add the paths of the store to the monolith restored by the library
+
+        :param app: application instance
+        :type app: RmcApp.
+        """
+        storedir = self.storedir(app)
+        entries = self.read_index(storedir)
+        monolith = app.monolith
+        for path, entry in entries.items():
+            if path in monolith.paths:
+                continue
+            monolith.paths[path] = LazyMember(
+                self, storedir, path, entry, monolith.is_redfish
+            )
+        LOGGER.debug("Restored %s cached paths from %s", len(entries), storedir)
+
+    def read_blob(self, storedir, path, entry):
+        """Response of path kept in the store, None when its blob is unreadable
+
+        :param storedir: directory of the store
+        :type storedir: str.
+        :param path: path of the response
+        :type path: str.
+        :param entry: index entry of path
+        :type entry: dict.
+        """
+        blobfn = os.path.join(storedir, entry["blob"])
+        try:
+            with open(blobfn, "rb") as blobfh:
+                data = blobfh.read()
+            if blobfn.endswith(".gz"):
+                data = gzip.decompress(data)
+            blob = json.loads(data.decode("utf-8"))
+        except (IOError, OSError, ValueError) as excp:
+            LOGGER.warning("Unable to read cached response of %s: %s", path, excp)
+            return None
+        blob["restreq"] = RestRequest(method="GET", path=path)
+        return StaticRestResponse(**blob)
+
+    def save(self, app):
+        """Write the responses that changed since the store was read and the index
+
+        :param app: application instance
+        :type app: RmcApp.
+        """
+        storedir = self.storedir(app)
+        if not os.path.isdir(storedir):
+            os.makedirs(storedir)
+        previous = self.read_index(storedir)
+        entries = dict()
+        written = 0
+        for path, member in app.monolith.paths.items():
+            entry = dict(
+                type=member.type,
+                majtype=member.maj_type,
+                etag=member.etag,
+                modified=member.modified,
+                patches=member.patches,
+                blob=None,
+            )
+            if isinstance(member, LazyMember) and member.stored:
+                entry["blob"] = member._entry.get("blob")
+            elif member.resp is not None:
+                entry["blob"] = self.write_blob(storedir, path, member.resp)
+                written += 1
+            entries[path] = entry
+
+        kept = set(entry["blob"] for entry in entries.values())
+        for entry in previous.values():
+            if entry.get("blob") and entry["blob"] not in kept:
+                try:
+                    os.remove(os.path.join(storedir, entry["blob"]))
+                except OSError:
+                    pass
+
+        data = json.dumps(dict(version=STORE_VERSION, paths=entries), cls=JSONEncoder)
+        if written or json.loads(data)["paths"] != previous:
+            write_atomic(os.path.join(storedir, INDEX_NAME), data.encode("utf-8"))
+        LOGGER.debug("Cached %s paths, %s responses written", len(entries), written)
+
+    @staticmethod
+    def write_blob(storedir, path, resp):
+        """Write the response of path and return the name of its blob
+
+        :param storedir: directory of the store
+        :type storedir: str.
+        :param path: path of the response
+        :type path: str.
+        :param resp: response to keep
+        :type resp: RestResponse.
+        """
+        data = json.dumps(
+            dict(Content=resp.read, Status=resp.status, Headers=resp.getheaders())
+        ).encode("utf-8")
+        blob = "%s.json" % hashlib.sha256(path.encode("utf-8")).hexdigest()
+        if len(data) > COMPRESS_SIZE:
+            data = gzip.compress(data, compresslevel=1)
+            blob += ".gz"
+        write_atomic(os.path.join(storedir, blob), data)
+        return blob
@@ -0,0 +1,291 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""Persistent daemon mode for RDMC and its local socket client.
+
+The daemon (ilorest --daemon) keeps one RdmcCommand, its RmcApp, logged in sessions and
+monolith in memory and serves command lines received over a Unix domain socket. The client
+forwards its argv to the daemon and streams stdout/stderr and the return code back:
+
+    python rdmc_daemon.py rawget /redfish/v1
+
+If no daemon is listening the client runs the command in process instead. This module only
+imports the standard library at load time so the client stays cheap to start.
+"""
+
+# ---------Imports---------
+
+import errno
+import json
+import logging
+import os
+import signal
+import socket
+import sys
+
+try:
+    import socketserver
+except ImportError:
+    import SocketServer as socketserver
+
+# ---------End of imports---------
+
+SOCKET_ENV = "ILOREST_DAEMON_SOCKET"
+DAEMON_SUPPORTED = hasattr(socket, "AF_UNIX")
+
+
+def default_socket_path(config_dir=None):
+    """Location of the daemon socket. The ILOREST_DAEMON_SOCKET environment variable takes
+    precedence over the cache directory.
+
+    :param config_dir: iLOrest configuration/cache directory
+    :type config_dir: str.
+    :returns: the socket path
+    """
+    if os.environ.get(SOCKET_ENV):
+        return os.environ[SOCKET_ENV]
+    if not config_dir:
+        config_dir = os.path.join(os.path.expanduser("~"), ".iLOrest")
+    return os.path.join(config_dir, "daemon.sock")
+
+
+def client_socket_path(argv):
+    """Daemon socket a command line is addressed to, picked from its --daemon-socket and
+    --cache-dir options the way the daemon picks its own
+
+    :param argv: command line
+    :type argv: list.
+    :returns: the socket path
+    """
+    found = dict()
+    for pos, arg in enumerate(argv):
+        for opt in ("--cache-dir", "--daemon-socket"):
+            if arg == opt and pos + 1 < len(argv):
+                found[opt] = argv[pos + 1]
+            elif arg.startswith(opt + "="):
+                found[opt] = arg[len(opt) + 1 :]
+    return found.get("--daemon-socket") or default_socket_path(found.get("--cache-dir"))
+
+
+def listening(path):
+    """True when a daemon accepts connections on the socket path
+
+    :param path: daemon socket path
+    :type path: str.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except (IOError, OSError):
+        return False
+    finally:
+        sock.close()
+    return True
+
+
+class _SocketStream(object):
+    """File like object forwarding writes to the client as stream messages"""
+
+    encoding = "utf-8"
+
+    def __init__(self, wfile, stream):
+        self._wfile = wfile
+        self._stream = stream
+
+    def write(self, data):
+        if isinstance(data, bytes):
+            data = data.decode(self.encoding, "replace")
+        if data:
+            send_message(self._wfile, {self._stream: data})
+        return len(data)
+
+    def flush(self):
+        self._wfile.flush()
+
+    def isatty(self):
+        return False
+
+    def fileno(self):
+        raise IOError("Daemon output stream has no file descriptor")
+
+
+def send_message(wfile, message):
+    """Write a single protocol message (one JSON document per line)
+
+    :param wfile: socket file to write to
+    :type wfile: file.
+    :param message: message to send
+    :type message: dict.
+    """
+    wfile.write(json.dumps(message).encode("utf-8") + b"\n")
+    wfile.flush()
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Handles one forwarded command line"""
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline().decode("utf-8"))
+        except ValueError:
+            return
+        retcode = self.server.execute(
+            request.get("argv", []), request.get("cwd"), self.wfile
+        )
+        try:
+            send_message(self.wfile, {"retcode": retcode})
+        except (IOError, OSError):
+            pass
+
+
+class RdmcDaemon(getattr(socketserver, "UnixStreamServer", socketserver.BaseServer)):
+    """Unix socket server running forwarded command lines on a single warm RdmcCommand.
+    Requests are served one at a time as the command state is shared."""
+
+    def __init__(self, rdmc, path):
+        self.rdmc = rdmc
+        self.path = path
+        if os.path.exists(path):
+            if listening(path):
+                raise socket.error(
+                    errno.EADDRINUSE, "A daemon is already listening on %s" % path
+                )
+            # left behind by a daemon that did not exit cleanly
+            os.unlink(path)
+        # created owner only, a chmod after bind() leaves other users a moment to connect
+        umask = os.umask(0o177)
+        try:
+            socketserver.UnixStreamServer.__init__(self, path, _RequestHandler)
+        finally:
+            os.umask(umask)
+
+    def execute(self, argv, cwd, wfile):
+        """Run one command line with stdout/stderr forwarded to the client
+
+        :param argv: command line
+        :type argv: list.
+        :param cwd: working directory of the client
+        :type cwd: str.
+        :param wfile: socket file of the client
+        :type wfile: file.
+        :returns: the command return code
+        """
+        streams = (sys.stdout, sys.stderr)
+        prevdir = os.getcwd()
+        out, err = _SocketStream(wfile, "stdout"), _SocketStream(wfile, "stderr")
+        handlers = [
+            (handler, handler.stream)
+            for handler in logging.getLogger().handlers
+            if isinstance(handler, logging.StreamHandler) and handler.stream in streams
+        ]
+        sys.stdout, sys.stderr = out, err
+        for handler, stream in handlers:
+            handler.setStream(out if stream is streams[0] else err)
+        try:
+            if cwd and os.path.isdir(cwd):
+                os.chdir(cwd)
+            self.rdmc.retcode = self.rdmc.run(list(argv))
+        except SystemExit as excp:
+            self.rdmc.retcode = excp.code if isinstance(excp.code, int) else 0
+        except Exception as excp:
+            self.rdmc.handle_exceptions(excp)
+        finally:
+            if not self.rdmc.opts or self.rdmc.opts.verbose:
+                self.rdmc.ui.printer("ILOREST return code: %s\n" % self.rdmc.retcode)
+            sys.stdout, sys.stderr = streams
+            for handler, stream in handlers:
+                handler.setStream(stream)
+            os.chdir(prevdir)
+
+        return self.rdmc.retcode
+
+    def serve(self):
+        """Serve until interrupted, then persist the cache and remove the socket
+
+        :returns: return code
+        """
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        sys.stdout.write("Listening on %s\n" % self.path)
+        sys.stdout.flush()
+        try:
+            self.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.server_close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+            if self.rdmc.app.cache:
+                self.rdmc.app.save()
+
+        return 0
+
+
+def run_client(argv, path=None):
+    """Forward a command line to a running daemon
+
+    :param argv: command line
+    :type argv: list.
+    :param path: daemon socket path
+    :type path: str.
+    :returns: the command return code, None if no daemon is reachable
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path or default_socket_path())
+    except (IOError, OSError):
+        sock.close()
+        return None
+
+    # ReturnCodes.GENERAL_ERROR unless the daemon reports the command return code
+    retcode = 255
+    try:
+        request = {"argv": argv, "cwd": os.getcwd()}
+        sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        for line in sock.makefile("rb"):
+            message = json.loads(line.decode("utf-8"))
+            if "stdout" in message:
+                sys.stdout.write(message["stdout"])
+                sys.stdout.flush()
+            elif "stderr" in message:
+                sys.stderr.write(message["stderr"])
+                sys.stderr.flush()
+            elif "retcode" in message:
+                retcode = message["retcode"]
+    finally:
+        sock.close()
+
+    return retcode
+
+
+def main():
+    """Client entry point: forward to the daemon or fall back to an in process run"""
+    argv = sys.argv[1:]
+    retcode = None
+    if argv and DAEMON_SUPPORTED:
+        retcode = run_client(argv, client_socket_path(argv))
+    if retcode is None:
+        try:
+            import rdmc
+        except ImportError:
+            from ilorest import rdmc
+        rdmc.ilorestcommand()
+    sys.exit(retcode)
+
+
+if __name__ == "__main__":
+    main()
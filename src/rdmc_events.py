@@ -0,0 +1,154 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""Server-sent event stream of the Redfish EventService.
+
+A service listing a ServerSentEventUri on its EventService pushes every event it raises
+over one long lived GET of that URI, as text/event-stream:
+
+    id: 42
+    data: {"@odata.type": "#Event.v1_0_0.Event", "Events": [...]}
+
+EventStream reads the stream on a background thread with the session of the logged in
+client and wakes up whoever waits for the next event. Commands use it to react to changes
+as they happen instead of polling the service.
+"""
+
+# ---------Imports---------
+
+import json
+import logging
+import threading
+
+import urllib3
+
+# ---------End of imports---------
+
+LOGGER = logging.getLogger(__name__)
+
+# seconds to connect to the stream
+CONNECT_TIMEOUT = 30
+# seconds without any data, keepalive comments included, before the stream is given up
+READ_TIMEOUT = 300
+
+
+class EventStream(object):
+    """Events read from an open text/event-stream response
+
+    :param response: streaming response of the ServerSentEventUri
+    :type response: urllib3.response.HTTPResponse.
+    """
+
+    def __init__(self, response):
+        self.alive = True
+        self.received = 0
+        self.last = None
+        self._response = response
+        self._arrived = threading.Event()
+        self._thread = threading.Thread(target=self._read)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _read(self):
+        """Parse the stream until it ends, one event per blank line terminated block"""
+        data = list()
+        try:
+            while True:
+                line = self._response.readline()
+                if not line:
+                    break
+                line = line.decode("utf-8", "replace").rstrip("\r\n")
+                if line.startswith("data:"):
+                    data.append(line[5:].lstrip())
+                elif not line and data:
+                    try:
+                        self.last = json.loads("\n".join(data))
+                    except ValueError:
+                        self.last = "\n".join(data)
+                    data = list()
+                    self.received += 1
+                    self._arrived.set()
+        except (urllib3.exceptions.HTTPError, IOError, OSError, ValueError) as excp:
+            LOGGER.info("Event stream failed: %s", excp)
+        finally:
+            LOGGER.info("Event stream closed after %s events.", self.received)
+            self.alive = False
+            self._arrived.set()
+
+    def wait(self, timeout):
+        """Wait until an event arrives or the stream ends, at most timeout seconds
+
+        :param timeout: seconds to wait
+        :type timeout: float.
+        :returns: True when events arrived or the stream ended since the last wait
+        """
+        arrived = self._arrived.wait(timeout)
+        self._arrived.clear()
+        return arrived
+
+    def close(self):
+        """Stop reading the stream"""
+        try:
+            self._response.close()
+        except (urllib3.exceptions.HTTPError, IOError, OSError):
+            pass
+
+
+def open_event_stream(app):
+    """EventStream of the service app is logged in to, None when the service does not
+    offer server-sent events or the stream cannot be opened
+
+    :param app: application instance
+    :type app: RmcApp.
+    """
+    client = app.current_client
+    connection = getattr(client, "connection", None)
+    if not getattr(connection, "_conn", None) or not client.base_url.startswith("http"):
+        # the local interface has no event service
+        return None
+    root = app.get_handler(client.default_prefix, silent=True, uncache=True)
+    if root.status != 200:
+        return None
+    link = root.dict.get("EventService", {}).get("@odata.id")
+    if not link:
+        return None
+    service = app.get_handler(link, silent=True, uncache=True)
+    if service.status != 200 or not service.dict.get("ServiceEnabled", True):
+        return None
+    uri = service.dict.get("ServerSentEventUri")
+    if not uri:
+        return None
+
+    headers = client._get_req_headers({"Accept": "text/event-stream"})
+    try:
+        response = connection._conn(
+            "GET",
+            client.base_url + uri,
+            headers=headers,
+            preload_content=False,
+            retries=False,
+            timeout=urllib3.util.Timeout(connect=CONNECT_TIMEOUT, read=READ_TIMEOUT),
+        )
+    except urllib3.exceptions.HTTPError as excp:
+        LOGGER.info("Unable to open the event stream %s: %s", uri, excp)
+        return None
+    if response.status != 200:
+        LOGGER.info("Event stream %s answered %s.", uri, response.status)
+        response.release_conn()
+        return None
+    LOGGER.info("Reading server-sent events from %s", uri)
+    return EventStream(response)
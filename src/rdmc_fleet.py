@@ -0,0 +1,531 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""In process multi server execution for RDMC.
+
+FleetExecutor runs one command line per server on a bounded pool of worker threads. Every
+server gets its own RdmcCommand with its own RmcApp, session, monolith and command instances,
+while the options, configuration and command manifest of the running RdmcCommand are reused,
+so no interpreter is started per server. The type definitions the redfish library keeps for
+the whole process are kept per worker thread. Anything a worker prints goes to the log file of
+its server as it is written.
+"""
+
+# ---------Imports---------
+
+import os
+import sys
+import copy
+import json
+import time
+import shlex
+import logging
+import datetime
+import threading
+import collections
+
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from rdmc_helper import (
+        ReturnCodes,
+        Encryption,
+        InvalidCommandLineError,
+        InvalidFileInputError,
+        InvalidMSCfileInputError,
+    )
+except ImportError:
+    from ilorest.rdmc_helper import (
+        ReturnCodes,
+        Encryption,
+        InvalidCommandLineError,
+        InvalidFileInputError,
+        InvalidMSCfileInputError,
+    )
+
+# ---------End of imports---------
+
+DEFAULT_WORKERS = 16
+SEPARATOR = "-x+x-" * 16
+
+FleetJob = collections.namedtuple("FleetJob", ["host", "argv", "logfile"])
+FleetResult = collections.namedtuple(
+    "FleetResult", ["host", "returncode", "elapsed", "logfile", "attempts", "timedout"]
+)
+
+
+def host_filename(host):
+    """Log file name of a server URL, without scheme
+
+    :param host: server URL or hostname
+    :type host: str.
+    """
+    return host.split("//")[-1]
+
+
+def read_inventory(filename, user=None, password=None):
+    """Read a multiple server file, one server per line in the format
+    --url <iLO url/hostname> -u admin -p password. A line holding only a hostname uses
+    the user and password given. Empty lines and lines starting with # are skipped.
+
+    :param filename: multiple server file
+    :type filename: str.
+    :param user: username for lines without -u
+    :type user: str.
+    :param password: password for lines without -p
+    :type password: str.
+    :returns: list of the login arguments of every server
+    """
+    if filename.startswith(('"', "'")) and filename[0] == filename[-1]:
+        filename = filename[1:-1]
+
+    if not os.path.isfile(filename):
+        raise InvalidFileInputError("File '%s' doesn't exist." % filename)
+
+    servers = list()
+    with open(filename, "r") as inventory:
+        for line in inventory:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+
+            args = shlex.split(line, posix=False)
+            if len(args) == 1:
+                args = ["--url", args[0]]
+            if user and "-u" not in args and "--user" not in args:
+                args.extend(["-u", user])
+            if password and "-p" not in args and "--password" not in args:
+                args.extend(["-p", password])
+
+            if "--url" not in args or len(args) < 5:
+                raise InvalidMSCfileInputError(
+                    "Incomplete data in input file %s: %s" % (filename, line)
+                )
+            servers.append(args)
+
+    if not servers:
+        raise InvalidMSCfileInputError("No servers found in input file %s" % filename)
+
+    return servers
+
+
+def output_directory(outputdir=None, suffix="MSClogs"):
+    """Create the directory of a multiple server run
+
+    :param outputdir: parent directory, the working directory by default
+    :type outputdir: str.
+    :param suffix: name appended to the time stamp of the new directory
+    :type suffix: str.
+    :returns: tuple of the parent directory and the new directory
+    """
+    if outputdir:
+        if outputdir.endswith(('"', "'")) and outputdir.startswith(('"', "'")):
+            outputdir = outputdir[1:-1]
+
+        if not os.path.isdir(outputdir):
+            raise InvalidCommandLineError("The given output folder path does not exist.")
+
+        dirpath = outputdir
+    else:
+        dirpath = os.getcwd()
+
+    dirname = "%s_%s" % (datetime.datetime.now().strftime("%Y-%m-%d-%H-%M-%S"), suffix)
+    createdir = os.path.join(dirpath, dirname)
+    os.mkdir(createdir)
+
+    return dirpath, createdir
+
+
+class ThreadStream(object):
+    """sys.stdout/sys.stderr replacement, threads that bound a stream write to it and every
+    other thread writes to the stream that was replaced"""
+
+    def __init__(self, default):
+        self.default = default
+        self._local = threading.local()
+
+    @property
+    def current(self):
+        """Stream of the calling thread"""
+        return getattr(self._local, "stream", None) or self.default
+
+    def bind(self, stream):
+        """Send the output of the calling thread to stream, None to unbind"""
+        self._local.stream = stream
+
+    def write(self, data):
+        return self.current.write(data)
+
+    def flush(self):
+        self.current.flush()
+
+    def isatty(self):
+        return self.current is self.default and self.default.isatty()
+
+    def __getattr__(self, name):
+        return getattr(self.current, name)
+
+
+class DetachableStream(object):
+    """Log file of one attempt, writes are dropped once a timed out attempt is detached"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, data):
+        stream = self.stream
+        return stream.write(data) if stream else len(data)
+
+    def flush(self):
+        stream = self.stream
+        if stream:
+            stream.flush()
+
+    def isatty(self):
+        return False
+
+    def detach(self):
+        """Stop writing to the log file"""
+        self.stream = None
+
+
+class ThreadTypepaths(object):
+    """Typepathforval.typepath replacement. The validation of the redfish library reads
+    the type definitions of the RmcApp created last in the process from that class
+    attribute, so every thread that created an RmcApp reads its own and every other thread
+    reads the one created last.
+
+    :param typepath: type definitions of the RmcApp created last
+    :type typepath: Typesandpathdefines.
+    """
+
+    def __init__(self, typepath):
+        self.last = typepath
+        self._local = threading.local()
+
+    @property
+    def current(self):
+        """Type definitions of the calling thread"""
+        return getattr(self._local, "typepath", None) or self.last
+
+    def bind(self, typepath):
+        """Use typepath for the calling thread, the RmcApp of the thread was created"""
+        if typepath:
+            self._local.typepath = self.last = typepath
+
+    def __bool__(self):
+        return bool(self.current)
+
+    def __getattr__(self, name):
+        return getattr(self.current, name)
+
+
+def isolate_typepaths():
+    """Keep the type definitions read by the redfish validation per thread, see
+    ThreadTypepaths. Without it an RmcApp created by one worker replaces the definitions
+    another worker is validating with."""
+    try:
+        from redfish.ris.validation import Typepathforval
+    except ImportError:
+        return
+    if isinstance(Typepathforval.typepath, ThreadTypepaths):
+        return
+    typepaths = ThreadTypepaths(Typepathforval.typepath)
+
+    def bind(cls, typepathobj):
+        typepaths.bind(typepathobj)
+
+    Typepathforval.__new__ = staticmethod(bind)
+    Typepathforval.typepath = typepaths
+
+
+class FleetExecutor(object):
+    """Runs command lines against many servers concurrently
+
+    :param rdmc: the running RdmcCommand, its options and configuration are shared
+    :type rdmc: RdmcCommand.
+    :param workers: maximum number of servers handled at the same time
+    :type workers: int.
+    :param prepare: called with every new worker RdmcCommand before its command runs
+    :type prepare: function.
+    :param on_result: called with each FleetResult as soon as its server finishes, calls are
+                      serialized
+    :type on_result: function.
+    :param timeout: seconds an attempt may take before the server is given up on
+    :type timeout: float.
+    :param retries: number of times a failed or timed out server is tried again
+    :type retries: int.
+    :param retrydelay: seconds before the first retry, doubled for every further retry
+    :type retrydelay: float.
+    """
+
+    def __init__(
+        self,
+        rdmc,
+        workers=DEFAULT_WORKERS,
+        prepare=None,
+        on_result=None,
+        timeout=None,
+        retries=0,
+        retrydelay=5,
+    ):
+        self.rdmc = rdmc
+        self.workers = max(1, workers or DEFAULT_WORKERS)
+        self.prepare = prepare
+        self.on_result = on_result
+        self.timeout = timeout
+        self.retries = max(0, retries or 0)
+        self.retrydelay = retrydelay
+        self._lock = threading.Lock()
+        # held by every running attempt, timed out ones included, so no more than workers
+        # servers are ever handled at the same time
+        self._slots = threading.BoundedSemaphore(self.workers)
+
+    def worker(self):
+        """New RdmcCommand for one server
+
+        :returns: RdmcCommand with its own RmcApp and UI
+        """
+        parent = self.rdmc
+        rdmc = parent.__class__(
+            name=parent.name,
+            usage=parent.parser.usage,
+            summary=parent.summary,
+            aliases=parent.aliases,
+            argparser=parent.parser,
+        )
+        rdmc.opts = copy.copy(parent.opts)
+        rdmc.opts.nocache = True
+        rdmc.opts.nologo = True
+        rdmc.config = parent.config
+        rdmc.encoding = parent.encoding
+        if parent.encoding:
+            rdmc.app.set_encode_funct(Encryption.encode_credentials)
+            rdmc.app.set_decode_funct(Encryption.decode_credentials)
+        rdmc.app.typepath.adminpriv = parent.app.typepath.adminpriv
+        rdmc.app.verbose = rdmc.ui.verbosity = rdmc.opts.verbose
+        if self.prepare:
+            self.prepare(rdmc)
+        return rdmc
+
+    def run(self, jobs):
+        """Run every job, at most workers at a time
+
+        :param jobs: FleetJob list
+        :type jobs: list.
+        :returns: FleetResult list in job order
+        """
+        isolate_typepaths()
+        streams = (sys.stdout, sys.stderr)
+        out, err = ThreadStream(sys.stdout), ThreadStream(sys.stderr)
+        handlers = [
+            (handler, handler.stream)
+            for handler in logging.getLogger().handlers
+            if isinstance(handler, logging.StreamHandler) and handler.stream in streams
+        ]
+        sys.stdout, sys.stderr = out, err
+        for handler, stream in handlers:
+            handler.setStream(out if stream is streams[0] else err)
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                futures = [pool.submit(self.run_job, job, (out, err)) for job in jobs]
+                return [future.result() for future in futures]
+        finally:
+            sys.stdout, sys.stderr = streams
+            for handler, stream in handlers:
+                handler.setStream(stream)
+
+    def run_job(self, job, streams):
+        """Run one job with the output of this thread sent to its log file, retrying
+        failures and timeouts"""
+        start = time.time()
+        attempts = 0
+        with open(job.logfile, "w") as logfile:
+            while True:
+                attempts += 1
+                if attempts > 1:
+                    time.sleep(self.retrydelay * 2 ** (attempts - 2))
+                    logfile.write("\nAttempt %s of %s:\n" % (attempts, self.retries + 1))
+                returncode, running = self.attempt(job, streams, logfile)
+                timedout = running is not None
+                if not returncode or attempts > self.retries:
+                    break
+                if running:
+                    # a new attempt would log in while the old one still uses the server
+                    running.join(self.timeout)
+                    if running.is_alive():
+                        logfile.write("ERROR: The timed out attempt is still running.\n")
+                        break
+
+        result = FleetResult(
+            job.host, returncode, time.time() - start, job.logfile, attempts, timedout
+        )
+        if self.on_result:
+            with self._lock:
+                self.on_result(result)
+        return result
+
+    def attempt(self, job, streams, logfile):
+        """Run the command line of a job once
+
+        :returns: tuple of the return code and the thread of the attempt when it timed
+                  out and is still running, None otherwise
+        """
+        output = DetachableStream(logfile)
+        outcome = {"returncode": ReturnCodes.GENERAL_ERROR}
+        self._slots.acquire()
+
+        def target():
+            """Run the command in a new RdmcCommand"""
+            rdmc = None
+            for stream in streams:
+                stream.bind(output)
+            try:
+                rdmc = self.worker()
+                outcome["returncode"] = rdmc.run_commandline(list(job.argv))
+            except SystemExit as excp:
+                outcome["returncode"] = (
+                    excp.code if isinstance(excp.code, int) else ReturnCodes.SUCCESS
+                )
+            except Exception as excp:
+                output.write("ERROR: %s\n" % excp)
+            finally:
+                if rdmc:
+                    try:
+                        rdmc.app.logout()
+                    except Exception:
+                        pass
+                for stream in streams:
+                    stream.bind(None)
+                self._slots.release()
+
+        if not self.timeout:
+            target()
+            return outcome["returncode"], None
+
+        # threads can not be stopped, a timed out attempt is left to finish on its own
+        thread = threading.Thread(target=target, name="fleet-%s" % job.host)
+        thread.daemon = True
+        thread.start()
+        thread.join(self.timeout)
+        if thread.is_alive():
+            output.detach()
+            logfile.write("ERROR: Timed out after %s seconds.\n" % self.timeout)
+            return ReturnCodes.V1_SERVER_DOWN_OR_UNREACHABLE_ERROR, thread
+
+        return outcome["returncode"], None
+
+    def run_logged(self, servers, argv, createdir, action):
+        """Run a command line against every server. The output of each server is written
+        to <server>.txt in createdir and appended to CompleteOutputfile.txt as soon as it
+        finishes, the summary of the run is written to summary.json.
+
+        :param servers: login arguments of every server, see read_inventory
+        :type servers: list.
+        :param argv: command line run against every server
+        :type argv: list.
+        :param createdir: directory of the run, see output_directory
+        :type createdir: str.
+        :param action: what is done, printed with the result of each server
+        :type action: str.
+        :returns: summary of the run
+        """
+        jobs = list()
+        for args in servers:
+            host = host_filename(args[args.index("--url") + 1])
+            jobs.append(FleetJob(host, argv + args, os.path.join(createdir, host + ".txt")))
+
+        on_result = self.on_result
+        ui = self.rdmc.ui
+        oofile = open(os.path.join(createdir, "CompleteOutputfile.txt"), "w+")
+
+        def finished(result):
+            """Append the log of a finished server to the complete output file"""
+            with open(result.logfile, "r") as logfile:
+                oofile.write("\nOutput for " + result.host + ": \n\n" + logfile.read())
+            oofile.write(SEPARATOR)
+            oofile.flush()
+
+            if result.returncode == 0:
+                ui.printer("{} for {} : SUCCESS\n".format(action, result.host))
+            else:
+                ui.error("{} for {} : FAILED\n".format(action, result.host))
+                ui.error(
+                    "ILOREST return code : {}.\nFor more details please check "
+                    "{}.txt under {} directory.\n".format(
+                        result.returncode, result.host, createdir
+                    )
+                )
+            if on_result:
+                on_result(result)
+
+        ui.printer(
+            "Running concurrently against {} servers with up to {} workers...\n".format(
+                len(jobs), self.workers
+            )
+        )
+
+        start = time.time()
+        self.on_result = finished
+        try:
+            results = self.run(jobs)
+        finally:
+            self.on_result = on_result
+            oofile.close()
+
+        report = summary(results, createdir, time.time() - start, self.workers)
+        governor = getattr(self.rdmc, "governor", None)
+        if governor:
+            report["concurrency"] = governor.status()
+        with open(os.path.join(createdir, "summary.json"), "w") as summaryfile:
+            json.dump(report, summaryfile, indent=2)
+
+        return report
+
+
+def summary(results, outputdir, elapsed, workers):
+    """Machine readable summary of a multi server run
+
+    :param results: FleetResult list
+    :type results: list.
+    :param outputdir: directory holding the server logs
+    :type outputdir: str.
+    :param elapsed: wall time of the run in seconds
+    :type elapsed: float.
+    :param workers: worker limit of the run
+    :type workers: int.
+    """
+    failed = [result for result in results if result.returncode]
+    return {
+        "outputdir": outputdir,
+        "workers": workers,
+        "elapsed": round(elapsed, 3),
+        "total": len(results),
+        "succeeded": len(results) - len(failed),
+        "failed": len(failed),
+        "servers": [
+            {
+                "host": result.host,
+                "returncode": result.returncode,
+                "elapsed": round(result.elapsed, 3),
+                "attempts": result.attempts,
+                "timedout": result.timedout,
+                "logfile": os.path.basename(result.logfile),
+            }
+            for result in results
+        ],
+    }
@@ -0,0 +1,287 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""Concurrency governor for RDMC.
+
+Every HTTP request sent through the library connections takes a slot from the limit of its
+iLO and from the global limit, so concurrent code (multiple server runs, thread pools) never
+has more requests in flight than the limits allow. The limits follow AIMD: they grow by one
+for every limit's worth of healthy responses and are halved on congestion. The limit of an
+iLO is halved when it answers 503, a request fails to connect or times out, or the latency
+rises well above what the iLO usually answers in. Latency is judged per block of data sent
+and received, a big download or upload is slow because of its size and not congestion. The
+global limit is only halved by failed requests, a single slow or busy iLO does not hold back
+the others.
+"""
+
+# ---------Imports---------
+
+import sys
+import time
+import logging
+import functools
+import threading
+
+# ---------End of imports---------
+
+LOGGER = logging.getLogger(__name__)
+
+# in flight requests allowed per iLO, the embedded web server handles few connections well
+HOST_LIMITS = (4, 1, 8)
+# in flight requests allowed over all iLOs
+GLOBAL_LIMITS = (64, 4, 256)
+# a response slower than this many times the usual latency is a sign of congestion
+LATENCY_FACTOR = 3.0
+# healthy responses seen before latency is judged
+LATENCY_SAMPLES = 8
+# latency is judged per this many bytes transferred, smaller requests as a whole
+LATENCY_BLOCK = 64 * 1024
+BUSY_STATUSES = (503,)
+
+
+class AimdLimit(object):
+    """Number of requests that may be in flight at the same time
+
+    :param name: what the limit applies to, an iLO URL or global
+    :type name: str.
+    :param initial: starting limit
+    :type initial: int.
+    :param minimum: the limit never drops below this
+    :type minimum: int.
+    :param maximum: the limit never grows above this
+    :type maximum: int.
+    :param judgelatency: treat a response much slower than usual as congestion
+    :type judgelatency: bool.
+    """
+
+    def __init__(self, name, initial, minimum, maximum, judgelatency=True):
+        self.name = name
+        self.judgelatency = judgelatency
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(initial)
+        self.inflight = 0
+        self.peak = 0
+        self.requests = 0
+        self.backoffs = 0
+        self.latency = None
+        self.samples = 0
+        self._backoff_time = 0.0
+        self._cond = threading.Condition()
+
+    @property
+    def current(self):
+        """Whole number of requests currently allowed"""
+        return max(self.minimum, int(self.limit))
+
+    def acquire(self):
+        """Wait for a free slot and take it"""
+        with self._cond:
+            while self.inflight >= self.current:
+                self._cond.wait()
+            self.inflight += 1
+            self.requests += 1
+            self.peak = max(self.peak, self.inflight)
+
+    def release(self, latency, congested=False):
+        """Give back a slot and adjust the limit with the outcome of its request
+
+        :param latency: seconds the request took per LATENCY_BLOCK bytes transferred
+        :type latency: float.
+        :param congested: the request failed in a way that asks for fewer requests
+        :type congested: bool.
+        """
+        with self._cond:
+            self.inflight -= 1
+            slow = (
+                self.judgelatency
+                and self.samples >= LATENCY_SAMPLES
+                and latency > self.latency * LATENCY_FACTOR
+            )
+            if congested or slow:
+                # one back off per round trip, requests in flight saw the same congestion
+                now = time.monotonic()
+                if now - self._backoff_time > (self.latency or latency):
+                    self._backoff_time = now
+                    self.backoffs += 1
+                    self.limit = max(float(self.minimum), self.limit / 2)
+                    LOGGER.info(
+                        "Concurrency limit of %s lowered to %s (%s)",
+                        self.name,
+                        self.current,
+                        "slow response" if slow and not congested else "busy or timed out",
+                    )
+            else:
+                self.limit = min(float(self.maximum), self.limit + 1.0 / self.limit)
+                self.samples += 1
+                self.latency = (
+                    latency if self.latency is None else self.latency * 0.9 + latency * 0.1
+                )
+            self._cond.notify_all()
+
+    def status(self):
+        """Dictionary of the current state"""
+        return {
+            "name": self.name,
+            "limit": self.current,
+            "range": [self.minimum, self.maximum],
+            "peak": self.peak,
+            "requests": self.requests,
+            "backoffs": self.backoffs,
+        }
+
+
+class ConcurrencyGovernor(object):
+    """Limits the requests in flight per iLO and over all iLOs"""
+
+    def __init__(self, host_limits=HOST_LIMITS, global_limits=GLOBAL_LIMITS):
+        self.host_limits = host_limits
+        self.overall = AimdLimit("global", *global_limits, judgelatency=False)
+        self.hosts = dict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._installed = False
+
+    def host(self, name):
+        """Limit of one iLO
+
+        :param name: base URL of the iLO
+        :type name: str.
+        """
+        with self._lock:
+            if name not in self.hosts:
+                self.hosts[name] = AimdLimit(name, *self.host_limits)
+            return self.hosts[name]
+
+    def workers(self, count, host=None):
+        """Number of threads worth starting for count concurrent tasks, the governor still
+        decides how many of their requests are in flight
+
+        :param count: number of tasks
+        :type count: int.
+        :param host: base URL of the iLO the tasks talk to
+        :type host: str.
+        """
+        limit = self.host(host).maximum if host else self.overall.maximum
+        return max(1, min(count, limit))
+
+    def request(self, host, func, *args, **kwargs):
+        """Send a request through func once the limits allow it
+
+        :param host: base URL of the iLO
+        :type host: str.
+        :param func: function sending the request
+        :type func: function.
+        """
+        if getattr(self._local, "active", False):
+            # a request sent while sending another (HEAD before PUT) reuses its slot
+            return func(*args, **kwargs)
+
+        hostlimit = self.host(host)
+        hostlimit.acquire()
+        self.overall.acquire()
+        self._local.active = True
+        start = time.monotonic()
+        failed = True
+        busy = False
+        result = None
+        try:
+            result = func(*args, **kwargs)
+            failed = False
+            busy = getattr(result, "status", None) in BUSY_STATUSES
+            return result
+        finally:
+            blocks = transferred(kwargs.get("body"), result) / float(LATENCY_BLOCK)
+            latency = (time.monotonic() - start) / max(1.0, blocks)
+            self._local.active = False
+            self.overall.release(latency, failed)
+            hostlimit.release(latency, failed or busy)
+
+    def install(self):
+        """Send every request of the library HTTP connections through the governor"""
+        if self._installed:
+            return
+        try:
+            from redfish.rest.connections import HttpConnection
+        except ImportError:
+            return
+        self._installed = True
+        governor = self
+        original = HttpConnection.rest_request
+
+        @functools.wraps(original)
+        def rest_request(conn, *args, **kwargs):
+            return governor.request(conn.base_url, original, conn, *args, **kwargs)
+
+        HttpConnection.rest_request = rest_request
+
+    @property
+    def concurrent(self):
+        """True once requests were sent concurrently or a limit was lowered"""
+        return any(
+            status["peak"] > 1 or status["backoffs"] for status in self.status()
+        )
+
+    def status(self):
+        """State of the global limit and of every iLO limit"""
+        with self._lock:
+            hosts = list(self.hosts.values())
+        return [self.overall.status()] + [host.status() for host in hosts]
+
+    def print_report(self, stream=None):
+        """Write the limits of every iLO that received requests, stderr by default
+
+        :param stream: stream to write to
+        :type stream: file.
+        """
+        stream = stream or sys.stderr
+        for status in self.status():
+            if not status["requests"]:
+                continue
+            stream.write(
+                "Concurrency %s: limit %s (%s-%s), peak %s in flight, %s requests, "
+                "%s back offs\n"
+                % (
+                    status["name"],
+                    status["limit"],
+                    status["range"][0],
+                    status["range"][1],
+                    status["peak"],
+                    status["requests"],
+                    status["backoffs"],
+                )
+            )
+        stream.flush()
+
+
+def transferred(body, response):
+    """Bytes of a request body and of its response body, bodies sent as objects or read
+    as a stream are not counted
+
+    :param body: request body
+    :type body: str, bytes or dict.
+    :param response: response of the request
+    :type response: RestResponse.
+    """
+    size = len(body) if isinstance(body, (bytes, str)) else 0
+    data = getattr(response, "ori", None)
+    if isinstance(data, (bytes, str)):
+        size += len(data)
+    return size
+
+
+GOVERNOR = ConcurrencyGovernor()
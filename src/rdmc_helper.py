@@ -50,6 +50,11 @@ if os.name == "nt":
 
 # ---------End of imports---------
 
+# characters of output buffered between writes to stdout or a file
+OUTPUT_BUFSIZE = 64 * 1024
+# options whose values are masked when a command line is shown or stored
+MASKED_ARGS = ["-p", "--password", "--biospassword"]
+
 
 # ---------Debug logger---------
 
@@ -664,70 +669,205 @@ class UI(object):
         """Called when there is no VNIC is Enabled"""
         self.printer("\nError: Could not reach URL, VNIC is not enabled. \n", excp=True)
 
-    def print_out_json(self, content):
+    def print_out_json(self, content, compact=False):
         """Print out json content to std.out with sorted keys
         :param content: content to be printed out
         :type content: str.
+        :param compact: print without indentation or whitespace
+        :type compact: bool.
         """
-        # stringify
-        content = json.dumps(
-            content, indent=2, cls=redfish.ris.JSONEncoder, sort_keys=True
-        )
-        self.printer(content, verbose_override=True)
+        for chunk in json_chunks(content, compact=compact, sort_keys=True):
+            self.printer(chunk, flush=False, verbose_override=True)
         self.printer("\n")
 
-    def print_out_json_ordered(self, content):
+    def print_out_json_ordered(self, content, compact=False):
         """Print out sorted json content to std.out
         :param content: content to be printed out
         :type content: str.
+        :param compact: print without indentation or whitespace
+        :type compact: bool.
         """
         content = OrderedDict(sorted(list(content.items()), key=lambda x: x[0]))
-        content = json.dumps(content, indent=2, cls=redfish.ris.JSONEncoder)
-        self.printer(content, verbose_override=True)
+        for chunk in json_chunks(content, compact=compact):
+            self.printer(chunk, flush=False, verbose_override=True)
         self.printer("\n")
 
-    def print_out_human_readable(self, content):
+    def print_out_human_readable(self, content, bufsize=OUTPUT_BUFSIZE):
         """Print out human readable content to std.out
         :param content: content to be printed out
         :type content: str.
+        :param bufsize: number of characters buffered between writes to std.out
+        :type bufsize: int.
         """
-        self.pretty_human_readable(content, enterloop=True)
+        self.pretty_human_readable(content, enterloop=True, bufsize=bufsize)
         self.printer("\n")
 
-    def pretty_human_readable(self, content, indent=0, start=0, enterloop=False):
-        """Convert content to human readable and print out to std.out
+    def pretty_human_readable(
+        self, content, indent=0, start=0, enterloop=False, bufsize=OUTPUT_BUFSIZE
+    ):
+        """Convert content to human readable and print out to std.out. Output is collected
+        in a buffer and written out every bufsize characters, std.out is flushed once done.
         :param content: content to be printed out
         :type content: str.
         :param indent: indent string to be used as seperator
         :type indent: str.
         :param start: used to determine the indent level
         :type start: int.
+        :param bufsize: number of characters buffered between writes to std.out
+        :type bufsize: int.
         """
+        buf = []
+        buflen = 0
+        for data in self.human_readable_parts(content, indent, start, enterloop):
+            buf.append(data)
+            buflen += len(data)
+            if buflen >= bufsize:
+                self.printer("".join(buf), flush=False)
+                buf = []
+                buflen = 0
+        self.printer("".join(buf))
+
+    def human_readable_parts(self, content, indent=0, start=0, enterloop=False):
+        """Generator for the human readable form of content. Nested content is walked with
+        an explicit stack so deep trees are not limited by the recursion limit.
+        :param content: content to be converted
+        :type content: str.
+        :param indent: indent string to be used as seperator
+        :type indent: str.
+        :param start: used to determine the indent level
+        :type start: int.
+        :returns: strings to be joined for the human readable output
+        """
+        if not isinstance(content, (list, dict)):
+            yield self._human_readable_value(content)
+            return
+
+        stack = [self._human_readable_children(content, indent, start, enterloop)]
+        while stack:
+            part = next(stack[-1], None)
+            if part is None:
+                stack.pop()
+            elif isinstance(part, tuple):
+                stack.append(self._human_readable_children(part[0], indent, part[1]))
+            else:
+                yield part
+
+    def _human_readable_children(self, content, indent, start, enterloop=False):
+        """Parts of a single list or dict. Nested lists and dicts are returned as
+        (content, start) tuples for the caller to expand"""
         space = "\n" + "\t" * indent + " " * start
         if isinstance(content, list):
-            for item in content:
+            last = len(content) - 1
+            for indx, item in enumerate(content):
                 if item is None:
                     continue
 
-                self.pretty_human_readable(item, indent, start)
+                if isinstance(item, (list, dict)):
+                    yield (item, start)
+                else:
+                    yield self._human_readable_value(item)
 
-                if content.index(item) != (len(content) - 1):
-                    self.printer(space)
-        elif isinstance(content, dict):
+                # no separator after the last item unless an equal item appears before it
+                if indx != last or content.index(item) != last:
+                    yield space
+        else:
             for key, value in content.items():
-                if space and not enterloop:
-                    self.printer(space)
+                if not enterloop:
+                    yield space
 
                 enterloop = False
-                self.printer((str(key) + "="))
-                self.pretty_human_readable(value, indent, (start + len(key) + 2))
-        else:
-            content = content if isinstance(content, six.string_types) else str(content)
-
-            content = '""' if not content else content
-            # Changed to support py3, verify if there is a unicode prit issue.
+                yield str(key) + "="
+                if isinstance(value, (list, dict)):
+                    yield (value, start + len(key) + 2)
+                else:
+                    yield self._human_readable_value(value)
 
-            self.printer(content)
+    @staticmethod
+    def _human_readable_value(content):
+        """Human readable form of a single value"""
+        content = content if isinstance(content, six.string_types) else str(content)
+        # Changed to support py3, verify if there is a unicode prit issue.
+        return '""' if not content else content
+
+
+def json_chunks(
+    content, compact=False, sort_keys=False, indent=2, bufsize=OUTPUT_BUFSIZE, cls=None
+):
+    """Encode content as JSON piece by piece, the output is the same as json.dumps but
+    never held in memory as a whole
+    :param content: content to be encoded
+    :type content: dict.
+    :param compact: encode without indentation or whitespace
+    :type compact: bool.
+    :param sort_keys: sort the keys of dictionaries
+    :type sort_keys: bool.
+    :param indent: indentation used when not compact
+    :type indent: int.
+    :param bufsize: size of the returned chunks in characters
+    :type bufsize: int.
+    :param cls: encoder class, redfish.ris.JSONEncoder by default
+    :type cls: json.JSONEncoder.
+    :returns: generator of JSON strings
+    """
+    cls = cls or redfish.ris.JSONEncoder
+    if compact:
+        encoder = cls(separators=(",", ":"), sort_keys=sort_keys)
+    else:
+        encoder = cls(indent=indent, sort_keys=sort_keys)
+
+    buf = []
+    buflen = 0
+    for chunk in encoder.iterencode(content):
+        buf.append(chunk)
+        buflen += len(chunk)
+        if buflen >= bufsize:
+            yield "".join(buf)
+            buf = []
+            buflen = 0
+    if buf:
+        yield "".join(buf)
+
+
+def write_json(content, outfile, compact=False, sort_keys=False, indent=2, cls=None):
+    """Stream content as JSON to an open file
+    :param content: content to be written
+    :type content: dict.
+    :param outfile: file opened for writing in text mode
+    :type outfile: file.
+    :param compact: write without indentation or whitespace
+    :type compact: bool.
+    :param sort_keys: sort the keys of dictionaries
+    :type sort_keys: bool.
+    :param indent: indentation used when not compact
+    :type indent: int.
+    :param cls: encoder class, redfish.ris.JSONEncoder by default
+    :type cls: json.JSONEncoder.
+    """
+    for chunk in json_chunks(
+        content, compact=compact, sort_keys=sort_keys, indent=indent, cls=cls
+    ):
+        outfile.write(chunk)
+
+
+def mask_credentials(nargv):
+    """Join a command line masking the values of MASKED_ARGS, given as separate arguments,
+    as --option=value or as -pvalue
+    :param nargv: command line arguments
+    :type nargv: list.
+    :returns: command line string
+    """
+    masked = list()
+    for indx, arg in enumerate(nargv):
+        if indx and nargv[indx - 1] in MASKED_ARGS:
+            arg = "********"
+        else:
+            for opt in MASKED_ARGS:
+                if arg.startswith(opt + "="):
+                    arg = opt + "=********"
+                elif not opt.startswith("--") and arg.startswith(opt) and arg != opt:
+                    arg = opt + "********"
+        masked.append(arg)
+    return " ".join(masked)
 
 
 class Encryption(object):
@@ -0,0 +1,268 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""HTTP request accounting for RDMC (--http-stats).
+
+Every call of the RmcApp get/head/post/put/patch/delete handlers is recorded with its method,
+URI, status, latency and response size. Requests sent by the library outside of the handlers
+(login, monolith build) are recorded from the connection layer. A handler call that completes
+without reaching the connection layer was served from the cache.
+"""
+
+# ---------Imports---------
+
+import collections
+import functools
+import math
+import sys
+import threading
+import time
+
+# ---------End of imports---------
+
+# RmcApp handlers and the HTTP method they issue
+HANDLERS = (
+    ("get_handler", "GET"),
+    ("head_handler", "HEAD"),
+    ("post_handler", "POST"),
+    ("put_handler", "PUT"),
+    ("patch_handler", "PATCH"),
+    ("delete_handler", "DELETE"),
+)
+
+HttpRecord = collections.namedtuple(
+    "HttpRecord", ["method", "path", "status", "latency", "size", "cached", "source"]
+)
+
+
+def percentile(values, pct):
+    """Nearest rank percentile of a sorted list
+
+    :param values: sorted values
+    :type values: list.
+    :param pct: percentile, 0-100
+    :type pct: int.
+    """
+    if not values:
+        return 0.0
+    rank = int(math.ceil(pct / 100.0 * len(values)))
+    return values[min(max(rank, 1), len(values)) - 1]
+
+
+def _response_size(result):
+    """Size in bytes of a RestResponse body"""
+    body = getattr(result, "ori", None)
+    return len(body) if body else 0
+
+
+class HttpStats(object):
+    """Records the HTTP requests of a command line"""
+
+    def __init__(self):
+        self.enabled = False
+        self.records = []
+        self._patched = []
+        self._local = threading.local()
+
+    def start(self, app):
+        """Start recording the handlers of app and the library connections
+
+        :param app: application instance
+        :type app: RmcApp.
+        """
+        self.records = []
+        self.enabled = True
+        for attr, method in HANDLERS:
+            if getattr(app, attr, None) is not None:
+                self._patch(app, attr, self._handler_wrapper(getattr(app, attr), method))
+
+        try:
+            from redfish.rest.connections import HttpConnection, Blobstore2Connection
+        except ImportError:
+            return
+        for cls in (HttpConnection, Blobstore2Connection):
+            self._patch(cls, "rest_request", self._connection_wrapper(cls.rest_request))
+
+    def stop(self):
+        """Stop recording and restore the wrapped methods. A method wrapped again after
+        start() keeps its wrappers, the recording wrapper inside them passes calls
+        through."""
+        self.enabled = False
+        while self._patched:
+            obj, attr, original, wrapper = self._patched.pop()
+            if vars(obj).get(attr) is not wrapper:
+                continue
+            if original is None:
+                delattr(obj, attr)
+            else:
+                setattr(obj, attr, original)
+
+    def _patch(self, obj, attr, wrapper):
+        """Replace obj.attr with wrapper until stop()"""
+        # put back what obj itself defined, inherited and class methods are uncovered again
+        original = vars(obj).get(attr)
+        setattr(obj, attr, wrapper)
+        self._patched.append((obj, attr, original, wrapper))
+
+    def _handler_wrapper(self, func, method):
+        """Wrap an RmcApp handler"""
+        stats = self
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not stats.enabled or getattr(stats._local, "calls", None) is not None:
+                return func(*args, **kwargs)
+            path = args[0] if args else kwargs.get("get_path", kwargs.get("put_path"))
+            stats._local.calls = 0
+            start = time.perf_counter()
+            result = None
+            try:
+                result = func(*args, **kwargs)
+                return result
+            finally:
+                latency = time.perf_counter() - start
+                calls = stats._local.calls
+                stats._local.calls = None
+                stats.records.append(
+                    HttpRecord(
+                        method,
+                        str(path),
+                        getattr(result, "status", None),
+                        latency,
+                        _response_size(result),
+                        result is not None and calls == 0,
+                        "handler",
+                    )
+                )
+
+        return wrapper
+
+    def _connection_wrapper(self, func):
+        """Wrap a connection rest_request, only requests outside of a handler are recorded"""
+        stats = self
+
+        @functools.wraps(func)
+        def wrapper(conn, path="", method="GET", *args, **kwargs):
+            if not stats.enabled:
+                return func(conn, path, method, *args, **kwargs)
+            if getattr(stats._local, "calls", None) is not None:
+                stats._local.calls += 1
+                return func(conn, path, method, *args, **kwargs)
+            start = time.perf_counter()
+            result = None
+            try:
+                result = func(conn, path, method, *args, **kwargs)
+                return result
+            finally:
+                stats.records.append(
+                    HttpRecord(
+                        method,
+                        path.decode("utf-8") if isinstance(path, bytes) else str(path),
+                        getattr(result, "status", None),
+                        time.perf_counter() - start,
+                        _response_size(result),
+                        False,
+                        "client",
+                    )
+                )
+
+        return wrapper
+
+    def report(self, top=10):
+        """Aggregate the records
+
+        :param top: number of URIs listed by total time
+        :type top: int.
+        :returns: report dictionary
+        """
+        latencies = sorted(rec.latency for rec in self.records if not rec.cached)
+        byuri = collections.OrderedDict()
+        gets = collections.Counter()
+        for rec in self.records:
+            entry = byuri.setdefault(
+                (rec.method, rec.path), {"count": 0, "time": 0.0, "bytes": 0, "cached": 0}
+            )
+            entry["count"] += 1
+            entry["time"] += rec.latency
+            entry["bytes"] += rec.size
+            entry["cached"] += rec.cached
+            if rec.method == "GET" and not rec.cached and rec.status != 206:
+                # the ranges of one download are not repeats
+                gets[rec.path] += 1
+
+        return {
+            "requests": len(self.records),
+            "handler_requests": sum(1 for rec in self.records if rec.source == "handler"),
+            "cache_hits": sum(1 for rec in self.records if rec.cached),
+            "bytes": sum(rec.size for rec in self.records),
+            "time": sum(latencies),
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "statuses": dict(collections.Counter(str(rec.status) for rec in self.records)),
+            "top": sorted(
+                ((key[0], key[1], val) for key, val in byuri.items()),
+                key=lambda x: -x[2]["time"],
+            )[:top],
+            "duplicates": [(path, count) for path, count in gets.most_common() if count > 1],
+        }
+
+    def print_report(self, stream=None, top=10):
+        """Write the --http-stats report, stderr by default so command output stays parseable
+
+        :param stream: stream to write to
+        :type stream: file.
+        :param top: number of URIs listed by total time
+        :type top: int.
+        """
+        stream = stream or sys.stderr
+        report = self.report(top=top)
+        stream.write(
+            "\nHTTP requests: %s (%s through handlers, %s served from cache), %s bytes, "
+            "%.1f ms on the wire\n"
+            % (
+                report["requests"],
+                report["handler_requests"],
+                report["cache_hits"],
+                report["bytes"],
+                report["time"] * 1000,
+            )
+        )
+        stream.write(
+            "Latency p50: %.1f ms  p95: %.1f ms  Status: %s\n"
+            % (
+                report["p50"] * 1000,
+                report["p95"] * 1000,
+                ", ".join(
+                    "%s x%s" % (key, val) for key, val in sorted(report["statuses"].items())
+                ),
+            )
+        )
+        if report["top"]:
+            stream.write(
+                "\n%-7s %7s %11s %10s %7s  %s\n"
+                % ("method", "count", "total(ms)", "bytes", "cached", "URI")
+            )
+            for method, path, val in report["top"]:
+                stream.write(
+                    "%-7s %7d %11.1f %10d %7d  %s\n"
+                    % (method, val["count"], val["time"] * 1000, val["bytes"], val["cached"], path)
+                )
+        if report["duplicates"]:
+            stream.write("\nDuplicate GETs:\n")
+            for path, count in report["duplicates"]:
+                stream.write("%7d  %s\n" % (count, path))
+        stream.flush()
@@ -0,0 +1,179 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""Command manifest for RDMC. Describes every extension command (name, aliases, summary,
+section and module path) so the command modules themselves only need to be imported when
+they are actually run.
+
+Regenerate the shipped manifest after adding a command or changing its ident with:
+
+    python rdmc_manifest.py
+"""
+
+# ---------Imports---------
+
+import ast
+import importlib
+import json
+import logging
+import os
+import sys
+from collections import OrderedDict
+
+try:
+    import extensions
+except ImportError:
+    from ilorest import extensions
+
+# ---------End of imports---------
+
+LOGGER = logging.getLogger(__name__)
+
+MANIFEST_FILE = os.path.join(os.path.dirname(extensions.__file__), "manifest.json")
+
+# ident keys carried in the manifest
+MANIFEST_KEYS = ("name", "aliases", "summary")
+
+
+def command_modules():
+    """Yields (class name, module path) for every command found by the extensions package.
+
+    :returns: generator of (class name, module path) tuples
+    """
+    for name in extensions.classNames:
+        pkgname, cname = name.rsplit(".", 1)
+        pkgname = "extensions" + pkgname
+        if "__pycache__" not in pkgname and "Command" in cname:
+            yield cname, pkgname
+
+
+def _prefer(current, candidate):
+    """Decide which of two modules providing the same command class wins. The underscore
+    named packages (e.g. iLO_COMMANDS) are importable as ilorest.extensions.* and take
+    precedence over the legacy space named copies (e.g. "iLO COMMANDS").
+
+    :param current: module path currently registered
+    :type current: str.
+    :param candidate: module path found later
+    :type candidate: str.
+    :returns: the module path to keep
+    """
+    if " " in current and " " not in candidate:
+        return candidate
+    return current
+
+
+def _read_ident(cname, module):
+    """Read the ident dictionary of a command without importing it. Falls back to importing
+    the module if the ident can not be evaluated statically.
+
+    :param cname: command class name
+    :type cname: str.
+    :param module: module path of the command
+    :type module: str.
+    :returns: ident dictionary
+    """
+    filename = os.path.join(
+        os.path.dirname(extensions.__file__), *module.split(".")[1:]
+    ) + ".py"
+    try:
+        with open(filename, "r", encoding="utf-8") as srcfile:
+            tree = ast.parse(srcfile.read(), filename)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.ClassDef) and node.name == cname:
+                for item in ast.walk(node):
+                    if isinstance(item, ast.Assign) and any(
+                        isinstance(target, ast.Attribute) and target.attr == "ident"
+                        for target in item.targets
+                    ):
+                        return ast.literal_eval(item.value)
+    except (IOError, SyntaxError, ValueError) as excp:
+        LOGGER.debug("Unable to statically read ident of %s: %s", module, excp)
+
+    return getattr(importlib.import_module(module), cname)().ident
+
+
+def build_manifest():
+    """Build the command manifest by scanning the extensions package.
+
+    :returns: manifest dictionary
+    """
+    modules = dict()
+    allmodules = list()
+    for cname, module in command_modules():
+        allmodules.append(module)
+        modules[cname] = _prefer(modules[cname], module) if cname in modules else module
+
+    commands = OrderedDict()
+    for cname in sorted(modules, key=lambda cname: modules[cname]):
+        module = modules[cname]
+        try:
+            ident = _read_ident(cname, module)
+            entry = OrderedDict((key, ident[key]) for key in MANIFEST_KEYS)
+        except Exception as excp:
+            LOGGER.error("loading command: %s", cname, exc_info=excp)
+            continue
+        entry["section"] = module.split(".")[1]
+        entry["module"] = module
+        commands[cname] = entry
+
+    return {"modules": sorted(allmodules), "commands": commands}
+
+
+def save_manifest(manifest, filename=MANIFEST_FILE):
+    """Write the manifest to disk.
+
+    :param manifest: manifest dictionary
+    :type manifest: dict.
+    :param filename: file to write the manifest to
+    :type filename: str.
+    """
+    with open(filename, "w", encoding="utf-8") as manfile:
+        json.dump(manifest, manfile, indent=2)
+        manfile.write("\n")
+
+
+def load_manifest(filename=MANIFEST_FILE):
+    """Load the command manifest. The manifest is rebuilt (and saved if possible) when it is
+    missing or does not match the command modules present in the extensions package.
+
+    :param filename: manifest file to load
+    :type filename: str.
+    :returns: ordered dictionary of command class name to manifest entry
+    """
+    manifest = None
+    try:
+        with open(filename, "r", encoding="utf-8") as manfile:
+            manifest = json.load(manfile, object_pairs_hook=OrderedDict)
+    except (IOError, ValueError):
+        pass
+
+    if not manifest or manifest.get("modules") != sorted(
+        module for _, module in command_modules()
+    ):
+        LOGGER.info("Command manifest missing or out of date, rebuilding.")
+        manifest = build_manifest()
+        try:
+            save_manifest(manifest, filename)
+        except IOError:
+            pass
+
+    return manifest["commands"]
+
+
+if __name__ == "__main__":
+    save_manifest(build_manifest(), sys.argv[1] if len(sys.argv) > 1 else MANIFEST_FILE)
@@ -0,0 +1,383 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""Concurrent monolith prefetch for RDMC.
+
+After login the monolith only holds the service root and the resource directory, the
+instances listed in the directory are filled in when a type is selected. The library loads
+them one path at a time, selecting a type with many instances (drives, network interfaces,
+select --refresh) costs one round trip per instance. The prefetcher replaces that download
+with a bounded thread pool and adds the responses to the monolith in the order the paths
+were asked for, with the same checks as the serial load. While revalidating (--revalidate) a
+reload of resources kept in the monolith sends their ETag in If-None-Match, a resource that
+did not change answers 304 and its cached body is kept.
+
+Commands listing the types they use in the "requires" field of their ident log in without
+building the monolith. Only the resources of those types are downloaded, by following the
+links in TYPE_LINKS from the service root. Selecting any other type later on loads the
+resource directory first, as a login without "requires" would have.
+"""
+
+# ---------Imports---------
+
+import logging
+import functools
+
+from concurrent.futures import ThreadPoolExecutor
+
+import six
+
+from six.moves.urllib.parse import urlparse, urlunparse
+
+from redfish.ris.ris import BiosUnregisteredError, SessionExpired
+
+try:
+    from rdmc_governor import GOVERNOR
+except ImportError:
+    from ilorest.rdmc_governor import GOVERNOR
+
+# ---------End of imports---------
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 8
+
+# links followed from the service root to the instances of a type, Members expands a collection
+TYPE_LINKS = {
+    "ServiceRoot": (),
+    "ComputerSystemCollection": ("Systems",),
+    "ComputerSystem": ("Systems", "Members"),
+    "Bios": ("Systems", "Members", "Bios"),
+    "ManagerCollection": ("Managers",),
+    "Manager": ("Managers", "Members"),
+    "ChassisCollection": ("Chassis",),
+    "Chassis": ("Chassis", "Members"),
+    "AccountService": ("AccountService",),
+    "SessionService": ("SessionService",),
+    "EventService": ("EventService",),
+    "UpdateService": ("UpdateService",),
+}
+
+
+def normalize_path(path):
+    """Path as the monolith stores it, non ascii pipes quoted and fragments removed
+
+    :param path: resource path
+    :type path: str.
+    """
+    path = path.replace("|", "%7C")
+    newpath = list(urlparse(path)[:])
+    newpath[-1] = ""
+    return urlunparse(tuple(newpath))
+
+
+def type_name(selector):
+    """Type name without the namespace and version: #Bios.v1_0_0.Bios and Bios. are Bios
+
+    :param selector: type or selector string
+    :type selector: str.
+    """
+    return selector.split("#")[-1].split(".")[0]
+
+
+class Prefetcher(object):
+    """Downloads the paths the library asks for concurrently
+
+    :param tracer: tracer timing the prefetch stage
+    :type tracer: Tracer.
+    :param workers: maximum number of paths downloaded at the same time
+    :type workers: int.
+    """
+
+    def __init__(self, tracer, workers=DEFAULT_WORKERS):
+        self.tracer = tracer
+        self.workers = workers
+        self.revalidate = False
+        self._app = None
+
+    def install(self, app):
+        """Route the path downloads of app through the prefetcher
+
+        :param app: application instance
+        :type app: RmcApp.
+        """
+        if self._app is app:
+            return
+        self._app = app
+        original = app.download_path
+        prefetcher = self
+
+        @functools.wraps(original)
+        def download_path(paths, crawl=True, path_refresh=False):
+            conditional = path_refresh and prefetcher.revalidate
+            if crawl or not prefetcher.usable(app, paths, conditional):
+                return original(paths, crawl=crawl, path_refresh=path_refresh)
+            return prefetcher.prefetch(app.monolith, paths, path_refresh, conditional)
+
+        app.download_path = download_path
+
+        for attr in ("_updatemono", "getidbytype"):
+            setattr(app, attr, self._ensure_wrapper(app, getattr(app, attr)))
+
+    def _ensure_wrapper(self, app, func):
+        """Wrap an RmcApp method taking the type it looks up as first argument so the type is
+        loaded into a partial monolith first"""
+        prefetcher = self
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            prefetcher.ensure(app, args[0] if args else kwargs.get("currtype", kwargs.get("tpe")))
+            return func(*args, **kwargs)
+
+        return wrapper
+
+    def usable(self, app, paths, conditional=False):
+        """True when paths are worth downloading concurrently or revalidating
+
+        :param app: application instance
+        :type app: RmcApp.
+        :param paths: paths to download
+        :type paths: list.
+        :param conditional: paths are revalidated
+        :type conditional: bool.
+        """
+        monolith = app.monolith
+        return (
+            (conditional or self.workers > 1 and len(paths) > 1)
+            and paths
+            and monolith is not None
+            and monolith.is_redfish
+            and not monolith.client.base_url.startswith("blobstore://.")
+        )
+
+    def prefetch(self, monolith, paths, path_refresh=False, conditional=False):
+        """Download paths concurrently and add them to the monolith without crawling their
+        links
+
+        :param monolith: monolith to add the responses to
+        :type monolith: RisMonolith.
+        :param paths: paths to download
+        :type paths: list.
+        :param path_refresh: download paths already in the monolith again
+        :type path_refresh: bool.
+        :param conditional: only download paths already in the monolith again if their ETag
+                            changed
+        :type conditional: bool.
+        """
+        pending = list()
+        visited = set(monolith.visited_urls) if not path_refresh else set()
+        for path in paths:
+            if not isinstance(path, six.string_types) or path.endswith("?page=1"):
+                continue
+            path = normalize_path(path)
+            if path in pending or path.lower() in visited:
+                continue
+            pending.append(path)
+        if not pending:
+            return
+
+        workers = min(self.workers, GOVERNOR.workers(len(pending), monolith.client.base_url))
+        if monolith.client.base_url.startswith("blobstore://."):
+            # the local interface handles one request at a time
+            workers = 1
+        etags = [self.etag(monolith, path) if conditional else None for path in pending]
+        get = lambda request: monolith.client.get(
+            request[0], headers={"If-None-Match": request[1]} if request[1] else None
+        )
+        with self.tracer.span(
+            "revalidate" if conditional else "prefetch",
+            "monolith",
+            {"paths": len(pending), "workers": workers},
+        ):
+            if workers > 1:
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    responses = list(pool.map(get, zip(pending, etags)))
+            else:
+                responses = [get(request) for request in zip(pending, etags)]
+
+            unchanged = 0
+            for path, etag, resp in zip(pending, etags, responses):
+                if etag and resp.status == 304:
+                    # the cached body is current, adding it again records the time it was
+                    # revalidated and clears the modified mark of a stale resource
+                    unchanged += 1
+                    resp = monolith.paths[path].resp
+                self.add_response(monolith, path, resp)
+
+        if conditional:
+            LOGGER.info(
+                "Revalidated %s paths with %s workers, %s unchanged",
+                len(pending),
+                workers,
+                unchanged,
+            )
+        else:
+            LOGGER.debug("Prefetched %s paths with %s workers", len(pending), workers)
+
+    @staticmethod
+    def etag(monolith, path):
+        """ETag of the response kept in the monolith for path, None when there is none
+
+        :param monolith: monolith holding the response
+        :type monolith: RisMonolith.
+        :param path: path of the response
+        :type path: str.
+        """
+        member = monolith.paths.get(path)
+        if member is None or member.resp is None:
+            return None
+        try:
+            return member.resp.getheader("etag") or member.resp.dict.get("@odata.etag")
+        except (AttributeError, ValueError):
+            return None
+
+    def add_response(self, monolith, path, resp):
+        """Add a response to the monolith like the serial load does
+
+        :param monolith: monolith to add the response to
+        :type monolith: RisMonolith.
+        :param path: path of the response
+        :type path: str.
+        :param resp: response of path
+        :type resp: RestResponse.
+        """
+        if resp.status != 200 and path.lower() == monolith.typepath.defs.biospath:
+            raise BiosUnregisteredError()
+        elif resp.status == 401:
+            raise SessionExpired(
+                "Invalid session. Please logout and log back in or include credentials."
+            )
+        elif resp.status not in (201, 200):
+            monolith.removepath(path)
+            return
+        monolith.update_member(resp=resp, path=path, init=False)
+
+    def partial(self, app):
+        """True when the monolith was built from the types a command requires and the
+        resource directory was not loaded
+
+        :param app: application instance
+        :type app: RmcApp.
+        """
+        monolith = app.monolith
+        return (
+            monolith is not None
+            and monolith.directory_load
+            and app.typepath.defs.isgen10
+            and monolith._resourcedir not in monolith.paths
+        )
+
+    def require(self, app, types, json_out=False):
+        """Load the resources of types into the monolith of a login without monolith build
+
+        :param app: application instance
+        :type app: RmcApp.
+        :param types: types the command uses, ComputerSystem. or Bios. for example
+        :type types: list.
+        :param json_out: flag to determine if json output is needed
+        :type json_out: bool.
+        """
+        if not self.partial(app):
+            # servers without a resource directory are crawled as usual
+            app._build_monolith(json_out=json_out)
+            return
+        names = [type_name(tpe) for tpe in types]
+        if any(name not in TYPE_LINKS for name in names):
+            self.complete(app)
+        with self.tracer.span("require", "monolith", {"types": ", ".join(names)}):
+            self.load_types(app.monolith, [name for name in names if name in TYPE_LINKS])
+
+    def ensure(self, app, selector):
+        """Make sure the instances of selector are in the monolith before it is searched
+
+        :param app: application instance
+        :type app: RmcApp.
+        :param selector: type looked up
+        :type selector: str.
+        """
+        if not selector or not self.partial(app):
+            return
+        name = type_name(selector)
+        if name in TYPE_LINKS:
+            self.load_types(app.monolith, [name])
+        else:
+            self.complete(app)
+
+    def complete(self, app):
+        """Load the resource directory into a partial monolith, the same state a login
+        without required types leaves
+
+        :param app: application instance
+        :type app: RmcApp.
+        """
+        if not self.partial(app):
+            return
+        monolith = app.monolith
+        with self.tracer.span("complete", "monolith"):
+            monolith.load(path=monolith._resourcedir, crawl=False, init=False)
+            if monolith._resourcedir not in monolith.paths:
+                LOGGER.warning("Resource directory not found, selections are limited.")
+                monolith.directory_load = False
+                return
+            monolith._populatecollections()
+
+    def load_types(self, monolith, names):
+        """Follow the TYPE_LINKS of names from the service root, the paths of every depth are
+        downloaded together. Paths already in the monolith are not downloaded again.
+
+        :param monolith: monolith to add the resources to
+        :type monolith: RisMonolith.
+        :param names: type names found in TYPE_LINKS
+        :type names: list.
+        """
+        frontier = [(TYPE_LINKS[name], [monolith.client.default_prefix]) for name in names]
+        settings = list()
+        while frontier:
+            self.prefetch(monolith, [path for _, paths in frontier for path in paths])
+            following = list()
+            for links, paths in frontier:
+                for data in self.loaded(monolith, paths):
+                    if not links:
+                        # pending settings are selected together with the resource
+                        link = data.get("@Redfish.Settings", {}).get("SettingsObject", {})
+                        if isinstance(link.get("@odata.id"), six.string_types):
+                            settings.append(link["@odata.id"])
+                        continue
+                    if links[0] == "Members":
+                        hrefs = [member.get("@odata.id") for member in data.get("Members", [])]
+                    else:
+                        link = data.get(links[0])
+                        hrefs = [link.get("@odata.id")] if isinstance(link, dict) else []
+                    following.append((links[1:], hrefs))
+            frontier = [(links, paths) for links, paths in following if paths]
+        self.prefetch(monolith, settings)
+
+    @staticmethod
+    def loaded(monolith, paths):
+        """Response bodies of paths found in the monolith
+
+        :param monolith: monolith holding the responses
+        :type monolith: RisMonolith.
+        :param paths: paths to look up
+        :type paths: list.
+        """
+        for path in paths:
+            if not isinstance(path, six.string_types):
+                continue
+            member = monolith.paths.get(normalize_path(path))
+            if member is not None and member.resp is not None:
+                yield member.dict
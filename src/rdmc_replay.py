@@ -0,0 +1,429 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""Capture and replay of Redfish traffic for offline benchmarking.
+
+The record command uses Recorder to write every request/response of a command run into a
+capture directory (index.json plus one file per response body). ReplayServer serves such a
+capture over HTTPS with optional per request latency and bandwidth limits:
+
+    python rdmc_replay.py CAPTURE_DIR --port 8443 --latency 20 --bandwidth 2048
+    python rdmc.py get --select Bios. --url https://127.0.0.1:8443 -u user -p password
+
+RedfishServer is the shared base for local stand-ins, it only uses the standard library. The
+TLS certificate is created with the openssl binary unless --cert and --key are given.
+"""
+
+# ---------Imports---------
+
+import argparse
+import json
+import os
+import shutil
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import urlencode
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urllib import urlencode
+
+# ---------End of imports---------
+
+CAPTURE_INDEX = "index.json"
+CAPTURE_VERSION = 1
+
+# response headers not stored: bodies are kept decoded, sessions are faked on replay and the
+# replay server sends its own connection headers
+SKIPPED_HEADERS = (
+    "connection",
+    "content-encoding",
+    "content-length",
+    "date",
+    "keep-alive",
+    "server",
+    "set-cookie",
+    "transfer-encoding",
+    "x-auth-token",
+)
+
+SESSIONS_PATH = "/redfish/v1/sessionservice/sessions"
+SESSION_TOKEN = "0123456789abcdef0123456789abcdef"
+
+
+def normalize_path(path):
+    """Key used to match a request path, the same path with or without a trailing slash and
+    in any case matches
+
+    :param path: request path, with query string
+    :type path: str.
+    """
+    path, _, query = path.partition("?")
+    while "//" in path:
+        path = path.replace("//", "/")
+    path = path.rstrip("/").lower() or "/"
+    return path + "?" + query if query else path
+
+
+class Recorder(object):
+    """Records the library HTTP traffic into a capture directory"""
+
+    def __init__(self, directory, command=None):
+        self.directory = directory
+        self.command = command
+        self.exchanges = []
+        self._lock = threading.Lock()
+        self._patched = []
+
+    def start(self):
+        """Start recording the library connections"""
+        bodies = os.path.join(self.directory, "bodies")
+        if not os.path.isdir(bodies):
+            os.makedirs(bodies)
+        self.exchanges = []
+
+        from redfish.rest.connections import HttpConnection, Blobstore2Connection
+
+        for cls in (HttpConnection, Blobstore2Connection):
+            original = vars(cls).get("rest_request")
+            cls.rest_request = self._wrapper(cls.rest_request)
+            self._patched.append((cls, original))
+
+    def stop(self):
+        """Stop recording and write the capture index"""
+        while self._patched:
+            cls, original = self._patched.pop()
+            if original is None:
+                delattr(cls, "rest_request")
+            else:
+                cls.rest_request = original
+        index = {
+            "version": CAPTURE_VERSION,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "command": self.command,
+            "exchanges": self.exchanges,
+        }
+        with open(os.path.join(self.directory, CAPTURE_INDEX), "w") as indexfile:
+            json.dump(index, indexfile, indent=2)
+
+    def _wrapper(self, func):
+        """Wrap a connection rest_request"""
+        recorder = self
+
+        def rest_request(conn, path="", method="GET", args=None, body=None, headers=None):
+            start = time.perf_counter()
+            result = func(conn, path, method, args=args, body=body, headers=headers)
+            recorder.add(method, path, args, result, time.perf_counter() - start)
+            return result
+
+        return rest_request
+
+    def add(self, method, path, args, result, elapsed):
+        """Store one exchange
+
+        :param method: HTTP method
+        :type method: str.
+        :param path: request path
+        :type path: str.
+        :param args: query arguments
+        :type args: dict.
+        :param result: library response
+        :type result: RestResponse.
+        :param elapsed: response time in seconds
+        :type elapsed: float.
+        """
+        if isinstance(path, bytes):
+            path = path.decode("utf-8")
+        if args and method == "GET":
+            path += "?" + urlencode(args)
+        body = getattr(result, "ori", None)
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        headers = dict(
+            (key, val)
+            for key, val in (result.getheaders() or {}).items()
+            if key.lower() not in SKIPPED_HEADERS
+        )
+
+        with self._lock:
+            number = len(self.exchanges) + 1
+            exchange = {
+                "id": number,
+                "method": method,
+                "path": path,
+                "status": result.status,
+                "headers": headers,
+                "body": None,
+                "size": len(body) if body else 0,
+                "elapsed": round(elapsed, 6),
+            }
+            if body:
+                exchange["body"] = "bodies/%06d.bin" % number
+            self.exchanges.append(exchange)
+        if body:
+            with open(os.path.join(self.directory, exchange["body"]), "wb") as bodyfile:
+                bodyfile.write(body)
+
+
+def load_capture(directory):
+    """Read a capture directory
+
+    :param directory: capture directory
+    :type directory: str.
+    :returns: dictionary of (method, normalized path) to the list of its exchanges
+    """
+    with open(os.path.join(directory, CAPTURE_INDEX)) as indexfile:
+        index = json.load(indexfile)
+    exchanges = {}
+    for exchange in index["exchanges"]:
+        exchanges.setdefault(
+            (exchange["method"], normalize_path(exchange["path"])), []
+        ).append(exchange)
+    return exchanges
+
+
+def self_signed_cert(directory):
+    """Create a self signed localhost certificate with openssl
+
+    :param directory: directory for cert.pem and key.pem
+    :type directory: str.
+    :returns: (certificate file, key file)
+    """
+    certfile = os.path.join(directory, "cert.pem")
+    keyfile = os.path.join(directory, "key.pem")
+    if not (os.path.isfile(certfile) and os.path.isfile(keyfile)):
+        if not shutil.which("openssl"):
+            raise RuntimeError("openssl was not found, provide a certificate with --cert/--key.")
+        subprocess.check_call(
+            [
+                "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "365",
+                "-subj", "/CN=localhost", "-keyout", keyfile, "-out", certfile,
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+    return certfile, keyfile
+
+
+class RedfishRequestHandler(BaseHTTPRequestHandler):
+    """Passes every request to RedfishServer.respond"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.handle_request_for(self)
+
+    do_HEAD = do_POST = do_PUT = do_PATCH = do_DELETE = do_GET
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+
+class RedfishServer(ThreadingMixIn, HTTPServer):
+    """Local HTTPS Redfish stand-in base. Subclasses implement respond(method, path, body,
+    headers) returning (status, headers, body).
+
+    :param address: (host, port) to listen on, port 0 picks a free port
+    :type address: tuple.
+    :param latency: delay added to every response, in seconds
+    :type latency: float.
+    :param bandwidth: response body throughput limit in bytes per second, 0 for none
+    :type bandwidth: int.
+    :param tls: (certificate file, key file), None to serve plain HTTP
+    :type tls: tuple.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+    chunk_size = 64 * 1024
+
+    def __init__(self, address, latency=0.0, bandwidth=0, tls=None, verbose=False):
+        HTTPServer.__init__(self, address, RedfishRequestHandler)
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.verbose = verbose
+        self.scheme = "http"
+        if tls:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(*tls)
+            self.socket = context.wrap_socket(self.socket, server_side=True)
+            self.scheme = "https"
+
+    @property
+    def url(self):
+        """Base URL of the server"""
+        return "%s://%s:%s" % (self.scheme, self.server_address[0], self.server_address[1])
+
+    def handle_request_for(self, handler):
+        """Read the request body, build the response and send it with the configured latency
+        and bandwidth"""
+        length = int(handler.headers.get("Content-Length") or 0)
+        body = handler.rfile.read(length) if length else b""
+        status, headers, data = self.respond(
+            handler.command, handler.path, body, handler.headers
+        )
+        if isinstance(data, dict):
+            data = json.dumps(data).encode("utf-8")
+            headers.setdefault("Content-Type", "application/json")
+        data = data or b""
+
+        if self.latency:
+            time.sleep(self.latency)
+        handler.send_response(status)
+        for key, val in headers.items():
+            handler.send_header(key, val)
+        handler.send_header("Content-Length", str(len(data)))
+        handler.end_headers()
+        if handler.command == "HEAD":
+            return
+        for offset in range(0, len(data), self.chunk_size):
+            chunk = data[offset : offset + self.chunk_size]
+            if self.bandwidth:
+                time.sleep(len(chunk) / float(self.bandwidth))
+            handler.wfile.write(chunk)
+
+    def respond(self, method, path, body, headers):
+        """Build the response of a request
+
+        :returns: (status, headers dictionary, body bytes or dictionary)
+        """
+        raise NotImplementedError
+
+    def session_response(self, method, path):
+        """Fake session login/logout so no credentials need to be recorded or configured
+
+        :returns: response tuple, None when path is not a session request
+        """
+        key = normalize_path(path)
+        if method == "POST" and key == SESSIONS_PATH:
+            location = "/redfish/v1/SessionService/Sessions/replay/"
+            return (
+                201,
+                {"X-Auth-Token": SESSION_TOKEN, "Location": location},
+                {"@odata.id": location, "Id": "replay", "UserName": "replay"},
+            )
+        if method == "DELETE" and key.startswith(SESSIONS_PATH + "/"):
+            return 200, {}, {}
+        return None
+
+    def not_found(self, path):
+        """Redfish style 404 response"""
+        return (
+            404,
+            {},
+            {
+                "error": {
+                    "code": "iLO.0.10.ExtendedInfo",
+                    "message": "See @Message.ExtendedInfo for more information.",
+                    "@Message.ExtendedInfo": [
+                        {"MessageId": "Base.1.4.ResourceMissingAtURI", "MessageArgs": [path]}
+                    ],
+                }
+            },
+        )
+
+    def start(self):
+        """Serve from a background thread, returns the thread"""
+        thread = threading.Thread(target=self.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return thread
+
+
+class ReplayServer(RedfishServer):
+    """Serves a capture directory. Repeated requests of the same method and path get the
+    recorded responses in order, the last one is repeated once they run out."""
+
+    def __init__(self, directory, address, **kwargs):
+        RedfishServer.__init__(self, address, **kwargs)
+        self.directory = directory
+        self.exchanges = load_capture(directory)
+        self._served = {}
+        self._lock = threading.Lock()
+
+    def respond(self, method, path, body, headers):
+        key = (method, normalize_path(path))
+        exchanges = self.exchanges.get(key)
+        if not exchanges:
+            return self.session_response(method, path) or self.not_found(path)
+
+        with self._lock:
+            count = self._served.get(key, 0)
+            self._served[key] = count + 1
+        exchange = exchanges[min(count, len(exchanges) - 1)]
+
+        data = b""
+        if exchange["body"]:
+            with open(os.path.join(self.directory, exchange["body"]), "rb") as bodyfile:
+                data = bodyfile.read()
+        headers = dict(exchange["headers"])
+        if method == "POST" and normalize_path(path) == SESSIONS_PATH:
+            headers["X-Auth-Token"] = SESSION_TOKEN
+        return exchange["status"], headers, data
+
+
+def main():
+    """Replay server entry point"""
+    parser = argparse.ArgumentParser(description="Serve an iLOrest capture directory.")
+    parser.add_argument("directory", help="capture directory written by the record command")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=8443, help="port to listen on")
+    parser.add_argument("--latency", type=float, default=0.0, help="latency per request in ms")
+    parser.add_argument(
+        "--bandwidth", type=float, default=0.0, help="bandwidth limit in KiB/s, 0 for none"
+    )
+    parser.add_argument("--cert", help="TLS certificate file")
+    parser.add_argument("--key", help="TLS private key file")
+    parser.add_argument("--plain", action="store_true", help="serve plain HTTP")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log every request")
+    options = parser.parse_args()
+
+    tls = None
+    if not options.plain:
+        tls = (options.cert, options.key)
+        if not (options.cert and options.key):
+            tls = self_signed_cert(tempfile.mkdtemp(prefix="ilorest-replay-"))
+
+    server = ReplayServer(
+        options.directory,
+        (options.host, options.port),
+        latency=options.latency / 1000.0,
+        bandwidth=int(options.bandwidth * 1024),
+        tls=tls,
+        verbose=options.verbose,
+    )
+    sys.stdout.write("Serving %s on %s\n" % (options.directory, server.url))
+    sys.stdout.flush()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
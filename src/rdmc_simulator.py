@@ -0,0 +1,1637 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""Synthetic iLO 5 Redfish service for scale testing.
+
+IloSimulator generates a parameterized data model: any number of systems, array controllers
+and drives, IML/IEL/SL entries, BIOS attributes with their attribute registry and firmware
+inventory items. It supports $expand, Members@odata.nextLink ($skip/$top) or links.NextPage
+(?page=N) paging, ETags with If-None-Match/If-Match, PATCH of settings resources, LogService
+ClearLog and the HPE UpdateService states polled after a component upload. Logs can grow
+while the simulator runs (--log-interval), every new entry is announced as an event on the
+server-sent event stream of the EventService (--sse). AHS downloads answer byte range
+requests, --ahs-drop closes the first one early to exercise resuming.
+
+    python rdmc_simulator.py --systems 2 --drives 200 --iml 100000 --page-size 500
+    python rdmc.py serverlogs --selectlog=IML --url https://127.0.0.1:8443 -u user -p password
+
+Log entries are generated when they are requested so very large logs cost no memory. Any
+credentials are accepted.
+"""
+
+# ---------Imports---------
+
+import argparse
+import copy
+import datetime
+import json
+import re
+import sys
+import tempfile
+import threading
+import time
+import zlib
+
+try:
+    from urllib.parse import parse_qsl, urlencode
+except ImportError:
+    from urlparse import parse_qsl
+    from urllib import urlencode
+
+try:
+    from rdmc_replay import RedfishServer, normalize_path, self_signed_cert
+except ImportError:
+    from ilorest.rdmc_replay import RedfishServer, normalize_path, self_signed_cert
+
+# ---------End of imports---------
+
+ROOT = "/redfish/v1/"
+RESOURCE_DIRECTORY = "/redfish/v1/ResourceDirectory/"
+UPDATE_SERVICE = "/redfish/v1/UpdateService/"
+COMPONENT_REPOSITORY = "/redfish/v1/UpdateService/ComponentRepository/"
+PUSH_UPDATE_URI = "/cgi-bin/uploadFile"
+AHS_DATA = "/ahsdata/"
+SSE_PATH = "/redfish/v1/EventService/SSE/"
+# events kept for streams that are writing out older ones
+EVENT_BACKLOG = 1000
+
+MANAGER_TYPE = "iLO 5"
+MANAGER_FIRMWARE = "2.78"
+BIOS_REGISTRY = "BiosAttributeRegistryU32.v1_2_68"
+LOG_START = datetime.datetime(2024, 1, 1)
+
+# UpdateService states reported after an upload, one per poll before the final one
+UPDATE_STATES = ("Uploading", "Verifying", "Writing", "Updating")
+
+# properties the generated JSON schemas mark readonly
+READONLY_PROPERTIES = (
+    "@odata.context",
+    "@odata.etag",
+    "@odata.id",
+    "@odata.type",
+    "Actions",
+    "Id",
+    "Links",
+    "Members",
+    "Members@odata.count",
+    "Name",
+    "Status",
+)
+
+SUCCESS_MESSAGE = {
+    "error": {
+        "code": "iLO.0.10.ExtendedInfo",
+        "message": "See @Message.ExtendedInfo for more information.",
+        "@Message.ExtendedInfo": [{"MessageId": "Base.1.4.Success"}],
+    }
+}
+
+SEVERITIES = ("OK", "OK", "OK", "Warning", "Critical")
+
+
+def odata_link(path):
+    """Redfish link object
+
+    :param path: resource path
+    :type path: str.
+    """
+    return {"@odata.id": path}
+
+
+def merge(target, patch):
+    """Merge a PATCH body into a resource, nested objects are merged and everything else is
+    replaced
+
+    :param target: resource to update
+    :type target: dict.
+    :param patch: request body
+    :type patch: dict.
+    """
+    for key, val in patch.items():
+        if isinstance(val, dict) and isinstance(target.get(key), dict):
+            merge(target[key], val)
+        else:
+            target[key] = copy.deepcopy(val)
+
+
+class IloSimulator(RedfishServer):
+    """Serves a synthetic iLO 5 data model
+
+    :param address: (host, port) to listen on, port 0 picks a free port
+    :type address: tuple.
+    :param systems: number of computer systems
+    :type systems: int.
+    :param controllers: number of array controllers per system
+    :type controllers: int.
+    :param drives: number of drives per controller
+    :type drives: int.
+    :param iml: number of IML entries per system
+    :type iml: int.
+    :param iel: number of IEL entries
+    :type iel: int.
+    :param sl: number of security log entries per system
+    :type sl: int.
+    :param bios_attributes: number of BIOS attributes
+    :type bios_attributes: int.
+    :param firmware: number of firmware inventory items
+    :type firmware: int.
+    :param page_size: members per collection page, 0 returns whole collections
+    :type page_size: int.
+    :param paging: "nextlink" for Members@odata.nextLink or "nextpage" for links.NextPage
+    :type paging: str.
+    :param update_polls: UpdateService polls reporting a busy state after an upload
+    :type update_polls: int.
+    :param update_result: final UpdateService state after an upload, Complete or Error
+    :type update_result: str.
+    :param ahs_size: size of the AHS download in bytes
+    :type ahs_size: int.
+    :param sse: advertise and serve a server-sent event stream on the EventService
+    :type sse: bool.
+    :param ahs_drop: close the first AHS download after this many bytes, 0 to never
+    :type ahs_drop: int.
+    """
+
+    def __init__(
+        self,
+        address,
+        systems=1,
+        controllers=1,
+        drives=8,
+        iml=100,
+        iel=100,
+        sl=100,
+        bios_attributes=200,
+        firmware=20,
+        page_size=0,
+        paging="nextlink",
+        update_polls=2,
+        update_result="Complete",
+        ahs_size=1024 * 1024,
+        sse=False,
+        ahs_drop=0,
+        **kwargs
+    ):
+        RedfishServer.__init__(self, address, **kwargs)
+        self.page_size = page_size
+        self.paging = paging
+        self.update_polls = update_polls
+        self.update_result = update_result
+        self.ahs_size = ahs_size
+        self.sse = sse
+        self.ahs_drop = ahs_drop
+        self.resources = {}
+        self.logs = {}
+        self.instances = []
+        self.uploads = 0
+        self._versions = {}
+        self._update_states = []
+        self._ahs = None
+        self._lock = threading.RLock()
+        self._events = threading.Condition()
+        self._eventlog = []
+        self._eventid = 0
+
+        self.build_service(systems, iel)
+        for system in range(1, systems + 1):
+            self.build_system(system, controllers, drives, iml, sl, bios_attributes)
+        self.build_update_service(firmware)
+        self.build_registries()
+        self.build_resource_directory()
+
+    # ---------Data model---------
+
+    def add(self, path, odatatype, body=None, directory=True):
+        """Register a resource
+
+        :param path: resource path
+        :type path: str.
+        :param odatatype: @odata.type of the resource
+        :type odatatype: str.
+        :param body: resource properties
+        :type body: dict.
+        :param directory: list the resource in the ResourceDirectory
+        :type directory: bool.
+        :returns: the resource dictionary
+        """
+        resource = {"@odata.id": path, "@odata.type": odatatype}
+        if not odatatype.endswith("Collection"):
+            resource["Id"] = path.rstrip("/").split("/")[-1]
+        resource.update(body or {})
+        self.resources[normalize_path(path)] = resource
+        if directory:
+            self.instances.append(path)
+        return resource
+
+    def add_collection(self, path, odatatype, name, members, directory=True):
+        """Register a collection of member paths
+
+        :param path: collection path
+        :type path: str.
+        :param odatatype: @odata.type of the collection
+        :type odatatype: str.
+        :param name: collection name
+        :type name: str.
+        :param members: member paths
+        :type members: list.
+        :param directory: list the collection in the ResourceDirectory
+        :type directory: bool.
+        """
+        return self.add(
+            path,
+            odatatype,
+            {"Name": name, "Members": [odata_link(member) for member in members]},
+            directory=directory,
+        )
+
+    def add_log(self, service, name, logid, count, entryfunc):
+        """Register a LogService with count generated entries
+
+        :param service: LogService path
+        :type service: str.
+        :param name: log name
+        :type name: str.
+        :param logid: log Id
+        :type logid: str.
+        :param count: number of entries
+        :type count: int.
+        :param entryfunc: function returning the entry body of an index
+        :type entryfunc: function.
+        """
+        entries = service + "Entries/"
+        self.add(
+            service,
+            "#LogService.v1_0_0.LogService",
+            {
+                "Name": name,
+                "Id": logid,
+                "MaxNumberOfRecords": max(count, 1),
+                "OverWritePolicy": "WrapsWhenFull",
+                "Entries": odata_link(entries),
+                "Actions": {
+                    "#LogService.ClearLog": {
+                        "target": service + "Actions/LogService.ClearLog/"
+                    }
+                },
+            },
+        )
+        self.add(entries, "#LogEntryCollection.LogEntryCollection", {"Name": name + " Entries"})
+        self.logs[normalize_path(entries)] = [entries, count, entryfunc]
+
+    def build_service(self, systems, iel):
+        """Service root, managers, chassis and the account, session and event services"""
+        systempaths = ["/redfish/v1/Systems/%s/" % num for num in range(1, systems + 1)]
+        self.add(
+            ROOT,
+            "#ServiceRoot.v1_5_1.ServiceRoot",
+            {
+                "Name": "HPE RESTful Root Service",
+                "Id": "RootService",
+                "RedfishVersion": "1.6.0",
+                "UUID": "00000000-0000-4000-8000-000000000001",
+                "ProtocolFeaturesSupported": {
+                    "ExpandQuery": {
+                        "ExpandAll": False,
+                        "Levels": True,
+                        "Links": True,
+                        "MaxLevels": 1,
+                        "NoLinks": True,
+                    },
+                    "FilterQuery": True,
+                    "OnlyMemberQuery": True,
+                    "SelectQuery": False,
+                },
+                "Product": "ProLiant DL380 Gen10",
+                "Vendor": "HPE",
+                "Oem": {
+                    "Hpe": {
+                        "@odata.type": "#HpeiLOServiceExt.v2_3_0.HpeiLOServiceExt",
+                        "Manager": [
+                            {
+                                "ManagerType": MANAGER_TYPE,
+                                "ManagerFirmwareVersion": MANAGER_FIRMWARE,
+                                "HostName": "ilo-simulator",
+                            }
+                        ],
+                        "Moniker": {"PRODGEN": MANAGER_TYPE, "PRODNAM": "Integrated Lights-Out 5"},
+                        "Links": {"ResourceDirectory": odata_link(RESOURCE_DIRECTORY)},
+                    }
+                },
+                "AccountService": odata_link("/redfish/v1/AccountService/"),
+                "Chassis": odata_link("/redfish/v1/Chassis/"),
+                "EventService": odata_link("/redfish/v1/EventService/"),
+                "JsonSchemas": odata_link("/redfish/v1/JsonSchemas/"),
+                "Managers": odata_link("/redfish/v1/Managers/"),
+                "Registries": odata_link("/redfish/v1/Registries/"),
+                "SessionService": odata_link("/redfish/v1/SessionService/"),
+                "Systems": odata_link("/redfish/v1/Systems/"),
+                "UpdateService": odata_link(UPDATE_SERVICE),
+                "Links": {"Sessions": odata_link("/redfish/v1/SessionService/Sessions/")},
+            },
+            directory=False,
+        )
+        self.add_collection(
+            "/redfish/v1/Systems/",
+            "#ComputerSystemCollection.ComputerSystemCollection",
+            "Computer Systems",
+            systempaths,
+        )
+        self.add_collection(
+            "/redfish/v1/Chassis/",
+            "#ChassisCollection.ChassisCollection",
+            "Computer System Chassis",
+            ["/redfish/v1/Chassis/%s/" % num for num in range(1, systems + 1)],
+        )
+        for num in range(1, systems + 1):
+            self.add(
+                "/redfish/v1/Chassis/%s/" % num,
+                "#Chassis.v1_10_0.Chassis",
+                {
+                    "Name": "Computer System Chassis",
+                    "ChassisType": "RackMount",
+                    "SerialNumber": "SIM%07d" % num,
+                    "Status": {"Health": "OK", "State": "Enabled"},
+                },
+            )
+
+        self.add_collection(
+            "/redfish/v1/Managers/",
+            "#ManagerCollection.ManagerCollection",
+            "Managers",
+            ["/redfish/v1/Managers/1/"],
+        )
+        self.add(
+            "/redfish/v1/Managers/1/",
+            "#Manager.v1_5_1.Manager",
+            {
+                "Name": "Manager",
+                "ManagerType": "BMC",
+                "FirmwareVersion": "%s v%s" % (MANAGER_TYPE, MANAGER_FIRMWARE),
+                "Model": MANAGER_TYPE,
+                "Status": {"Health": "OK", "State": "Enabled"},
+                "LogServices": odata_link("/redfish/v1/Managers/1/LogServices/"),
+                "Links": {"ManagerForServers": [odata_link(path) for path in systempaths]},
+                "Oem": {
+                    "Hpe": {
+                        "@odata.type": "#HpeiLO.v2_7_1.HpeiLO",
+                        "Firmware": {
+                            "Current": {"VersionString": "%s v%s" % (MANAGER_TYPE, MANAGER_FIRMWARE)}
+                        },
+                        "Links": {
+                            "ActiveHealthSystem": odata_link(
+                                "/redfish/v1/Managers/1/ActiveHealthSystem/"
+                            )
+                        },
+                    }
+                },
+            },
+        )
+        self.add_collection(
+            "/redfish/v1/Managers/1/LogServices/",
+            "#LogServiceCollection.LogServiceCollection",
+            "Log Service Collection",
+            ["/redfish/v1/Managers/1/LogServices/IEL/"],
+        )
+        self.add_log(
+            "/redfish/v1/Managers/1/LogServices/IEL/",
+            "iLO Event Log",
+            "IEL",
+            iel,
+            self.iel_entry,
+        )
+        today = datetime.date.today()
+        self.add(
+            "/redfish/v1/Managers/1/ActiveHealthSystem/",
+            "#HpeiLOActiveHealthSystem.v2_5_0.HpeiLOActiveHealthSystem",
+            {
+                "Name": "HpeiLOActiveHealthSystem",
+                "AHSEnabled": True,
+                "AHSFileStart": str(today - datetime.timedelta(days=30)) + "T00:00:00Z",
+                "AHSFileEnd": str(today) + "T00:00:00Z",
+                "Actions": {
+                    "#HpeiLOActiveHealthSystem.ClearLog": {
+                        "target": "/redfish/v1/Managers/1/ActiveHealthSystem/Actions/"
+                        "HpeiLOActiveHealthSystem.ClearLog/"
+                    }
+                },
+                "Links": {
+                    "AHSLocation": {"extref": AHS_DATA + "HPE_SIM0000001_%s.ahs?downloadAll=1"
+                                    % today.strftime("%Y%m%d")}
+                },
+            },
+        )
+
+        self.add(
+            "/redfish/v1/AccountService/",
+            "#AccountService.v1_5_0.AccountService",
+            {
+                "Name": "Account Service",
+                "Accounts": odata_link("/redfish/v1/AccountService/Accounts/"),
+            },
+        )
+        self.add_collection(
+            "/redfish/v1/AccountService/Accounts/",
+            "#ManagerAccountCollection.ManagerAccountCollection",
+            "Accounts",
+            ["/redfish/v1/AccountService/Accounts/1/"],
+        )
+        self.add(
+            "/redfish/v1/AccountService/Accounts/1/",
+            "#ManagerAccount.v1_3_0.ManagerAccount",
+            {"Name": "User Account", "UserName": "Administrator", "RoleId": "Administrator"},
+        )
+        self.add(
+            "/redfish/v1/SessionService/",
+            "#SessionService.v1_0_0.SessionService",
+            {
+                "Name": "Session Service",
+                "Sessions": odata_link("/redfish/v1/SessionService/Sessions/"),
+            },
+        )
+        self.add_collection(
+            "/redfish/v1/SessionService/Sessions/",
+            "#SessionCollection.SessionCollection",
+            "Sessions",
+            [],
+        )
+        eventservice = self.add(
+            "/redfish/v1/EventService/",
+            "#EventService.v1_0_8.EventService",
+            {
+                "Name": "Event Service",
+                "ServiceEnabled": True,
+                "Subscriptions": odata_link("/redfish/v1/EventService/Subscriptions/"),
+            },
+        )
+        if self.sse:
+            eventservice["ServerSentEventUri"] = SSE_PATH
+        self.add_collection(
+            "/redfish/v1/EventService/Subscriptions/",
+            "#EventDestinationCollection.EventDestinationCollection",
+            "Event Subscriptions",
+            [],
+        )
+
+    def build_system(self, system, controllers, drives, iml, sl, bios_attributes):
+        """A computer system with its BIOS, storage and logs"""
+        path = "/redfish/v1/Systems/%s/" % system
+        biospath = "/redfish/v1/systems/%s/bios/" % system
+        self.add(
+            path,
+            "#ComputerSystem.v1_10_0.ComputerSystem",
+            {
+                "Name": "Computer System",
+                "Model": "ProLiant DL380 Gen10",
+                "Manufacturer": "HPE",
+                "SerialNumber": "SIM%07d" % system,
+                "SKU": "868703-B21",
+                "UUID": "00000000-0000-4000-8000-%012d" % system,
+                "HostName": "sim-host-%s" % system,
+                "PowerState": "On",
+                "BiosVersion": "U32 v2.80 (01/01/2024)",
+                "Status": {"Health": "OK", "HealthRollup": "OK", "State": "Enabled"},
+                "Boot": {
+                    "BootSourceOverrideEnabled": "Disabled",
+                    "BootSourceOverrideTarget": "None",
+                    "BootSourceOverrideTarget@Redfish.AllowableValues": [
+                        "None", "Cd", "Hdd", "Usb", "Utilities", "Pxe", "UefiShell", "UefiTarget",
+                    ],
+                },
+                "MemorySummary": {"TotalSystemMemoryGiB": 384, "Status": {"HealthRollup": "OK"}},
+                "ProcessorSummary": {"Count": 2, "Model": "Intel(R) Xeon(R) Gold 6230"},
+                "Bios": odata_link(biospath),
+                "LogServices": odata_link(path + "LogServices/"),
+                "Storage": odata_link(path + "Storage/"),
+                "Actions": {
+                    "#ComputerSystem.Reset": {
+                        "target": path + "Actions/ComputerSystem.Reset/",
+                        "ResetType@Redfish.AllowableValues": [
+                            "On", "ForceOff", "GracefulShutdown", "ForceRestart", "Nmi",
+                            "PushPowerButton",
+                        ],
+                    }
+                },
+                "Oem": {
+                    "Hpe": {
+                        "@odata.type": "#HpeComputerSystemExt.v2_9_0.HpeComputerSystemExt",
+                        "DeviceDiscoveryComplete": {
+                            "AMSDeviceDiscovery": "Complete",
+                            "DeviceDiscovery": "vMainDeviceDiscoveryComplete",
+                            "SmartArrayDiscovery": "Complete",
+                        },
+                        "PostState": "FinishedPost",
+                        "Links": {"SmartStorage": odata_link(path + "SmartStorage/")},
+                    }
+                },
+            },
+        )
+
+        attributes = dict(
+            (self.bios_attribute(num)["AttributeName"], self.bios_default(num))
+            for num in range(bios_attributes)
+        )
+        self.add(
+            biospath,
+            "#Bios.v1_0_0.Bios",
+            {
+                "Name": "BIOS Current Settings",
+                "AttributeRegistry": BIOS_REGISTRY,
+                "Attributes": attributes,
+                "@Redfish.Settings": {
+                    "@odata.type": "#Settings.v1_0_0.Settings",
+                    "SettingsObject": odata_link(biospath + "settings/"),
+                    "Time": "2024-01-01T00:00:00+00:00",
+                    "ETag": "00000000",
+                    "Messages": [{"MessageId": "Base.1.0.Success"}],
+                },
+                "Actions": {
+                    "#Bios.ResetBios": {"target": biospath + "Actions/Bios.ResetBios/"}
+                },
+            },
+        )
+        self.add(
+            biospath + "settings/",
+            "#Bios.v1_0_0.Bios",
+            {
+                "Name": "BIOS Pending Settings",
+                "AttributeRegistry": BIOS_REGISTRY,
+                "Attributes": dict(attributes),
+            },
+        )
+
+        self.add_collection(
+            path + "LogServices/",
+            "#LogServiceCollection.LogServiceCollection",
+            "System Logs",
+            [path + "LogServices/IML/", path + "LogServices/SL/"],
+        )
+        self.add_log(
+            path + "LogServices/IML/",
+            "Integrated Management Log",
+            "IML",
+            iml,
+            self.iml_entry,
+        )
+        self.add_log(path + "LogServices/SL/", "Security Log", "SL", sl, self.sl_entry)
+        self.build_storage(path, controllers, drives)
+
+    def build_storage(self, path, controllers, drives):
+        """HPE SmartStorage array controllers and the matching DMTF Storage resources"""
+        smart = path + "SmartStorage/"
+        arrays = smart + "ArrayControllers/"
+        storage = path + "Storage/"
+        self.add(
+            smart,
+            "#HpeSmartStorage.v2_0_0.HpeSmartStorage",
+            {
+                "Name": "HpeSmartStorage",
+                "Status": {"Health": "OK"},
+                "Links": {"ArrayControllers": odata_link(arrays)},
+            },
+        )
+        self.add_collection(
+            arrays,
+            "#HpeSmartStorageArrayControllerCollection.HpeSmartStorageArrayControllerCollection",
+            "HpeSmartStorageArrayControllers",
+            ["%s%s/" % (arrays, ctrl) for ctrl in range(controllers)],
+        )
+        self.add_collection(
+            storage,
+            "#StorageCollection.StorageCollection",
+            "Storage Systems",
+            ["%sDA%06d/" % (storage, ctrl) for ctrl in range(controllers)],
+        )
+
+        for ctrl in range(controllers):
+            location = "Slot %s" % (ctrl + 1)
+            ctrlpath = "%s%s/" % (arrays, ctrl)
+            diskdrives = ctrlpath + "DiskDrives/"
+            drivepaths = ["%s%s/" % (diskdrives, drive) for drive in range(drives)]
+            self.add(
+                ctrlpath,
+                "#HpeSmartStorageArrayController.v2_3_0.HpeSmartStorageArrayController",
+                {
+                    "Name": "HpeSmartStorageArrayController",
+                    "AdapterType": "SmartArray",
+                    "Description": "HPE Smart Storage Array Controller View",
+                    "Location": location,
+                    "LocationFormat": "PCISlot",
+                    "Model": "HPE Smart Array P816i-a SR Gen10",
+                    "SerialNumber": "PSIM%06d" % ctrl,
+                    "FirmwareVersion": {"Current": {"VersionString": "4.11"}},
+                    "ControllerBoard": {"Status": {"Health": "OK", "State": "Enabled"}},
+                    "Status": {"Health": "OK", "State": "Enabled"},
+                    "Links": {
+                        "LogicalDrives": odata_link(ctrlpath + "LogicalDrives/"),
+                        "PhysicalDrives": odata_link(diskdrives),
+                        "StorageEnclosures": odata_link(ctrlpath + "StorageEnclosures/"),
+                        "UnconfiguredDrives": odata_link(ctrlpath + "UnconfiguredDrives/"),
+                    },
+                },
+            )
+            self.add_collection(
+                ctrlpath + "LogicalDrives/",
+                "#HpeSmartStorageLogicalDriveCollection.HpeSmartStorageLogicalDriveCollection",
+                "HpeSmartStorageLogicalDrives",
+                [],
+            )
+            self.add_collection(
+                ctrlpath + "StorageEnclosures/",
+                "#HpeSmartStorageStorageEnclosureCollection."
+                "HpeSmartStorageStorageEnclosureCollection",
+                "HpeSmartStorageStorageEnclosures",
+                [],
+            )
+            self.add_collection(
+                diskdrives,
+                "#HpeSmartStorageDiskDriveCollection.HpeSmartStorageDiskDriveCollection",
+                "HpeSmartStorageDiskDrives",
+                drivepaths,
+            )
+            self.add_collection(
+                ctrlpath + "UnconfiguredDrives/",
+                "#HpeSmartStorageDiskDriveCollection.HpeSmartStorageDiskDriveCollection",
+                "HpeSmartStorageDiskDrives",
+                drivepaths,
+            )
+
+            configpath = "%ssmartstorageconfig%s/" % (path.lower(), ctrl or "")
+            config = {
+                "Name": "SmartStorageConfig",
+                "Location": location,
+                "LocationFormat": "PCISlot",
+                "DataGuard": "Disabled",
+                "LogicalDrives": [],
+                "PhysicalDrives": [
+                    {"Location": "%sI:1:%s" % (ctrl + 1, drive + 1), "LegacyBootPriority": "None"}
+                    for drive in range(drives)
+                ],
+                "@Redfish.Settings": {
+                    "SettingsObject": odata_link(configpath + "settings/"),
+                    "Messages": [{"MessageId": "Base.1.0.Success"}],
+                },
+            }
+            self.add(configpath, "#SmartStorageConfig.v2_0_9.SmartStorageConfig", config)
+            self.add(
+                configpath + "settings/",
+                "#SmartStorageConfig.v2_0_9.SmartStorageConfig",
+                dict((key, val) for key, val in config.items() if key != "@Redfish.Settings"),
+            )
+
+            storagepath = "%sDA%06d/" % (storage, ctrl)
+            self.add(
+                storagepath,
+                "#Storage.v1_7_1.Storage",
+                {
+                    "Name": "HPE Smart Array P816i-a SR Gen10",
+                    "Status": {"Health": "OK", "HealthRollup": "OK", "State": "Enabled"},
+                    "Drives": [
+                        odata_link("%sDrives/%s/" % (storagepath, drive)) for drive in range(drives)
+                    ],
+                    "Volumes": odata_link(storagepath + "Volumes/"),
+                    "Controllers": odata_link(storagepath + "Controllers/"),
+                },
+            )
+            self.add_collection(
+                storagepath + "Volumes/",
+                "#VolumeCollection.VolumeCollection",
+                "Volumes",
+                [],
+            )
+            self.add_collection(
+                storagepath + "Controllers/",
+                "#StorageControllerCollection.StorageControllerCollection",
+                "Storage Controllers",
+                [storagepath + "Controllers/0/"],
+            )
+            self.add(
+                storagepath + "Controllers/0/",
+                "#StorageController.v1_0_0.StorageController",
+                {
+                    "Name": "HPE Smart Array P816i-a SR Gen10",
+                    "Location": {"PartLocation": {"ServiceLabel": location}},
+                    "Model": "HPE Smart Array P816i-a SR Gen10",
+                    "FirmwareVersion": "4.11",
+                    "Status": {"Health": "OK", "State": "Enabled"},
+                },
+            )
+
+            for drive in range(drives):
+                bay = "%sI:1:%s" % (ctrl + 1, drive + 1)
+                common = {
+                    "Model": "MB004000JWFVN" if drive % 2 else "VK000960GWSXH",
+                    "MediaType": "HDD" if drive % 2 else "SSD",
+                    "SerialNumber": "DSIM%04d%06d" % (ctrl, drive),
+                    "CapacityMiB": 3815447 if drive % 2 else 915715,
+                    "Status": {"Health": "OK", "State": "Enabled"},
+                }
+                smartdrive = dict(common)
+                smartdrive.update(
+                    {
+                        "Name": "HpeSmartStorageDiskDrive",
+                        "Location": bay,
+                        "LocationFormat": "ControllerPort:Box:Bay",
+                        "InterfaceType": "SAS",
+                        "FirmwareVersion": {"Current": {"VersionString": "HPD3"}},
+                        "DiskDriveUse": "Raw",
+                    }
+                )
+                self.add(
+                    drivepaths[drive],
+                    "#HpeSmartStorageDiskDrive.v2_1_0.HpeSmartStorageDiskDrive",
+                    smartdrive,
+                )
+                dmtfdrive = dict(common)
+                dmtfdrive.update(
+                    {
+                        "Name": "Drive %s" % bay,
+                        "Protocol": "SAS",
+                        "CapacityBytes": common["CapacityMiB"] * 1024 * 1024,
+                        "PhysicalLocation": {"PartLocation": {"ServiceLabel": bay}},
+                    }
+                )
+                self.add(
+                    "%sDrives/%s/" % (storagepath, drive),
+                    "#Drive.v1_7_0.Drive",
+                    dmtfdrive,
+                )
+
+    def build_update_service(self, firmware):
+        """UpdateService with its firmware inventory, component repository and task queue"""
+        inventory = UPDATE_SERVICE + "FirmwareInventory/"
+        self.add(
+            UPDATE_SERVICE,
+            "#UpdateService.v1_1_1.UpdateService",
+            {
+                "Name": "Update Service",
+                "ServiceEnabled": True,
+                "HttpPushUri": PUSH_UPDATE_URI,
+                "FirmwareInventory": odata_link(inventory),
+                "SoftwareInventory": odata_link(UPDATE_SERVICE + "SoftwareInventory/"),
+                "Actions": {
+                    "#UpdateService.SimpleUpdate": {
+                        "target": UPDATE_SERVICE + "Actions/UpdateService.SimpleUpdate/"
+                    }
+                },
+                "Oem": {
+                    "Hpe": {
+                        "@odata.type": "#HpeiLOUpdateServiceExt.v2_1_4.HpeiLOUpdateServiceExt",
+                        "State": "Idle",
+                        "FlashProgressPercent": 0,
+                        "PushUpdateUri": PUSH_UPDATE_URI,
+                        "ComponentRepository": odata_link(COMPONENT_REPOSITORY),
+                        "UpdateTaskQueue": odata_link(UPDATE_SERVICE + "UpdateTaskQueue/"),
+                        "InstallSets": odata_link(UPDATE_SERVICE + "InstallSets/"),
+                        "Capabilities": {"UpdateFWPKG": True},
+                    }
+                },
+            },
+        )
+        self.add_collection(
+            inventory,
+            "#SoftwareInventoryCollection.SoftwareInventoryCollection",
+            "Firmware Inventory Collection",
+            ["%s%s/" % (inventory, item) for item in range(1, firmware + 1)],
+        )
+        for item in range(1, firmware + 1):
+            self.add(
+                "%s%s/" % (inventory, item),
+                "#SoftwareInventory.v1_0_0.SoftwareInventory",
+                {
+                    "Name": "Simulated Device %s" % item,
+                    "Description": "SystemRomActive" if item == 1 else "Device",
+                    "Version": "%s.%s.%s" % (item % 7 + 1, item % 13, item),
+                    "Updateable": item % 5 != 0,
+                    "Status": {"Health": "OK", "State": "Enabled"},
+                    "Oem": {
+                        "Hpe": {
+                            "@odata.type": "#HpeiLOSoftwareInventory.v2_0_0."
+                            "HpeiLOSoftwareInventory",
+                            "DeviceClass": "%08x-0000-0000-0000-000000000000" % item,
+                            "DeviceContext": "Slot %s" % item,
+                            "Targets": ["%08x-0000-0000-0000-000000000000" % item],
+                        }
+                    },
+                },
+            )
+        self.add_collection(
+            UPDATE_SERVICE + "SoftwareInventory/",
+            "#SoftwareInventoryCollection.SoftwareInventoryCollection",
+            "Software Inventory Collection",
+            [],
+        )
+        self.add_collection(
+            COMPONENT_REPOSITORY,
+            "#HpeComponentCollection.HpeComponentCollection",
+            "Component Collection",
+            [],
+        )
+        self.add_collection(
+            UPDATE_SERVICE + "UpdateTaskQueue/",
+            "#HpeComponentUpdateTaskQueueCollection.HpeComponentUpdateTaskQueueCollection",
+            "Update Task Queue",
+            [],
+        )
+        self.add_collection(
+            UPDATE_SERVICE + "InstallSets/",
+            "#HpeComponentInstallSetCollection.HpeComponentInstallSetCollection",
+            "Install Sets",
+            [],
+        )
+
+    def build_registries(self):
+        """BIOS attribute registry, a Base message registry and the registry collection. The
+        JSON schemas are generated from the data model when they are requested."""
+        registry = "/redfish/v1/RegistryStore/registries/en/%s/" % BIOS_REGISTRY
+        self.add(
+            registry,
+            "#AttributeRegistry.v1_3_0.AttributeRegistry",
+            {
+                "Name": "BIOS Attribute Registry",
+                "Id": BIOS_REGISTRY,
+                "Language": "en",
+                "OwningEntity": "HPE",
+                "RegistryVersion": "1.2.68",
+                "SupportedSystems": [{"ProductName": "ProLiant DL380 Gen10", "SystemId": "U32"}],
+                "RegistryEntries": {"Attributes": [], "Dependencies": [], "Menus": []},
+            },
+            directory=False,
+        )
+        self.resources[normalize_path(registry)]["RegistryEntries"]["Attributes"] = [
+            self.bios_attribute(num)
+            for num in range(
+                len(self.resources[normalize_path("/redfish/v1/systems/1/bios/")]["Attributes"])
+            )
+        ]
+        base = "/redfish/v1/RegistryStore/registries/en/Base.1.4.0/"
+        self.add(
+            base,
+            "#MessageRegistry.v1_0_0.MessageRegistry",
+            {
+                "Name": "Base Message Registry",
+                "Id": "Base.1.4.0",
+                "Language": "en",
+                "RegistryPrefix": "Base",
+                "RegistryVersion": "1.4.0",
+                "OwningEntity": "DMTF",
+                "Messages": {
+                    "Success": {
+                        "Description": "Indicates that all conditions of a successful operation "
+                        "have been met.",
+                        "Message": "Successfully Completed Request",
+                        "NumberOfArgs": 0,
+                        "Resolution": "None",
+                        "Severity": "OK",
+                    },
+                    "ResourceMissingAtURI": {
+                        "Description": "Indicates that the operation expected an image or other "
+                        "resource at the provided URI but none was found.",
+                        "Message": "The resource at the URI %1 was not found.",
+                        "NumberOfArgs": 1,
+                        "ParamTypes": ["string"],
+                        "Resolution": "Place a valid resource at the URI or correct the URI "
+                        "and resubmit the request.",
+                        "Severity": "Critical",
+                    },
+                    "PreconditionFailed": {
+                        "Description": "Indicates that the ETag supplied did not match the "
+                        "ETag required to change this resource.",
+                        "Message": "The ETag supplied did not match the ETag required to "
+                        "change this resource.",
+                        "NumberOfArgs": 0,
+                        "Resolution": "Try the operation again using the appropriate ETag.",
+                        "Severity": "Critical",
+                    },
+                },
+            },
+            directory=False,
+        )
+        members = []
+        for name, location in ((BIOS_REGISTRY, registry), ("Base.1.4.0", base)):
+            path = "/redfish/v1/Registries/%s/" % name
+            self.add(
+                path,
+                "#MessageRegistryFile.v1_0_0.MessageRegistryFile",
+                {
+                    "Name": name + " Registry File",
+                    "Registry": name,
+                    "Languages": ["en"],
+                    "Location": [{"Language": "en", "Uri": location}],
+                },
+                directory=False,
+            )
+            members.append(path)
+        self.add_collection(
+            "/redfish/v1/Registries/",
+            "#MessageRegistryFileCollection.MessageRegistryFileCollection",
+            "Registry File Collection",
+            members,
+            directory=False,
+        )
+
+    def schema_collection(self):
+        """JSON schema files of every type in the data model"""
+        types = sorted(
+            set(
+                resource["@odata.type"]
+                for resource in self.resources.values()
+                if not resource["@odata.type"].endswith("Collection")
+            )
+        )
+        members = []
+        for odatatype in types:
+            name = odatatype.strip("#").rsplit(".", 1)[0]
+            members.append(
+                {
+                    "@odata.id": "/redfish/v1/JsonSchemas/%s/" % name,
+                    "@odata.type": "#JsonSchemaFile.v1_0_4.JsonSchemaFile",
+                    "Id": name,
+                    "Name": name + " Schema File",
+                    "Schema": odatatype,
+                    "Languages": ["en"],
+                    "Location": [
+                        {"Language": "en", "Uri": "/redfish/v1/SchemaStore/en/%s.json/" % name}
+                    ],
+                }
+            )
+        return {
+            "@odata.id": "/redfish/v1/JsonSchemas/",
+            "@odata.type": "#JsonSchemaFileCollection.JsonSchemaFileCollection",
+            "Name": "JSON Schemas",
+            "Members": members,
+            "Members@odata.count": len(members),
+        }
+
+    def schema(self, name):
+        """A JSON schema of one type, the properties of its first resource with the generic
+        readonly ones marked
+
+        :param name: type name with version, e.g. Bios.v1_0_0
+        :type name: str.
+        """
+        odatatype = "#%s.%s" % (name, name.split(".")[0])
+        sample = next(
+            (res for res in self.resources.values() if res["@odata.type"] == odatatype), None
+        )
+        if sample is None:
+            return None
+        properties = {}
+        for key, val in sample.items():
+            jsontype = {bool: "boolean", int: "integer", float: "number", dict: "object",
+                        list: "array"}.get(type(val), "string")
+            properties[key] = {"type": jsontype, "readonly": key in READONLY_PROPERTIES}
+            if key == "Attributes":
+                properties[key]["readonly"] = False
+        return {
+            "$schema": "http://json-schema.org/draft-04/schema#",
+            "@odata.type": "#JsonSchemaFile.v1_0_4.JsonSchemaFile",
+            "title": odatatype,
+            "type": "object",
+            "properties": properties,
+        }
+
+    def build_resource_directory(self):
+        """ResourceDirectory listing every instance with its type and ETag"""
+        self.add(
+            RESOURCE_DIRECTORY,
+            "#HpeiLOResourceDirectory.v2_0_0.HpeiLOResourceDirectory",
+            {"Name": "iLO Resource Directory", "Instances": []},
+            directory=False,
+        )
+
+    def directory_instances(self):
+        """ResourceDirectory Instances with the current ETags"""
+        instances = []
+        for path in self.instances:
+            key = normalize_path(path)
+            if key in self.resources:
+                instances.append(
+                    {
+                        "@odata.id": path,
+                        "@odata.type": self.resources[key]["@odata.type"],
+                        "ETag": self.etag(key),
+                    }
+                )
+        return instances
+
+    # ---------Generated content---------
+
+    @staticmethod
+    def bios_attribute(num):
+        """BIOS attribute registry entry number num, enumeration, integer and string attributes
+        in turn"""
+        name = "SimAttribute%05d" % num
+        entry = {
+            "AttributeName": name,
+            "DisplayName": "Simulated attribute %s" % num,
+            "HelpText": "Synthetic BIOS setting %s used for scale testing." % num,
+            "ReadOnly": False,
+            "IsSystemUniqueProperty": False,
+        }
+        kind = num % 3
+        if kind == 0:
+            entry.update(
+                {
+                    "Type": "Enumeration",
+                    "Value": [
+                        {"ValueName": "Enabled", "ValueDisplayName": "Enabled"},
+                        {"ValueName": "Disabled", "ValueDisplayName": "Disabled"},
+                    ],
+                }
+            )
+        elif kind == 1:
+            entry.update({"Type": "Integer", "LowerBound": 0, "UpperBound": 1000, "ScalarIncrement": 1})
+        else:
+            entry.update({"Type": "String", "MinLength": 0, "MaxLength": 64})
+        return entry
+
+    @staticmethod
+    def bios_default(num):
+        """Current value of BIOS attribute number num"""
+        kind = num % 3
+        if kind == 0:
+            return "Enabled" if num % 2 else "Disabled"
+        if kind == 1:
+            return num % 1000
+        return "value-%s" % num
+
+    @staticmethod
+    def created(index):
+        """Timestamp of log entry index, one entry a minute"""
+        return (LOG_START + datetime.timedelta(minutes=index)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    def iml_entry(self, path, index):
+        """IML entry number index"""
+        return {
+            "@odata.id": path,
+            "@odata.type": "#LogEntry.v1_0_0.LogEntry",
+            "Id": str(index),
+            "Name": "Integrated Management Log",
+            "Created": self.created(index),
+            "EntryType": "Oem",
+            "OemRecordFormat": "Hpe-IML",
+            "Message": "Simulated system event %s: POST error or status change." % index,
+            "Severity": SEVERITIES[index % len(SEVERITIES)],
+            "Oem": {
+                "Hpe": {
+                    "@odata.type": "#HpeLogEntry.v2_1_0.HpeLogEntry",
+                    "Categories": ["Hardware"],
+                    "Class": index % 64,
+                    "ClassDescription": "System Revision",
+                    "Code": index % 256,
+                    "Count": 1,
+                    "EventNumber": index,
+                    "RecordId": index,
+                    "Repaired": False,
+                    "Updated": self.created(index),
+                }
+            },
+        }
+
+    def iel_entry(self, path, index):
+        """IEL entry number index"""
+        return {
+            "@odata.id": path,
+            "@odata.type": "#LogEntry.v1_0_0.LogEntry",
+            "Id": str(index),
+            "Name": "iLO Event Log",
+            "Created": self.created(index),
+            "EntryType": "Oem",
+            "OemRecordFormat": "Hpe-iLOEventLog",
+            "Message": "Browser login: user%s - 127.0.0.1(localhost)." % (index % 16),
+            "Severity": SEVERITIES[index % len(SEVERITIES)],
+            "Oem": {
+                "Hpe": {
+                    "@odata.type": "#HpeLogEntry.v2_1_0.HpeLogEntry",
+                    "Class": 32,
+                    "Code": index % 512,
+                    "Count": 1,
+                    "EventNumber": index,
+                    "Updated": self.created(index),
+                }
+            },
+        }
+
+    def sl_entry(self, path, index):
+        """Security log entry number index"""
+        return {
+            "@odata.id": path,
+            "@odata.type": "#LogEntry.v1_11_0.LogEntry",
+            "Id": str(index),
+            "Name": "Security Log",
+            "Created": self.created(index),
+            "EntryType": "Oem",
+            "OemRecordFormat": "Hpe-SL",
+            "Message": "Security state change %s." % index,
+            "Severity": SEVERITIES[index % len(SEVERITIES)],
+            "Oem": {
+                "Hpe": {
+                    "@odata.type": "#HpeLogEntry.v2_3_0.HpeLogEntry",
+                    "Count": 1,
+                    "EventNumber": index,
+                    "Updated": self.created(index),
+                }
+            },
+        }
+
+    def ahs_data(self):
+        """Deterministic AHS download content"""
+        if self._ahs is None:
+            block = bytes(bytearray(range(256))) * 256
+            self._ahs = (block * (self.ahs_size // len(block) + 1))[: self.ahs_size]
+        return self._ahs
+
+    def grow_logs(self, interval):
+        """Add an entry to every log each interval seconds, forever
+
+        :param interval: seconds between new entries
+        :type interval: float.
+        """
+        while True:
+            time.sleep(interval)
+            with self._lock:
+                for key, log in self.logs.items():
+                    log[1] += 1
+                    self.touch(key)
+                    self.publish("%s%s/" % (log[0], log[1]), self.created(log[1]))
+
+    def publish(self, origin, timestamp):
+        """Announce a new log entry on the event streams
+
+        :param origin: path of the new entry
+        :type origin: str.
+        :param timestamp: creation time of the new entry
+        :type timestamp: str.
+        """
+        with self._events:
+            self._eventid += 1
+            self._eventlog.append(
+                {
+                    "@odata.type": "#Event.v1_0_0.Event",
+                    "Id": str(self._eventid),
+                    "Name": "Events",
+                    "Events": [
+                        {
+                            "EventType": "Alert",
+                            "EventId": str(self._eventid),
+                            "EventTimestamp": timestamp,
+                            "MessageId": "iLOEvents.2.3.ServerPoweredOn",
+                            "OriginOfCondition": odata_link(origin),
+                        }
+                    ],
+                }
+            )
+            del self._eventlog[:-EVENT_BACKLOG]
+            self._events.notify_all()
+
+    # ---------Request handling---------
+
+    def handle_request_for(self, handler):
+        """Stream events on the SSE path, answer everything else in one response"""
+        if (
+            self.sse
+            and handler.command == "GET"
+            and normalize_path(handler.path.partition("?")[0]) == normalize_path(SSE_PATH)
+        ):
+            return self.stream_events(handler)
+        if (
+            self.ahs_drop
+            and handler.command == "GET"
+            and normalize_path(handler.path).startswith(normalize_path(AHS_DATA))
+        ):
+            drop, self.ahs_drop = self.ahs_drop, 0
+            return self.drop_response(handler, drop)
+        return RedfishServer.handle_request_for(self, handler)
+
+    def drop_response(self, handler, size):
+        """Send the headers of a response and the first size bytes of its body, then close
+        the connection like a network failure would"""
+        status, headers, data = self.respond(
+            handler.command, handler.path, b"", handler.headers
+        )
+        handler.send_response(status)
+        for key, val in headers.items():
+            handler.send_header(key, val)
+        handler.send_header("Content-Length", str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data[:size])
+        handler.wfile.flush()
+        handler.close_connection = True
+
+    def stream_events(self, handler):
+        """Write the events published after the request until the client goes away, with a
+        comment line every 15 seconds to notice closed connections"""
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Cache-Control", "no-cache")
+        handler.send_header("Connection", "close")
+        handler.end_headers()
+        handler.close_connection = True
+        with self._events:
+            seen = self._eventid
+        try:
+            while True:
+                with self._events:
+                    self._events.wait_for(lambda: self._eventid > seen, timeout=15)
+                    events = [
+                        event for event in self._eventlog if int(event["Id"]) > seen
+                    ]
+                    seen = self._eventid
+                data = "".join(
+                    "id: %s\ndata: %s\n\n" % (event["Id"], json.dumps(event))
+                    for event in events
+                )
+                handler.wfile.write((data or ": keepalive\n\n").encode("utf-8"))
+                handler.wfile.flush()
+        except (IOError, OSError):
+            return
+
+    def etag(self, key, params=None):
+        """Weak ETag of a resource, changes whenever the resource is modified. Each page of
+        a collection, given by the query params, has an ETag of its own."""
+        version = "%s:%s" % (key, self._versions.get(key, 0))
+        if params:
+            version += "?" + "&".join("%s=%s" % item for item in sorted(params.items()))
+        return 'W/"%08X"' % (zlib.crc32(version.encode("utf-8")) & 0xFFFFFFFF)
+
+    def touch(self, key):
+        """Mark a resource modified"""
+        self._versions[key] = self._versions.get(key, 0) + 1
+
+    def log_entry(self, key):
+        """Generated log entry of a path, None when the path is not a log entry"""
+        entries, _, index = key.rpartition("/")
+        log = self.logs.get(entries)
+        if log is None or not index.isdigit() or not 0 < int(index) <= log[1]:
+            return None
+        return log[2]("%s%s/" % (log[0], index), int(index))
+
+    def lookup(self, key):
+        """Current body of a resource, None when it does not exist"""
+        if key == normalize_path(RESOURCE_DIRECTORY):
+            resource = dict(self.resources[key])
+            resource["Instances"] = self.directory_instances()
+            return resource
+        if key == "/redfish/v1/jsonschemas":
+            return self.schema_collection()
+        if key.startswith("/redfish/v1/schemastore/en/"):
+            name = key.split("/")[-1]
+            return self.schema(name[:-5] if name.endswith(".json") else name)
+        if key.startswith("/redfish/v1/jsonschemas/"):
+            return next(
+                (
+                    member
+                    for member in self.schema_collection()["Members"]
+                    if normalize_path(member["@odata.id"]) == key
+                ),
+                None,
+            )
+        if key in self.logs:
+            entries, count, _ = self.logs[key]
+            resource = dict(self.resources[key])
+            resource["Members"] = [
+                odata_link("%s%s/" % (entries, index)) for index in range(1, count + 1)
+            ]
+            return resource
+        if key in self.resources:
+            return copy.deepcopy(self.resources[key])
+        return self.log_entry(key)
+
+    def page(self, path, resource, params):
+        """Expand and page the Members of a collection
+
+        :param path: request path without query
+        :type path: str.
+        :param resource: collection body
+        :type resource: dict.
+        :param params: query parameters
+        :type params: dict.
+        """
+        members = resource["Members"]
+        total = len(members)
+        resource["Members@odata.count"] = total
+
+        if self.paging == "nextpage" and "page" in params:
+            pagesize = self.page_size or total
+            pagenum = max(int(params["page"]), 1)
+            skip, top = (pagenum - 1) * pagesize, pagesize
+        else:
+            skip = int(params.get("$skip", 0))
+            top = int(params.get("$top", 0) or self.page_size or total)
+        if skip or top < total:
+            members = members[skip : skip + top]
+            if skip + top < total:
+                if self.paging == "nextpage":
+                    resource.setdefault("links", {})["NextPage"] = {
+                        "page": (skip // max(top, 1)) + 2
+                    }
+                else:
+                    query = dict(
+                        (key, val) for key, val in params.items() if key not in ("$skip",)
+                    )
+                    query["$skip"] = skip + top
+                    resource["Members@odata.nextLink"] = "%s?%s" % (
+                        path,
+                        urlencode(sorted(query.items()), safe="$.*~"),
+                    )
+
+        if params.get("$expand") in (".", "*", "~"):
+            expanded = []
+            for member in members:
+                body = self.lookup(normalize_path(member["@odata.id"]))
+                expanded.append(body if body is not None else member)
+            members = expanded
+        resource["Members"] = members
+        return resource
+
+    def respond(self, method, path, body, headers):
+        session = self.session_response(method, path)
+        if session:
+            return session
+
+        urlpath, _, query = path.partition("?")
+        key = normalize_path(urlpath)
+        params = dict(parse_qsl(query, keep_blank_values=True))
+
+        if key.startswith(normalize_path(AHS_DATA)) and method in ("GET", "HEAD"):
+            return self.respond_ahs(headers)
+        if method in ("GET", "HEAD"):
+            return self.respond_get(urlpath, key, params, headers)
+        try:
+            request = json.loads(body.decode("utf-8")) if body else {}
+        except ValueError:
+            request = {}
+        with self._lock:
+            if method == "POST":
+                return self.respond_post(urlpath, key, body, request, headers)
+            if method in ("PATCH", "PUT"):
+                return self.respond_update(method, urlpath, key, request, headers)
+            if method == "DELETE":
+                return self.respond_delete(urlpath, key)
+        return 405, {}, {}
+
+    def respond_ahs(self, headers):
+        """AHS download, the requested byte range while If-Range matches the file"""
+        data = self.ahs_data()
+        etag = '"ahs-%x"' % len(data)
+        reply = {"Content-Type": "application/octet-stream", "ETag": etag}
+        match = re.match(r"bytes=(\d+)-(\d*)$", headers.get("Range") or "")
+        if not match or headers.get("If-Range") not in (None, etag):
+            return 200, reply, data
+        start = int(match.group(1))
+        if start >= len(data):
+            return 416, {"Content-Range": "bytes */%s" % len(data)}, b""
+        end = min(int(match.group(2) or len(data) - 1), len(data) - 1)
+        reply["Content-Range"] = "bytes %s-%s/%s" % (start, end, len(data))
+        return 206, reply, data[start : end + 1]
+
+    def respond_get(self, urlpath, key, params, headers):
+        """GET and HEAD requests"""
+        with self._lock:
+            if key == normalize_path(UPDATE_SERVICE) and self._update_states:
+                self.resources[key]["Oem"]["Hpe"]["State"] = self._update_states.pop(0)
+                self.touch(key)
+            resource = self.lookup(key)
+        if resource is None:
+            return self.not_found(urlpath)
+
+        collection = isinstance(resource.get("Members"), list)
+        etag = self.etag(key, params if collection else None)
+        if headers.get("If-None-Match") == etag:
+            return 304, {"ETag": etag}, b""
+        if collection:
+            resource = self.page(urlpath, resource, params)
+        if key in self.resources:
+            resource["@odata.etag"] = etag
+        return 200, {"ETag": etag}, resource
+
+    def respond_update(self, method, urlpath, key, request, headers):
+        """PATCH and PUT requests"""
+        if key not in self.resources:
+            return self.not_found(urlpath)
+        if headers.get("If-Match") not in (None, "*", self.etag(key)):
+            return (
+                412,
+                {},
+                {
+                    "error": {
+                        "code": "iLO.0.10.ExtendedInfo",
+                        "message": "See @Message.ExtendedInfo for more information.",
+                        "@Message.ExtendedInfo": [{"MessageId": "Base.1.4.PreconditionFailed"}],
+                    }
+                },
+            )
+        resource = self.resources[key]
+        if method == "PUT":
+            kept = dict((prop, resource[prop]) for prop in ("@odata.id", "@odata.type", "Id")
+                        if prop in resource)
+            resource.clear()
+            resource.update(request)
+            resource.update(kept)
+        else:
+            merge(resource, request)
+        self.touch(key)
+        return 200, {"ETag": self.etag(key)}, SUCCESS_MESSAGE
+
+    def respond_post(self, urlpath, key, body, request, headers):
+        """POST requests: component uploads, actions and new collection members"""
+        if key == normalize_path(PUSH_UPDATE_URI):
+            return self.upload(body, headers)
+        if key.endswith("/actions/logservice.clearlog"):
+            entries = normalize_path(key.split("/actions/")[0] + "/Entries")
+            if entries in self.logs:
+                self.logs[entries][1] = 0
+                self.touch(entries)
+                return 200, {}, SUCCESS_MESSAGE
+            return self.not_found(urlpath)
+        if "/actions/" in key:
+            return 200, {}, SUCCESS_MESSAGE
+
+        collection = self.resources.get(key)
+        if collection is None or not isinstance(collection.get("Members"), list):
+            return 405, {}, {}
+        number = len(collection["Members"]) + 1
+        memberpath = "%s/%s/" % (collection["@odata.id"].rstrip("/"), number)
+        while normalize_path(memberpath) in self.resources:
+            number += 1
+            memberpath = "%s/%s/" % (collection["@odata.id"].rstrip("/"), number)
+        membertype = collection["@odata.type"].split(".")[0].replace("Collection", "")
+        member = self.add(memberpath, "%s.v1_0_0.%s" % (membertype, membertype.strip("#")))
+        member.update(request)
+        collection["Members"].append(odata_link(memberpath))
+        self.touch(key)
+        return 201, {"Location": memberpath}, member
+
+    def respond_delete(self, urlpath, key):
+        """DELETE requests remove the resource and its collection link"""
+        if key not in self.resources:
+            return self.not_found(urlpath)
+        resource = self.resources.pop(key)
+        parent = normalize_path(resource["@odata.id"].rstrip("/").rpartition("/")[0])
+        collection = self.resources.get(parent)
+        if collection and isinstance(collection.get("Members"), list):
+            collection["Members"] = [
+                member
+                for member in collection["Members"]
+                if normalize_path(member["@odata.id"]) != key
+            ]
+            self.touch(parent)
+        return 200, {}, SUCCESS_MESSAGE
+
+    def upload(self, body, headers):
+        """Component upload: add the file to the ComponentRepository and queue the UpdateService
+        states reported to the following polls"""
+        match = re.search(br'name="file"; filename="([^"]+)"', body)
+        if not match:
+            return 400, {}, {}
+        filename = match.group(1).decode("utf-8")
+        self.uploads += 1
+
+        repository = self.resources[normalize_path(COMPONENT_REPOSITORY)]
+        known = [self.resources.get(normalize_path(member["@odata.id"]), {}).get("Filename")
+                 for member in repository["Members"]]
+        if filename not in known:
+            path = "%s%s/" % (COMPONENT_REPOSITORY, "%08x" % zlib.crc32(filename.encode("utf-8")))
+            self.add(
+                path,
+                "#HpeComponent.v1_0_1.HpeComponent",
+                {
+                    "Name": filename,
+                    "Filename": filename,
+                    "Filepath": filename,
+                    "ComponentUri": "/fwrepo/" + filename,
+                    "Version": "1.0.0",
+                    "Locked": False,
+                    "SizeBytes": len(body),
+                    "Created": datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+                },
+            )
+            repository["Members"].append(odata_link(path))
+            self.touch(normalize_path(COMPONENT_REPOSITORY))
+
+        states = [UPDATE_STATES[num % len(UPDATE_STATES)] for num in range(self.update_polls)]
+        self._update_states = states + [self.update_result]
+        return 200, {}, SUCCESS_MESSAGE
+
+
+def main():
+    """Simulator entry point"""
+    parser = argparse.ArgumentParser(description="Serve a synthetic iLO 5 Redfish service.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=8443, help="port to listen on")
+    parser.add_argument("--systems", type=int, default=1, help="number of systems")
+    parser.add_argument("--controllers", type=int, default=1, help="array controllers per system")
+    parser.add_argument("--drives", type=int, default=8, help="drives per controller")
+    parser.add_argument("--iml", type=int, default=100, help="IML entries per system")
+    parser.add_argument("--iel", type=int, default=100, help="IEL entries")
+    parser.add_argument("--sl", type=int, default=100, help="security log entries per system")
+    parser.add_argument("--bios-attributes", type=int, default=200, help="BIOS attributes")
+    parser.add_argument("--firmware", type=int, default=20, help="firmware inventory items")
+    parser.add_argument(
+        "--page-size", type=int, default=0, help="collection members per page, 0 for no paging"
+    )
+    parser.add_argument(
+        "--paging",
+        choices=["nextlink", "nextpage"],
+        default="nextlink",
+        help="Members@odata.nextLink ($skip/$top) or links.NextPage (?page=N) paging",
+    )
+    parser.add_argument(
+        "--update-polls",
+        type=int,
+        default=2,
+        help="UpdateService polls reporting a busy state after a component upload",
+    )
+    parser.add_argument(
+        "--update-result",
+        choices=["Complete", "Error"],
+        default="Complete",
+        help="UpdateService state once an upload is processed",
+    )
+    parser.add_argument("--ahs-size", type=int, default=1024, help="AHS download size in KiB")
+    parser.add_argument(
+        "--log-interval",
+        type=float,
+        default=0.0,
+        help="seconds between new entries added to every log, 0 for static logs",
+    )
+    parser.add_argument(
+        "--ahs-drop",
+        type=int,
+        default=0,
+        help="close the first AHS download after this many KiB, 0 to never",
+    )
+    parser.add_argument(
+        "--sse",
+        action="store_true",
+        help="serve a server-sent event stream announcing new log entries",
+    )
+    parser.add_argument("--latency", type=float, default=0.0, help="latency per request in ms")
+    parser.add_argument(
+        "--bandwidth", type=float, default=0.0, help="bandwidth limit in KiB/s, 0 for none"
+    )
+    parser.add_argument("--cert", help="TLS certificate file")
+    parser.add_argument("--key", help="TLS private key file")
+    parser.add_argument("--plain", action="store_true", help="serve plain HTTP")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log every request")
+    options = parser.parse_args()
+
+    tls = None
+    if not options.plain:
+        tls = (options.cert, options.key)
+        if not (options.cert and options.key):
+            tls = self_signed_cert(tempfile.mkdtemp(prefix="ilorest-simulator-"))
+
+    server = IloSimulator(
+        (options.host, options.port),
+        systems=options.systems,
+        controllers=options.controllers,
+        drives=options.drives,
+        iml=options.iml,
+        iel=options.iel,
+        sl=options.sl,
+        bios_attributes=options.bios_attributes,
+        firmware=options.firmware,
+        page_size=options.page_size,
+        paging=options.paging,
+        update_polls=options.update_polls,
+        update_result=options.update_result,
+        ahs_size=options.ahs_size * 1024,
+        sse=options.sse,
+        ahs_drop=options.ahs_drop * 1024,
+        latency=options.latency / 1000.0,
+        bandwidth=int(options.bandwidth * 1024),
+        tls=tls,
+        verbose=options.verbose,
+    )
+    sys.stdout.write(
+        "Serving %s resources on %s\n" % (len(server.resources), server.url)
+    )
+    sys.stdout.flush()
+    if options.log_interval > 0:
+        grower = threading.Thread(target=server.grow_logs, args=(options.log_interval,))
+        grower.daemon = True
+        grower.start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
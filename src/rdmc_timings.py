@@ -0,0 +1,253 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""Timing spans for RDMC (--timings and --trace-file).
+
+Spans are recorded around command dispatch, command loading, login/select, the RmcApp HTTP
+handlers and output rendering. While tracing is off span() hands back a shared no-op context
+manager and no method is wrapped, so the cost is one attribute lookup and call per span.
+"""
+
+# ---------Imports---------
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+# ---------End of imports---------
+
+# RmcApp methods timed while tracing, with their span category
+APP_SPANS = (
+    ("restore", "cache"),
+    ("save", "cache"),
+    ("login", "login"),
+    ("select", "select"),
+    ("_build_monolith", "monolith"),
+    ("get_handler", "http"),
+    ("head_handler", "http"),
+    ("post_handler", "http"),
+    ("put_handler", "http"),
+    ("patch_handler", "http"),
+    ("delete_handler", "http"),
+)
+
+# UI methods timed while tracing
+RENDER_SPANS = ("print_out_json", "print_out_json_ordered", "print_out_human_readable")
+
+
+class _NullSpan(object):
+    """Context manager returned while tracing is off"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+_NULLSPAN = _NullSpan()
+
+
+class _Span(object):
+    """A recorded span, added to the tracer once it ends"""
+
+    __slots__ = ("tracer", "name", "cat", "args", "start")
+
+    def __init__(self, tracer, name, cat, args):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.tracer.spans.append(
+            (
+                self.name,
+                self.cat,
+                self.start,
+                time.perf_counter() - self.start,
+                threading.current_thread().ident,
+                self.args,
+            )
+        )
+        return False
+
+
+class Tracer(object):
+    """Collects timing spans for one command line"""
+
+    def __init__(self):
+        self.enabled = False
+        self.spans = []
+        self.origin = None
+        self._patched = []
+
+    def span(self, name, cat="rdmc", args=None):
+        """Context manager timing a block
+
+        :param name: span name
+        :type name: str.
+        :param cat: span category
+        :type cat: str.
+        :param args: extra details shown in the trace viewer
+        :type args: dict.
+        """
+        if not self.enabled:
+            return _NULLSPAN
+        return _Span(self, name, cat, args)
+
+    def start(self, app=None, ui=None):
+        """Start recording and time the RmcApp and UI methods listed in APP_SPANS and
+        RENDER_SPANS
+
+        :param app: application instance to time
+        :type app: RmcApp.
+        :param ui: UI class to time
+        :type ui: class.
+        """
+        self.spans = []
+        self.origin = time.perf_counter()
+        self.enabled = True
+        if app is not None:
+            for attr, cat in APP_SPANS:
+                if cat == "http":
+                    self.instrument(app, attr, cat, self._http_args)
+                else:
+                    self.instrument(app, attr, cat)
+        if ui is not None:
+            for attr in RENDER_SPANS:
+                self.instrument(ui, attr, "render")
+
+    def stop(self):
+        """Stop recording and restore the timed methods. A method wrapped again after
+        start() keeps its wrappers, the timing wrapper inside them passes calls through."""
+        self.enabled = False
+        while self._patched:
+            obj, attr, original, wrapper = self._patched.pop()
+            if vars(obj).get(attr) is not wrapper:
+                continue
+            if original is None:
+                delattr(obj, attr)
+            else:
+                setattr(obj, attr, original)
+
+    def instrument(self, obj, attr, cat, argsfunc=None):
+        """Wrap obj.attr so every call is recorded as a span until stop()
+
+        :param obj: instance or class owning the method
+        :type obj: object.
+        :param attr: method name
+        :type attr: str.
+        :param cat: span category
+        :type cat: str.
+        :param argsfunc: builds the span details from (args, kwargs, result)
+        :type argsfunc: function.
+        """
+        func = getattr(obj, attr, None)
+        if func is None:
+            return
+        # put back what obj itself defined, inherited and class methods are uncovered again
+        original = vars(obj).get(attr)
+        tracer = self
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            span = _Span(tracer, attr, cat, None)
+            with span:
+                result = func(*args, **kwargs)
+                if argsfunc:
+                    span.args = argsfunc(args, kwargs, result)
+            return result
+
+        setattr(obj, attr, wrapper)
+        self._patched.append((obj, attr, original, wrapper))
+
+    @staticmethod
+    def _http_args(args, kwargs, result):
+        """Span details of an HTTP handler call"""
+        path = args[0] if args else kwargs.get("get_path", kwargs.get("put_path"))
+        details = {"path": str(path)}
+        status = getattr(result, "status", None)
+        if status is not None:
+            details["status"] = status
+        return details
+
+    def summary(self):
+        """Aggregate the spans by name
+
+        :returns: list of (name, category, count, total, max) sorted by total time
+        """
+        totals = {}
+        for name, cat, _, duration, _, _ in self.spans:
+            entry = totals.setdefault(name, [name, cat, 0, 0.0, 0.0])
+            entry[2] += 1
+            entry[3] += duration
+            entry[4] = max(entry[4], duration)
+        return sorted((tuple(entry) for entry in totals.values()), key=lambda x: -x[3])
+
+    def print_summary(self, stream=None):
+        """Write the --timings table, stderr by default so command output stays parseable
+
+        :param stream: stream to write to
+        :type stream: file.
+        """
+        stream = stream or sys.stderr
+        stream.write(
+            "\n%-28s %-10s %7s %11s %11s %11s\n"
+            % ("span", "category", "count", "total(ms)", "mean(ms)", "max(ms)")
+        )
+        for name, cat, count, total, longest in self.summary():
+            stream.write(
+                "%-28s %-10s %7d %11.1f %11.1f %11.1f\n"
+                % (name, cat, count, total * 1000, total * 1000 / count, longest * 1000)
+            )
+        stream.flush()
+
+    def write_trace(self, filename):
+        """Write the spans as a Chrome trace event file
+
+        :param filename: trace file name
+        :type filename: str.
+        """
+        pid = os.getpid()
+        events = []
+        for name, cat, start, duration, tid, args in self.spans:
+            event = {
+                "name": name,
+                "cat": cat,
+                "ph": "X",
+                "ts": round((start - self.origin) * 1e6, 3),
+                "dur": round(duration * 1e6, 3),
+                "pid": pid,
+                "tid": tid,
+            }
+            if args:
+                event["args"] = args
+            events.append(event)
+        events.sort(key=lambda x: x["ts"])
+        with open(filename, "w") as tracefile:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, tracefile)
@@ -0,0 +1,116 @@
+###
+# Copyright 2016-2021 Hewlett Packard Enterprise, Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###
+
+# -*- coding: utf-8 -*-
+"""Multiple server runs against simulated iLOs mixed with unreachable ones. The workers share
+one process, a server failing must not fail the others."""
+
+import glob
+import json
+import os
+import socket
+import subprocess
+import sys
+
+import pytest
+
+SRCDIR = os.path.normpath(os.path.join(os.path.dirname(__file__), os.pardir, "src"))
+sys.path.insert(0, SRCDIR)
+
+from rdmc_replay import self_signed_cert
+from rdmc_simulator import IloSimulator
+
+
+def closed_port():
+    """Local port nothing listens on"""
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+@pytest.fixture(scope="module")
+def inventory(tmp_path_factory):
+    """Inventory of two simulated iLOs and two unreachable ones, reachable hosts first"""
+    work = tmp_path_factory.mktemp("fleet")
+    servers = [
+        IloSimulator(("127.0.0.1", 0), tls=self_signed_cert(str(work))) for _ in range(2)
+    ]
+    for server in servers:
+        server.start()
+    urls = [server.url for server in servers]
+    urls += ["https://127.0.0.1:%s" % closed_port() for _ in range(2)]
+    filename = work / "inventory.txt"
+    filename.write_text("".join("--url %s -u admin -p password\n" % url for url in urls))
+    yield str(work), str(filename), urls
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def rdmc(work, args):
+    """Run rdmc in a fresh interpreter, returns the summary of the multiple server run"""
+    cmdline = [sys.executable, os.path.join(SRCDIR, "rdmc.py"), "--nologo"]
+    cmdline += ["--cache-dir", os.path.join(work, "cache")] + args
+    subprocess.run(cmdline, cwd=work, stdin=subprocess.DEVNULL, capture_output=True)
+    summaries = sorted(glob.glob(os.path.join(work, "out", "*", "summary.json")))
+    with open(summaries[-1]) as summary:
+        return json.load(summary)
+
+
+def returncodes(report, urls):
+    """Return codes of the servers of a summary in inventory order"""
+    codes = {server["host"]: server["returncode"] for server in report["servers"]}
+    return [codes[url.split("//")[-1]] for url in urls]
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_load_mixed_inventory(inventory, workers):
+    work, filename, urls = inventory
+    os.makedirs(os.path.join(work, "out"), exist_ok=True)
+    bios = os.path.join(work, "bios.json")
+    if not os.path.isfile(bios):
+        subprocess.check_call(
+            [sys.executable, os.path.join(SRCDIR, "rdmc.py"), "--nologo", "--nocache"]
+            + ["save", "--select", "Bios.", "-f", bios, "--url", urls[0]]
+            + ["-u", "admin", "-p", "password"],
+            cwd=work,
+            stdout=subprocess.DEVNULL,
+        )
+
+    report = rdmc(
+        work, ["load", "-m", filename, "-f", bios, "--workers", str(workers), "-o", "out"]
+    )
+
+    codes = returncodes(report, urls)
+    assert codes[:2] == [0, 0]
+    assert all(codes[2:])
+
+
+def test_fleet_mixed_inventory(inventory):
+    work, filename, urls = inventory
+    os.makedirs(os.path.join(work, "out"), exist_ok=True)
+
+    report = rdmc(
+        work,
+        ["fleet", "--inventory", filename, "--workers", "4", "-o", "out"]
+        + ["--", "get", "--select", "Bios."],
+    )
+
+    codes = returncodes(report, urls)
+    assert codes[:2] == [0, 0]
+    assert all(codes[2:])